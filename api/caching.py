@@ -0,0 +1,80 @@
+"""
+Условные запросы и HTTP кэширование списков тиков
+
+Кэшируются только закрытые периоды (date_to старше
+HTTP_CACHE_IMMUTABLE_AFTER секунд): новые тики в них уже не попадают,
+поэтому ответ кэшируется на HTTP_CACHE_MAX_AGE как immutable. Валидатор
+ответа - сводка тиков периода (количество, время первого и последнего
+тика, наибольший id и сумма цен) и схема хранения, из которой читает
+API. Совпадение If-None-Match (или If-Modified-Since) дает ответ 304 без
+выборки и сериализации тиков. Открытые периоды и /all отдаются без
+валидатора, чтобы не считать сводку всей истории перед каждой страницей.
+"""
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+from sqlalchemy.engine import Row
+
+from deribit_task.config import HTTP_CACHE_IMMUTABLE_AFTER, HTTP_CACHE_MAX_AGE, PRICE_STORAGE_READ
+
+# Версия представления: увеличивается при изменении формата ответа, чтобы кэши не отдавали старый
+REPRESENTATION_VERSION = 2
+
+# Заголовки ответа по открытому периоду: кэш не должен отдавать его без запроса к API
+OPEN_RANGE_HEADERS = {'Cache-Control': 'no-cache'}
+
+
+def is_closed_range(date_to: Optional[int], now: Optional[float] = None) -> bool:
+    """
+    Проверяет, закрыт ли период: новые тики в него уже не попадут
+    """
+    if date_to is None:
+        return False
+    return date_to < (time.time() if now is None else now) - HTTP_CACHE_IMMUTABLE_AFTER
+
+
+def cache_headers(stats: Row) -> Dict[str, str]:
+    """
+    Формирует заголовки ETag, Last-Modified и Cache-Control ответа по закрытому периоду
+
+    :param stats: Строка с полями count, first_timestamp, last_timestamp, last_id, price_sum периода
+    :return: Словарь заголовков
+    """
+    validator = (
+        f"{REPRESENTATION_VERSION}:{PRICE_STORAGE_READ}:{stats.count}:{stats.first_timestamp}:"
+        f"{stats.last_timestamp}:{stats.last_id}:{stats.price_sum}"
+    )
+    headers = {
+        'ETag': f'"{hashlib.sha1(validator.encode()).hexdigest()[:20]}"',
+        'Cache-Control': f'public, max-age={HTTP_CACHE_MAX_AGE}, immutable',
+    }
+    # Время последнего тика закрытого периода: после закрытия данные периода не меняются
+    if stats.last_timestamp is not None:
+        headers['Last-Modified'] = formatdate(stats.last_timestamp, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    Проверяет условные заголовки запроса: не изменился ли ответ у клиента
+
+    If-None-Match имеет приоритет над If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return headers['ETag'] in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    last_modified = headers.get('Last-Modified')
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
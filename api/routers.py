@@ -1,14 +1,48 @@
 """
 Роутеры для API endpoints
 """
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional
+import asyncio
+import base64
+import binascii
+from itertools import groupby
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketDisconnect
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
-from deribit_task.database import get_db
-from deribit_task.crud import PriceRepository
-from deribit_task.api.schemas import PriceTickResponse, PriceTickListResponse, ErrorResponse
-from deribit_task.config import SUPPORTED_TICKERS
+from deribit_task.broadcast import Subscription, price_broadcaster
+from deribit_task.cache import encode_tick, latest_price_cache
+from deribit_task.export import EXPORT_ENCODERS, encode_batches
+from deribit_task.database import ReadSessionFactory, get_fresh_read_sessions, get_read_db
+from deribit_task.crud import AsyncPriceRepository
+from deribit_task.models import PriceTick
+from deribit_task.tickers import ticker_registry
+from deribit_task.api.caching import OPEN_RANGE_HEADERS, cache_headers, is_closed_range, is_not_modified
+from deribit_task.api.serializers import dump_tick_batch, dump_tick_list, dump_tick_lines
+from deribit_task.api.schemas import (
+    PriceTickResponse,
+    PriceTickListResponse,
+    PriceTickBatchResponse,
+    LatestPriceListResponse,
+    OHLCCandleResponse,
+    OHLCResponse,
+    TickerResponse,
+    TickerListResponse,
+    ErrorResponse,
+)
+from deribit_task.config import (
+    OHLC_INTERVALS,
+    ROLLUPS_ENABLED,
+    API_DEFAULT_PAGE_SIZE,
+    API_MAX_PAGE_SIZE,
+    API_STREAM_BATCH_SIZE,
+    API_MAX_BATCH_TICKERS,
+    API_FAST_SERIALIZATION,
+    EXPORT_BATCH_SIZE,
+    LIVE_STREAM_KEEPALIVE,
+)
 
 router = APIRouter(prefix="/api/v1/prices", tags=["Prices"])
 
@@ -21,48 +55,332 @@ def validate_ticker(ticker: str) -> str:
     :return: Валидный тикер
     :raises HTTPException: Если тикер не поддерживается
     """
-    if ticker not in SUPPORTED_TICKERS:
+    if ticker not in ticker_registry:
         raise HTTPException(
             status_code=400,
-            detail=f"Неподдерживаемый тикер. Поддерживаемые тикеры: {', '.join(SUPPORTED_TICKERS)}"
+            detail=f"Неподдерживаемый тикер {ticker}. Список поддерживаемых тикеров: {router.prefix}/tickers"
         )
     return ticker
 
 
+def parse_tickers(tickers: str, max_count: Optional[int] = None) -> List[str]:
+    """
+    Разбирает и валидирует список тикеров через запятую
+    
+    :param tickers: Тикеры через запятую (например, BTC_USD,ETH_USD)
+    :param max_count: Максимальное количество тикеров (опционально)
+    :return: Список валидных тикеров
+    :raises HTTPException: Если список пуст, слишком длинный или тикер не поддерживается
+    """
+    names = list(dict.fromkeys(name.strip() for name in tickers.split(',') if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="Не указаны тикеры")
+    if max_count is not None and len(names) > max_count:
+        raise HTTPException(status_code=400, detail=f"Слишком много тикеров: максимум {max_count}")
+    return [validate_ticker(name) for name in names]
+
+
+def validate_interval(interval: str) -> int:
+    """
+    Валидирует интервал свечей OHLC
+    
+    :param interval: Интервал для валидации (например, 1m или 1h)
+    :return: Размер интервала в секундах
+    :raises HTTPException: Если интервал не поддерживается
+    """
+    if interval not in OHLC_INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неподдерживаемый интервал. Поддерживаемые интервалы: {', '.join(OHLC_INTERVALS)}"
+        )
+    return OHLC_INTERVALS[interval]
+
+
+def encode_cursor(tick: Union[PriceTick, Row]) -> str:
+    """
+    Кодирует keyset-курсор по (timestamp, id) тика
+    
+    :param tick: Последний тик страницы (ORM объект или строка с колонками id и timestamp)
+    :return: Непрозрачная строка курсора
+    """
+    raw = f"{tick.timestamp}:{tick.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Декодирует keyset-курсор
+    
+    :param cursor: Строка курсора из поля next_cursor
+    :return: Ключ (timestamp, id)
+    :raises HTTPException: Если курсор некорректен
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, tick_id = raw.split(':')
+        return int(timestamp), int(tick_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+async def _ndjson_lines(ticks: AsyncIterator[PriceTick]) -> AsyncIterator[str]:
+    """
+    Сериализует тики в NDJSON построчно
+    """
+    async for tick in ticks:
+        yield PriceTickResponse.model_validate(tick).model_dump_json() + '\n'
+
+
+async def _ndjson_row_batches(ticker: str, batches: AsyncIterator[List[Row]]) -> AsyncIterator[bytes]:
+    """
+    Сериализует пачки строк (id, price, timestamp) в NDJSON без Pydantic моделей
+    """
+    async for rows in batches:
+        yield dump_tick_lines(ticker, rows)
+
+
+async def _fast_list_response(
+    db: AsyncSession,
+    ticker: str,
+    date_from: Optional[int],
+    date_to: Optional[int],
+    limit: Optional[int],
+    cursor: Optional[Tuple[int, int]],
+    format: str
+) -> Response:
+    """
+    Формирует ответ со списком тиков из строк колонок, сериализуя их сразу в байты
+    
+    Формат ответа совпадает с обычным путем, но без ORM объектов и
+    валидации Pydantic на каждую строку.
+    """
+    if format == 'ndjson':
+        batches = AsyncPriceRepository.iter_row_batches(
+            db, ticker, date_from, date_to, after=cursor, batch_size=API_STREAM_BATCH_SIZE
+        )
+        return StreamingResponse(_ndjson_row_batches(ticker, batches), media_type='application/x-ndjson')
+
+    if limit is None and cursor is None:
+        rows = await AsyncPriceRepository.get_rows(db, ticker, date_from, date_to)
+        return Response(content=dump_tick_list(ticker, rows), media_type='application/json')
+
+    limit = limit or API_DEFAULT_PAGE_SIZE
+    rows = await AsyncPriceRepository.get_rows(db, ticker, date_from, date_to, cursor, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    return Response(content=dump_tick_list(ticker, rows, next_cursor), media_type='application/json')
+
+
+async def _list_response(
+    db: AsyncSession,
+    ticker: str,
+    date_from: Optional[int],
+    date_to: Optional[int],
+    limit: Optional[int],
+    after: Optional[str],
+    format: str
+):
+    """
+    Формирует ответ со списком тиков: целиком, постранично или потоком NDJSON
+    """
+    cursor = decode_cursor(after) if after else None
+
+    if API_FAST_SERIALIZATION:
+        return await _fast_list_response(db, ticker, date_from, date_to, limit, cursor, format)
+
+    if format == 'ndjson':
+        ticks = AsyncPriceRepository.iter_by_ticker(
+            db, ticker, date_from, date_to, after=cursor, batch_size=API_STREAM_BATCH_SIZE
+        )
+        return StreamingResponse(_ndjson_lines(ticks), media_type='application/x-ndjson')
+
+    if limit is None and cursor is None:
+        price_ticks = await AsyncPriceRepository.get_price_by_date(db, ticker, date_from, date_to)
+        return PriceTickListResponse(
+            ticker=ticker,
+            count=len(price_ticks),
+            data=[PriceTickResponse.model_validate(tick) for tick in price_ticks]
+        )
+
+    limit = limit or API_DEFAULT_PAGE_SIZE
+    price_ticks = await AsyncPriceRepository.get_page(db, ticker, limit + 1, cursor, date_from, date_to)
+    next_cursor = None
+    if len(price_ticks) > limit:
+        price_ticks = price_ticks[:limit]
+        next_cursor = encode_cursor(price_ticks[-1])
+
+    return PriceTickListResponse(
+        ticker=ticker,
+        count=len(price_ticks),
+        data=[PriceTickResponse.model_validate(tick) for tick in price_ticks],
+        next_cursor=next_cursor
+    )
+
+
+async def _cached_list_response(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    ticker: str,
+    date_from: Optional[int],
+    date_to: Optional[int],
+    limit: Optional[int],
+    after: Optional[str],
+    format: str
+):
+    """
+    Формирует ответ со списком тиков с заголовками HTTP кэширования
+    
+    Сводка периода для валидатора считается только для закрытого периода;
+    если ответ у клиента не изменился, возвращается 304 без выборки тиков.
+    """
+    if is_closed_range(date_to):
+        stats = await AsyncPriceRepository.get_range_stats(db, ticker, date_from, date_to)
+        headers = cache_headers(stats)
+        if is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+    else:
+        headers = OPEN_RANGE_HEADERS
+
+    result = await _list_response(db, ticker, date_from, date_to, limit, after, format)
+    # Заголовки параметра response не применяются к возвращенному Response
+    (result if isinstance(result, Response) else response).headers.update(headers)
+    return result
+
+
+def _group_rows(
+    tickers: Sequence[str],
+    rows: Sequence[Row],
+    limit: Optional[int]
+) -> List[Tuple[str, List[Row], Optional[str]]]:
+    """
+    Группирует строки тиков набора тикеров по тикеру в порядке запроса
+    
+    Строки каждого тикера получены с запасом в одну строку сверх limit:
+    ее наличие означает следующую страницу, курсор которой подходит для /filter.
+    
+    :return: Тройки (тикер, строки, курсор следующей страницы)
+    """
+    by_ticker: Dict[str, List[Row]] = {
+        ticker: list(group) for ticker, group in groupby(rows, key=lambda row: row.ticker)
+    }
+    groups = []
+    for ticker in tickers:
+        ticker_rows = by_ticker.get(ticker, [])
+        next_cursor = None
+        if limit is not None and len(ticker_rows) > limit:
+            ticker_rows = ticker_rows[:limit]
+            next_cursor = encode_cursor(ticker_rows[-1])
+        groups.append((ticker, ticker_rows, next_cursor))
+    return groups
+
+
+async def _sse_events(tickers: List[str], keepalive: float = LIVE_STREAM_KEEPALIVE) -> AsyncIterator[bytes]:
+    """
+    Формирует поток Server-Sent Events из тиков подписки
+    
+    Подписка создается при старте потока, поэтому ответ, который так и
+    не начал отправляться, не оставляет подписку. Каждый тик - событие
+    tick с JSON PriceTickResponse. При отсутствии тиков раз в keepalive
+    секунд отправляется комментарий, чтобы прокси не закрывали
+    соединение. Отключенный из-за переполнения очереди клиент получает
+    событие dropped.
+    """
+    subscription = price_broadcaster.subscribe(tickers)
+    if subscription is None:
+        return
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+                continue
+            if message is None:
+                if subscription.dropped:
+                    yield b'event: dropped\ndata: {"reason": "slow_consumer"}\n\n'
+                return
+            yield b'event: tick\ndata: ' + message + b'\n\n'
+    finally:
+        price_broadcaster.unsubscribe(subscription)
+
+
+async def _close_on_disconnect(websocket: WebSocket, subscription: Subscription):
+    """
+    Читает сообщения клиента WebSocket до отключения и закрывает подписку
+    """
+    try:
+        while (await websocket.receive())['type'] != 'websocket.disconnect':
+            pass
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        subscription.close()
+
+
+@router.get("/tickers", response_model=TickerListResponse)
+async def get_tickers(
+    kind: Optional[str] = Query(None, pattern="^(index|mark)$", description="Вид цены: index или mark")
+):
+    """
+    Получение списка поддерживаемых тикеров
+    
+    - **kind**: index - индексы Deribit, mark - инструменты с mark price (опционально)
+    """
+    tickers = [TickerResponse(name=ticker.name, kind=ticker.kind) for ticker in ticker_registry
+               if kind is None or ticker.kind == kind]
+    return TickerListResponse(count=len(tickers), data=tickers)
+
+
 @router.get("/all", response_model=PriceTickListResponse)
-def get_all_prices(
+async def get_all_prices(
+    request: Request,
+    response: Response,
     ticker: str = Query(..., description="Тикер валюты (BTC_USD или ETH_USD)"),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=API_MAX_PAGE_SIZE, description="Размер страницы"),
+    after: Optional[str] = Query(None, description="Курсор next_cursor предыдущей страницы"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="Формат ответа: json или ndjson"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получение всех сохраненных данных по указанной валюте
     
+    Ответ отдается с Cache-Control: no-cache (история тикера не закрыта).
+    
     - **ticker**: Тикер валюты (обязательный параметр)
+    - **limit**: Размер страницы (опционально, включает постраничную выдачу)
+    - **after**: Курсор следующей страницы из поля next_cursor (опционально)
+    - **format**: json (по умолчанию) или ndjson для потоковой выдачи
     """
     validate_ticker(ticker)
     
-    price_ticks = PriceRepository.get_all_by_ticker(db, ticker)
-    
-    return PriceTickListResponse(
-        ticker=ticker,
-        count=len(price_ticks),
-        data=[PriceTickResponse.model_validate(tick) for tick in price_ticks]
-    )
+    return await _cached_list_response(request, response, db, ticker, None, None, limit, after, format)
 
 
 @router.get("/latest", response_model=PriceTickResponse)
-def get_latest_price(
+async def get_latest_price(
     ticker: str = Query(..., description="Тикер валюты (BTC_USD или ETH_USD)"),
-    db: Session = Depends(get_db)
+    sessions: ReadSessionFactory = Depends(get_fresh_read_sessions)
 ):
     """
     Получение последней цены валюты
     
+    Ответ отдается из кэша последних цен без обращения к БД и без
+    соединения из пула, если запись в кэше не старше
+    LATEST_PRICE_CACHE_MAX_AGE секунд.
+    
     - **ticker**: Тикер валюты (обязательный параметр)
     """
     validate_ticker(ticker)
     
-    latest_tick = PriceRepository.get_latest_price(db, ticker)
+    cached = latest_price_cache.get(ticker)
+    if cached is not None:
+        return Response(content=cached.body, media_type="application/json")
+    
+    async with sessions() as db:
+        latest_tick = await AsyncPriceRepository.get_latest_price(db, ticker)
     
     if not latest_tick:
         raise HTTPException(
@@ -70,29 +388,249 @@ def get_latest_price(
             detail=f"Цены для тикера {ticker} не найдены"
         )
     
+    latest_price_cache.update({
+        'id': latest_tick.id,
+        'ticker': latest_tick.ticker,
+        'price': latest_tick.price,
+        'timestamp': latest_tick.timestamp
+    })
+    
     return PriceTickResponse.model_validate(latest_tick)
 
 
+@router.get("/latest/batch", response_model=LatestPriceListResponse)
+async def get_latest_prices(
+    tickers: str = Query(..., description="Тикеры через запятую (например, BTC_USD,ETH_USD)"),
+    sessions: ReadSessionFactory = Depends(get_fresh_read_sessions)
+):
+    """
+    Получение последних цен набора валют одним запросом
+    
+    Цены берутся из кэша последних цен; тикеры без свежей записи в кэше
+    читаются из БД одним запросом (соединение открывается только для них). Тикеры без сохраненных цен в ответ
+    не попадают.
+    
+    - **tickers**: Тикеры через запятую (обязательный параметр)
+    """
+    names = parse_tickers(tickers, API_MAX_BATCH_TICKERS)
+    
+    bodies: Dict[str, bytes] = {}
+    for ticker in names:
+        cached = latest_price_cache.get(ticker)
+        if cached is not None:
+            bodies[ticker] = cached.body
+    
+    missing = [ticker for ticker in names if ticker not in bodies]
+    rows = []
+    if missing:
+        async with sessions() as db:
+            rows = await AsyncPriceRepository.get_latest_prices(db, missing)
+    for row in rows:
+        tick = {'id': row.id, 'ticker': row.ticker, 'price': row.price, 'timestamp': row.timestamp}
+        latest_price_cache.update(tick)
+        bodies[row.ticker] = encode_tick(tick)
+    
+    # Тела тиков уже сериализованы кэшем, ответ собирается из них без повторной сериализации
+    data = [bodies[ticker] for ticker in names if ticker in bodies]
+    content = b'{"count":%d,"data":[' % len(data) + b','.join(data) + b']}'
+    return Response(content=content, media_type="application/json")
+
+
+@router.get("/filter/batch", response_model=PriceTickBatchResponse)
+async def get_prices_by_date_batch(
+    tickers: str = Query(..., description="Тикеры через запятую (например, BTC_USD,ETH_USD)"),
+    date_from: Optional[int] = Query(None, description="Начальная дата в UNIX timestamp"),
+    date_to: Optional[int] = Query(None, description="Конечная дата в UNIX timestamp"),
+    limit: Optional[int] = Query(None, ge=1, le=API_MAX_PAGE_SIZE, description="Размер страницы на тикер"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получение цен набора валют с фильтром по дате одним запросом
+    
+    Тики возвращаются сгруппированными по тикеру в порядке запроса. С
+    limit каждый тикер ограничен limit тиками, а next_cursor тикера
+    продолжает выдачу через /filter.
+    
+    - **tickers**: Тикеры через запятую (обязательный параметр)
+    - **date_from**: Начальная дата в UNIX timestamp (опционально)
+    - **date_to**: Конечная дата в UNIX timestamp (опционально)
+    - **limit**: Размер страницы на тикер (опционально)
+    """
+    names = parse_tickers(tickers, API_MAX_BATCH_TICKERS)
+    
+    rows = await AsyncPriceRepository.get_batch_rows(
+        db, names, date_from, date_to, limit + 1 if limit is not None else None
+    )
+    groups = _group_rows(names, rows, limit)
+    
+    if API_FAST_SERIALIZATION:
+        return Response(content=dump_tick_batch(groups), media_type='application/json')
+    
+    return PriceTickBatchResponse(
+        count=len(groups),
+        data=[
+            PriceTickListResponse(
+                ticker=ticker,
+                count=len(ticker_rows),
+                data=[PriceTickResponse.model_validate(row) for row in ticker_rows],
+                next_cursor=next_cursor
+            )
+            for ticker, ticker_rows, next_cursor in groups
+        ]
+    )
+
+
 @router.get("/filter", response_model=PriceTickListResponse)
-def get_price_by_date(
+async def get_price_by_date(
+    request: Request,
+    response: Response,
     ticker: str = Query(..., description="Тикер валюты (BTC_USD или ETH_USD)"),
     date_from: Optional[int] = Query(None, description="Начальная дата в UNIX timestamp"),
     date_to: Optional[int] = Query(None, description="Конечная дата в UNIX timestamp"),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=API_MAX_PAGE_SIZE, description="Размер страницы"),
+    after: Optional[str] = Query(None, description="Курсор next_cursor предыдущей страницы"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="Формат ответа: json или ndjson"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получение цены валюты с фильтром по дате
     
+    Период с date_to старше HTTP_CACHE_IMMUTABLE_AFTER секунд закрыт:
+    ответ содержит ETag и Last-Modified, кэшируется на HTTP_CACHE_MAX_AGE
+    секунд, а запрос с совпадающим If-None-Match (или If-Modified-Since)
+    получает 304 без выборки тиков. Открытый период отдается с
+    Cache-Control: no-cache.
+    
     - **ticker**: Тикер валюты (обязательный параметр)
     - **date_from**: Начальная дата в UNIX timestamp (опционально)
     - **date_to**: Конечная дата в UNIX timestamp (опционально)
+    - **limit**: Размер страницы (опционально, включает постраничную выдачу)
+    - **after**: Курсор следующей страницы из поля next_cursor (опционально)
+    - **format**: json (по умолчанию) или ndjson для потоковой выдачи
     """
     validate_ticker(ticker)
     
-    price_ticks = PriceRepository.get_price_by_date(db, ticker, date_from, date_to)
+    return await _cached_list_response(request, response, db, ticker, date_from, date_to, limit, after, format)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_prices_sse(
+    tickers: str = Query(..., description="Тикеры через запятую (например, BTC_USD,ETH_USD)")
+):
+    """
+    Live поток новых тиков в формате Server-Sent Events
+    
+    Тики приходят по мере записи ингестером без запросов к БД. Тот же
+    поток доступен по WebSocket на этом же пути.
     
-    return PriceTickListResponse(
+    - **tickers**: Тикеры через запятую (обязательный параметр)
+    """
+    names = parse_tickers(tickers)
+    
+    if price_broadcaster.full:
+        raise HTTPException(status_code=503, detail="Достигнут лимит клиентов live потока цен")
+    return StreamingResponse(
+        _sse_events(names),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@router.websocket("/stream")
+async def stream_prices_ws(
+    websocket: WebSocket,
+    tickers: str = Query(..., description="Тикеры через запятую (например, BTC_USD,ETH_USD)")
+):
+    """
+    Live поток новых тиков по WebSocket: каждое сообщение - JSON PriceTickResponse
+    
+    Клиент, не успевающий забирать тики, отключается с кодом 1013.
+    """
+    try:
+        names = parse_tickers(tickers)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Неподдерживаемые тикеры")
+        return
+    
+    subscription = price_broadcaster.subscribe(names)
+    if subscription is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Достигнут лимит клиентов")
+        return
+    
+    await websocket.accept()
+    watcher = asyncio.create_task(_close_on_disconnect(websocket, subscription))
+    try:
+        while (message := await subscription.get()) is not None:
+            await websocket.send_text(message.decode())
+        if subscription.dropped:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Очередь клиента переполнена")
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        price_broadcaster.unsubscribe(subscription)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_prices(
+    ticker: str = Query(..., description="Тикер валюты (BTC_USD или ETH_USD)"),
+    date_from: Optional[int] = Query(None, description="Начальная дата в UNIX timestamp"),
+    date_to: Optional[int] = Query(None, description="Конечная дата в UNIX timestamp"),
+    format: str = Query("arrow", pattern="^(arrow|parquet|csv)$", description="Формат: arrow, parquet или csv"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Выгрузка истории тиков файлом для массовой обработки
+    
+    Файл формируется потоком по пачкам строк из серверного курсора
+    и содержит колонки id, ticker, price (decimal 20,8) и timestamp.
+    
+    - **ticker**: Тикер валюты (обязательный параметр)
+    - **date_from**: Начальная дата в UNIX timestamp (опционально)
+    - **date_to**: Конечная дата в UNIX timestamp (опционально)
+    - **format**: arrow (Arrow IPC stream, по умолчанию), parquet или csv (gzip)
+    """
+    validate_ticker(ticker)
+    
+    encoder = EXPORT_ENCODERS[format](ticker)
+    batches = AsyncPriceRepository.iter_row_batches(db, ticker, date_from, date_to, batch_size=EXPORT_BATCH_SIZE)
+    return StreamingResponse(
+        encode_batches(batches, encoder),
+        media_type=encoder.media_type,
+        headers={'Content-Disposition': f'attachment; filename="{ticker}.{encoder.extension}"'}
+    )
+
+
+@router.get("/ohlc", response_model=OHLCResponse)
+async def get_ohlc(
+    ticker: str = Query(..., description="Тикер валюты (BTC_USD или ETH_USD)"),
+    interval: str = Query(..., description="Интервал свечи: 1m, 5m, 1h или 1d"),
+    date_from: Optional[int] = Query(None, description="Начальная дата в UNIX timestamp"),
+    date_to: Optional[int] = Query(None, description="Конечная дата в UNIX timestamp"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Получение свечей OHLC, агрегированных на стороне БД
+    
+    Если включены таблицы предагрегированных свечей, ответ строится по ним
+    за O(количество свечей), иначе - агрегацией сырых тиков.
+    
+    - **ticker**: Тикер валюты (обязательный параметр)
+    - **interval**: Интервал свечи (обязательный параметр)
+    - **date_from**: Начальная дата в UNIX timestamp (опционально)
+    - **date_to**: Конечная дата в UNIX timestamp (опционально)
+    """
+    validate_ticker(ticker)
+    interval_seconds = validate_interval(interval)
+    
+    if ROLLUPS_ENABLED:
+        candles = await AsyncPriceRepository.get_ohlc_from_rollups(db, ticker, interval_seconds, date_from, date_to)
+    else:
+        candles = await AsyncPriceRepository.get_ohlc(db, ticker, interval_seconds, date_from, date_to)
+    
+    return OHLCResponse(
         ticker=ticker,
-        count=len(price_ticks),
-        data=[PriceTickResponse.model_validate(tick) for tick in price_ticks]
+        interval=interval,
+        count=len(candles),
+        data=[OHLCCandleResponse.model_validate(candle) for candle in candles]
     )
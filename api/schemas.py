@@ -29,6 +29,67 @@ class PriceTickListResponse(BaseModel):
     ticker: str
     count: int
     data: List[PriceTickResponse]
+    next_cursor: Optional[str] = None
+
+
+class LatestPriceListResponse(BaseModel):
+    """
+    Схема ответа для последних цен набора тикеров
+    """
+    count: int
+    data: List[PriceTickResponse]
+
+
+class PriceTickBatchResponse(BaseModel):
+    """
+    Схема ответа для списков тиков набора тикеров, сгруппированных по тикеру
+    """
+    count: int
+    data: List[PriceTickListResponse]
+
+
+class TickerResponse(BaseModel):
+    """
+    Схема ответа для тикера из реестра
+    """
+    name: str
+    kind: str
+
+
+class TickerListResponse(BaseModel):
+    """
+    Схема ответа для списка тикеров
+    """
+    count: int
+    data: List[TickerResponse]
+
+
+class OHLCCandleResponse(BaseModel):
+    """
+    Схема ответа для свечи OHLC
+    """
+    timestamp: int
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    count: int
+
+    class Config:
+        from_attributes = True
+        json_encoders = {
+            Decimal: str
+        }
+
+
+class OHLCResponse(BaseModel):
+    """
+    Схема ответа для списка свечей OHLC
+    """
+    ticker: str
+    interval: str
+    count: int
+    data: List[OHLCCandleResponse]
 
 
 class ErrorResponse(BaseModel):
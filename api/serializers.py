@@ -0,0 +1,64 @@
+"""
+Быстрая сериализация списков тиков в JSON без Pydantic моделей
+
+Формат совпадает с PriceTickListResponse и PriceTickResponse:
+цена передается строкой, как при json_encoders = {Decimal: str}.
+"""
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy.engine import Row
+
+
+def _tick_dict(ticker: str, row: Row) -> dict:
+    """
+    Преобразует строку с колонками id, price, timestamp в словарь PriceTickResponse
+    """
+    return {'id': row.id, 'ticker': ticker, 'price': str(row.price), 'timestamp': row.timestamp}
+
+
+def dump_tick_list(ticker: str, rows: Sequence[Row], next_cursor: Optional[str] = None) -> bytes:
+    """
+    Сериализует список тиков в JSON тело PriceTickListResponse
+
+    :param ticker: Тикер валюты
+    :param rows: Строки (id, price, timestamp)
+    :param next_cursor: Курсор следующей страницы (опционально)
+    :return: JSON в байтах
+    """
+    return orjson.dumps({
+        'ticker': ticker,
+        'count': len(rows),
+        'data': [_tick_dict(ticker, row) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+def dump_tick_lines(ticker: str, rows: Iterable[Row]) -> bytes:
+    """
+    Сериализует тики в строки NDJSON формата PriceTickResponse
+
+    :param ticker: Тикер валюты
+    :param rows: Строки (id, price, timestamp)
+    :return: NDJSON в байтах
+    """
+    return b''.join(orjson.dumps(_tick_dict(ticker, row)) + b'\n' for row in rows)
+
+
+def dump_tick_batch(groups: Sequence[Tuple[str, Sequence[Row], Optional[str]]]) -> bytes:
+    """
+    Сериализует списки тиков набора тикеров в JSON тело PriceTickBatchResponse
+
+    :param groups: Тройки (тикер, строки (id, price, timestamp), курсор следующей страницы)
+    :return: JSON в байтах
+    """
+    data: List[dict] = [
+        {
+            'ticker': ticker,
+            'count': len(rows),
+            'data': [_tick_dict(ticker, row) for row in rows],
+            'next_cursor': next_cursor,
+        }
+        for ticker, rows, next_cursor in groups
+    ]
+    return orjson.dumps({'count': len(data), 'data': data})
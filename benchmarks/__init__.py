@@ -0,0 +1,5 @@
+"""
+Нагрузочные бенчмарки API и путей записи тиков
+
+Запуск: python -m deribit_task.benchmarks --help
+"""
@@ -0,0 +1,230 @@
+"""
+Командная строка бенчмарков
+
+Примеры:
+    python -m deribit_task.benchmarks seed --rows 1000000 --tickers 4
+    python -m deribit_task.benchmarks http --base-url http://localhost:8000 --output http.json
+    python -m deribit_task.benchmarks ingest --output ingest.json
+    python -m deribit_task.benchmarks compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from deribit_task.config import SUPPORTED_TICKERS
+from deribit_task.benchmarks.stats import peak_rss_mb
+
+# Метрики, сравниваемые командой compare: (путь в сводке, больше - лучше)
+COMPARED_METRICS = [
+    (('throughput_per_s',), True),
+    (('ticks_per_s',), True),
+    (('latency_ms', 'p50'), False),
+    (('latency_ms', 'p95'), False),
+    (('latency_ms', 'p99'), False),
+]
+
+
+def _tickers(count: Optional[int]) -> List[str]:
+    """
+    Возвращает тикеры для бенчмарка: поддерживаемые, дополненные синтетическими до count
+    """
+    if not count:
+        return list(SUPPORTED_TICKERS)
+    tickers = list(SUPPORTED_TICKERS[:count])
+    tickers += [f"T{index}_USD" for index in range(count - len(tickers))]
+    return tickers
+
+
+def _git_commit() -> Optional[str]:
+    """
+    Возвращает хэш текущего коммита, если бенчмарк запущен из git репозитория
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _report(command: str, args: argparse.Namespace, results: Dict, server_pid: Optional[int] = None) -> Dict:
+    """
+    Собирает отчет бенчмарка с метаданными прогона
+    """
+    options = {key: value for key, value in vars(args).items() if key not in ('command', 'output')}
+    rss = {'benchmark': peak_rss_mb()}
+    if server_pid:
+        rss['server'] = peak_rss_mb(server_pid)
+    return {
+        'meta': {
+            'command': command,
+            'commit': _git_commit(),
+            'started_at': int(time.time()),
+            'python': platform.python_version(),
+            'options': options,
+        },
+        'results': results,
+        'peak_rss_mb': rss,
+    }
+
+
+def _write(report: Dict, output: Optional[str]):
+    """
+    Выводит отчет в файл или stdout
+    """
+    data = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w') as file:
+            file.write(data + '\n')
+    else:
+        print(data)
+
+
+def cmd_seed(args: argparse.Namespace) -> Dict:
+    """
+    Наполняет price_ticks синтетическими тиками
+    """
+    from deribit_task.benchmarks.seed import seed_ticks
+    from deribit_task.database import engine
+
+    start = args.start or int(time.time()) - args.rows // args.tickers * args.step
+    return {'seed': seed_ticks(
+        engine, args.rows, _tickers(args.tickers), start, args.step, args.chunk_size, not args.no_rollups
+    )}
+
+
+def cmd_http(args: argparse.Namespace) -> Dict:
+    """
+    Прогоняет HTTP нагрузку на запущенный API
+    """
+    from deribit_task.benchmarks.http_load import default_scenarios, run_http_load
+
+    date_to = args.date_to or int(time.time())
+    date_from = args.date_from or date_to - 24 * 60 * 60
+    scenarios = default_scenarios(_tickers(args.tickers), date_from, date_to, args.page_size, args.window)
+    return asyncio.run(run_http_load(
+        args.base_url.rstrip('/'), scenarios, args.requests, args.concurrency, args.warmup, args.scenario
+    ))
+
+
+def cmd_ingest(args: argparse.Namespace) -> Dict:
+    """
+    Прогоняет бенчмарки путей записи тиков
+    """
+    from deribit_task.benchmarks.ingest import bench_fetch_and_save, bench_save_price_ticks, bench_write_buffer
+    from deribit_task.database import engine
+
+    tickers = _tickers(args.tickers)
+    return {
+        'ingest.fetch_and_save_prices': asyncio.run(bench_fetch_and_save(engine, args.iterations, args.deribit_latency)),
+        'ingest.save_price_ticks': bench_save_price_ticks(engine, args.ticks, args.batch_size, tickers),
+        'ingest.write_buffer': asyncio.run(bench_write_buffer(engine, args.ticks, tickers)),
+    }
+
+
+def _metric(summary: Dict, path: tuple) -> Optional[float]:
+    """
+    Извлекает метрику из сводки по пути ключей
+    """
+    for key in path:
+        if not isinstance(summary, dict) or key not in summary:
+            return None
+        summary = summary[key]
+    return summary
+
+
+def compare_reports(before: Dict, after: Dict) -> List[Dict]:
+    """
+    Сравнивает два отчета по общим бенчмаркам
+
+    :param before: Базовый отчет
+    :param after: Новый отчет
+    :return: Строки сравнения с изменением в процентах и признаком регрессии
+    """
+    rows = []
+    for name, summary in after['results'].items():
+        baseline = before['results'].get(name)
+        if baseline is None:
+            continue
+        for path, higher_is_better in COMPARED_METRICS:
+            old, new = _metric(baseline, path), _metric(summary, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            rows.append({
+                'benchmark': name,
+                'metric': '.'.join(path),
+                'before': old,
+                'after': new,
+                'change_pct': round(change, 2),
+                'regression': change < 0 if higher_is_better else change > 0,
+            })
+    return rows
+
+
+def main():
+    """
+    Точка входа командной строки
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарки API и записи тиков")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    seed = subparsers.add_parser('seed', help="Наполнить price_ticks синтетическими тиками")
+    seed.add_argument('--rows', type=int, default=1_000_000, help="Количество тиков")
+    seed.add_argument('--tickers', type=int, default=len(SUPPORTED_TICKERS), help="Количество тикеров")
+    seed.add_argument('--start', type=int, help="Время первого тика в UNIX timestamp")
+    seed.add_argument('--step', type=int, default=1, help="Шаг времени между тиками тикера в секундах")
+    seed.add_argument('--chunk-size', type=int, default=100_000, help="Размер пачки записи")
+    seed.add_argument('--no-rollups', action='store_true', help="Не пересобирать таблицы свечей")
+
+    http = subparsers.add_parser('http', help="HTTP нагрузка на /latest, /all и /filter")
+    http.add_argument('--base-url', default='http://localhost:8000', help="Базовый URL API")
+    http.add_argument('--requests', type=int, default=2000, help="Запросов на сценарий")
+    http.add_argument('--concurrency', type=int, default=32, help="Одновременных запросов")
+    http.add_argument('--warmup', type=int, default=100, help="Прогревочных запросов на сценарий")
+    http.add_argument('--tickers', type=int, default=len(SUPPORTED_TICKERS), help="Количество тикеров")
+    http.add_argument('--page-size', type=int, default=100, help="Размер страницы /all и /filter")
+    http.add_argument('--window', type=int, default=3600, help="Ширина окна /filter в секундах")
+    http.add_argument('--date-from', type=int, help="Начало диапазона данных в UNIX timestamp")
+    http.add_argument('--date-to', type=int, help="Конец диапазона данных в UNIX timestamp")
+    http.add_argument('--scenario', action='append', help="Запустить только указанный сценарий")
+    http.add_argument('--server-pid', type=int, help="PID процесса API для замера пикового RSS")
+
+    ingest = subparsers.add_parser('ingest', help="Бенчмарки записи тиков с фейковым Deribit")
+    ingest.add_argument('--iterations', type=int, default=200, help="Циклов fetch_and_save_prices")
+    ingest.add_argument('--deribit-latency', type=float, default=0.0, help="Задержка фейкового Deribit в секундах")
+    ingest.add_argument('--ticks', type=int, default=100_000, help="Тиков для пакетной записи")
+    ingest.add_argument('--batch-size', type=int, default=1000, help="Размер пачки save_price_ticks")
+    ingest.add_argument('--tickers', type=int, default=len(SUPPORTED_TICKERS), help="Количество тикеров")
+
+    for subparser in (seed, http, ingest):
+        subparser.add_argument('--output', help="Файл для JSON отчета (по умолчанию stdout)")
+
+    compare = subparsers.add_parser('compare', help="Сравнить два JSON отчета")
+    compare.add_argument('before', help="Базовый отчет")
+    compare.add_argument('after', help="Новый отчет")
+    compare.add_argument('--threshold', type=float, default=10.0, help="Допустимое ухудшение в процентах")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == 'compare':
+        with open(args.before) as before, open(args.after) as after:
+            rows = compare_reports(json.load(before), json.load(after))
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        failed = [row for row in rows if row['regression'] and abs(row['change_pct']) > args.threshold]
+        sys.exit(1 if failed else 0)
+
+    commands = {'seed': cmd_seed, 'http': cmd_http, 'ingest': cmd_ingest}
+    results = commands[args.command](args)
+    _write(_report(args.command, args, results, getattr(args, 'server_pid', None)), args.output)
+
+
+if __name__ == '__main__':
+    main()
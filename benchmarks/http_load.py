@@ -0,0 +1,125 @@
+"""
+Конкурентная HTTP нагрузка на endpoints цен
+"""
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+from deribit_task.benchmarks.stats import summarize
+
+# Сценарий строит путь с query параметрами для очередного запроса
+PathFactory = Callable[[random.Random], str]
+
+
+def default_scenarios(
+    tickers: List[str],
+    date_from: int,
+    date_to: int,
+    page_size: int = 100,
+    window: int = 3600
+) -> Dict[str, PathFactory]:
+    """
+    Возвращает сценарии нагрузки на /latest, /all и /filter
+
+    /all и /filter запрашиваются постранично (limit), иначе один запрос
+    к большой таблице измерял бы только объем ответа.
+
+    :param tickers: Тикеры, по которым распределяются запросы
+    :param date_from: Начало диапазона данных в UNIX timestamp
+    :param date_to: Конец диапазона данных в UNIX timestamp
+    :param page_size: Размер страницы для /all и /filter
+    :param window: Ширина случайного окна /filter в секундах
+    """
+    def latest(rng: random.Random) -> str:
+        return f"/api/v1/prices/latest?ticker={rng.choice(tickers)}"
+
+    def all_prices(rng: random.Random) -> str:
+        return f"/api/v1/prices/all?ticker={rng.choice(tickers)}&limit={page_size}"
+
+    def filtered(rng: random.Random) -> str:
+        start = rng.randint(date_from, max(date_to - window, date_from))
+        return (
+            f"/api/v1/prices/filter?ticker={rng.choice(tickers)}"
+            f"&date_from={start}&date_to={start + window}&limit={page_size}"
+        )
+
+    return {'latest': latest, 'all': all_prices, 'filter': filtered}
+
+
+async def run_scenario(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    make_path: PathFactory,
+    requests: int,
+    concurrency: int,
+    seed: int = 0
+) -> Dict:
+    """
+    Выполняет requests запросов сценария с заданной конкурентностью
+
+    :param session: HTTP сессия
+    :param base_url: Базовый URL API
+    :param make_path: Фабрика путей запросов
+    :param requests: Общее количество запросов
+    :param concurrency: Количество одновременных запросов
+    :param seed: Зерно генератора параметров запросов
+    :return: Сводка метрик сценария
+    """
+    rng = random.Random(seed)
+    paths = [make_path(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while paths:
+            path = paths.pop()
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as response:
+                    await response.read()
+                    ok = response.status == 200
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def run_http_load(
+    base_url: str,
+    scenarios: Dict[str, PathFactory],
+    requests: int,
+    concurrency: int,
+    warmup: int = 0,
+    only: Optional[List[str]] = None
+) -> Dict[str, Dict]:
+    """
+    Последовательно прогоняет сценарии нагрузки
+
+    :param base_url: Базовый URL API (например, http://localhost:8000)
+    :param scenarios: Сценарии по именам
+    :param requests: Количество запросов на сценарий
+    :param concurrency: Количество одновременных запросов
+    :param warmup: Количество прогревочных запросов на сценарий (не учитываются)
+    :param only: Имена сценариев для запуска (по умолчанию все)
+    :return: Сводки метрик по именам сценариев
+    """
+    results = {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for name, make_path in scenarios.items():
+            if only and name not in only:
+                continue
+            if warmup:
+                await run_scenario(session, base_url, make_path, warmup, concurrency, seed=-1)
+            results[f"http.{name}"] = await run_scenario(session, base_url, make_path, requests, concurrency)
+    return results
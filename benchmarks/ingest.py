@@ -0,0 +1,171 @@
+"""
+Бенчмарки записи тиков: опрос Deribit через Celery путь и буфер пакетной записи
+"""
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from deribit_task.benchmarks.seed import generate_ticks
+from deribit_task.benchmarks.stats import summarize
+from deribit_task.deribit_client import get_rate_limiter
+from deribit_task.models import PriceTick
+from deribit_task.tasks import fetch_and_save_prices, save_price_ticks
+from deribit_task.write_buffer import PriceTickBuffer
+
+
+class FakeDeribitServer:
+    """
+    Локальный HTTP сервер, отвечающий на public/get_index_price как Deribit
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        :param latency: Искусственная задержка ответа в секундах
+        """
+        self.latency = latency
+        self.requests = 0
+        self._rng = random.Random(0)
+        self._server = None
+
+    async def handler(self, request: web.Request) -> web.Response:
+        """
+        Отвечает случайной ценой для запрошенного индекса
+        """
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response({
+            'jsonrpc': '2.0',
+            'result': {
+                'index_price': round(50000 + self._rng.uniform(-500, 500), 2),
+                'estimated_delivery_price': 50000.0,
+            },
+        })
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/api/v2/public/get_index_price', self.handler)
+        self._server = TestServer(app)
+        await self._server.start_server()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._server.close()
+
+    @property
+    def base_url(self) -> str:
+        """
+        Базовый URL API для DeribitClient
+        """
+        return str(self._server.make_url('/api/v2'))
+
+
+def start_timestamp(engine: Engine) -> int:
+    """
+    Возвращает время первого тика бенчмарка: после всех сохраненных тиков,
+    чтобы тики бенчмарка не совпали с ними по (ticker, timestamp) и не были пропущены как дубликаты
+    """
+    with engine.connect() as connection:
+        last = connection.scalar(select(func.max(PriceTick.timestamp)))
+    return max(int(time.time()), (last or 0) + 1)
+
+
+async def bench_fetch_and_save(engine: Engine, iterations: int, latency: float = 0.0) -> Dict:
+    """
+    Измеряет полный цикл задачи fetch_prices: параллельный опрос
+    фейкового Deribit и сохранение тиков одной транзакцией
+
+    :param engine: Engine SQLAlchemy
+    :param iterations: Количество циклов опроса
+    :param latency: Искусственная задержка ответа Deribit в секундах
+    :return: Сводка метрик по циклам
+    """
+    Session = sessionmaker(bind=engine, autoflush=False)
+    latencies: List[float] = []
+    timestamp = start_timestamp(engine)
+    async with FakeDeribitServer(latency) as server:
+        # Фейковый сервер не ограничивает частоту запросов, лимит Deribit здесь только исказит замер
+        get_rate_limiter(server.base_url).rate = 0
+        started = time.perf_counter()
+        for iteration in range(iterations):
+            with Session() as db:
+                cycle_started = time.perf_counter()
+                await fetch_and_save_prices(db, timestamp + iteration, server.base_url)
+                latencies.append(time.perf_counter() - cycle_started)
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed)
+
+
+def bench_save_price_ticks(engine: Engine, ticks: int, batch_size: int, tickers: List[str]) -> Dict:
+    """
+    Измеряет запись тиков пачками через save_price_ticks
+
+    Задержка считается на пачку, пропускная способность - в тиках в секунду.
+
+    :param engine: Engine SQLAlchemy
+    :param ticks: Общее количество тиков
+    :param batch_size: Размер пачки
+    :param tickers: Список тикеров
+    :return: Сводка метрик
+    """
+    Session = sessionmaker(bind=engine, autoflush=False)
+    rows = list(generate_ticks(ticks, tickers, start_timestamp(engine), seed=1))
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    with Session() as db:
+        for offset in range(0, len(rows), batch_size):
+            batch = rows[offset:offset + batch_size]
+            batch_started = time.perf_counter()
+            if save_price_ticks(db, batch) == len(batch):
+                latencies.append(time.perf_counter() - batch_started)
+            else:
+                errors += 1
+    elapsed = time.perf_counter() - started
+    summary = summarize(latencies, elapsed, errors)
+    summary['ticks_per_s'] = round(len(rows) / elapsed, 2) if elapsed > 0 else 0.0
+    return summary
+
+
+async def bench_write_buffer(engine: Engine, ticks: int, tickers: List[str], **buffer_options) -> Dict:
+    """
+    Измеряет запись тиков через PriceTickBuffer, как в потоковом ингестере
+
+    Задержка считается на сброс пачки, пропускная способность - в тиках
+    в секундах от первого put() до завершения close().
+
+    :param engine: Engine SQLAlchemy
+    :param ticks: Общее количество тиков
+    :param tickers: Список тикеров
+    :param buffer_options: Параметры PriceTickBuffer (max_batch_size, flush_interval, ...)
+    :return: Сводка метрик и счетчики буфера
+    """
+    rows = list(generate_ticks(ticks, tickers, start_timestamp(engine), seed=2))
+    buffer = PriceTickBuffer(engine, **buffer_options)
+    started = time.perf_counter()
+    async with buffer:
+        for tick in rows:
+            await buffer.put(tick['ticker'], tick['price'], tick['timestamp'])
+    elapsed = time.perf_counter() - started
+
+    stats = buffer.stats
+    return {
+        'count': stats.ticks_written,
+        'duplicates': stats.ticks_duplicated,
+        'errors': stats.ticks_dropped,
+        'elapsed_s': round(elapsed, 3),
+        'ticks_per_s': round(stats.ticks_written / elapsed, 2) if elapsed > 0 else 0.0,
+        'flushes': stats.flushes,
+        'flush_latency_ms': {
+            'mean': round(stats.total_flush_latency / stats.flushes * 1000, 3) if stats.flushes else 0.0,
+            'max': round(stats.max_flush_latency * 1000, 3),
+        },
+        'max_batch_size': stats.max_batch_size,
+    }
@@ -0,0 +1,115 @@
+"""
+Наполнение price_ticks синтетическими тиками для бенчмарков
+"""
+import csv
+import io
+import logging
+import random
+import time
+from typing import Dict, Iterator, List
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from deribit_task.models import PriceTick
+from deribit_task.rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Синтетические тики не пересекаются по (ticker, timestamp), поэтому копируются прямо в price_ticks
+COPY_SQL = f"COPY {PriceTick.__tablename__} (ticker, price, timestamp) FROM STDIN WITH (FORMAT csv)"
+
+
+def generate_ticks(
+    rows: int,
+    tickers: List[str],
+    start_timestamp: int,
+    step: int = 1,
+    seed: int = 0
+) -> Iterator[Dict]:
+    """
+    Генерирует тики со случайным блужданием цены, равномерно по тикерам
+
+    :param rows: Общее количество тиков
+    :param tickers: Список тикеров
+    :param start_timestamp: Время первого тика в UNIX timestamp
+    :param step: Шаг времени между тиками одного тикера в секундах
+    :param seed: Зерно генератора случайных чисел
+    :return: Итератор словарей с ключами ticker, price, timestamp
+    """
+    rng = random.Random(seed)
+    prices = {ticker: 1000.0 * (index + 1) for index, ticker in enumerate(tickers)}
+    for row in range(rows):
+        ticker = tickers[row % len(tickers)]
+        prices[ticker] = max(prices[ticker] * (1 + rng.gauss(0, 0.0005)), 0.01)
+        yield {
+            'ticker': ticker,
+            'price': round(prices[ticker], 8),
+            'timestamp': start_timestamp + (row // len(tickers)) * step,
+        }
+
+
+def seed_ticks(
+    engine: Engine,
+    rows: int,
+    tickers: List[str],
+    start_timestamp: int,
+    step: int = 1,
+    chunk_size: int = 100000,
+    with_rollups: bool = True
+) -> Dict:
+    """
+    Записывает синтетические тики пачками: COPY для PostgreSQL,
+    multi-row INSERT для остальных БД
+
+    :param engine: Engine SQLAlchemy
+    :param rows: Общее количество тиков
+    :param tickers: Список тикеров
+    :param start_timestamp: Время первого тика в UNIX timestamp
+    :param step: Шаг времени между тиками одного тикера в секундах
+    :param chunk_size: Размер пачки
+    :param with_rollups: Пересобрать таблицы свечей после наполнения
+    :return: Количество записанных строк и время наполнения
+    """
+    started = time.perf_counter()
+    chunk: List[Dict] = []
+    written = 0
+    for tick in generate_ticks(rows, tickers, start_timestamp, step):
+        chunk.append(tick)
+        if len(chunk) == chunk_size:
+            _write_chunk(engine, chunk)
+            written += len(chunk)
+            chunk = []
+            logger.info(f"Записано тиков: {written}/{rows}")
+    if chunk:
+        _write_chunk(engine, chunk)
+        written += len(chunk)
+
+    seeded = time.perf_counter()
+    if with_rollups:
+        with engine.begin() as connection:
+            rebuild_rollups(connection)
+
+    return {
+        'rows': written,
+        'tickers': len(tickers),
+        'seed_s': round(seeded - started, 3),
+        'rollups_s': round(time.perf_counter() - seeded, 3),
+    }
+
+
+def _write_chunk(engine: Engine, chunk: List[Dict]):
+    """
+    Записывает одну пачку тиков в отдельной транзакции
+    """
+    with engine.begin() as connection:
+        if engine.dialect.name == 'postgresql':
+            data = io.StringIO()
+            writer = csv.writer(data)
+            for tick in chunk:
+                writer.writerow((tick['ticker'], tick['price'], tick['timestamp']))
+            data.seek(0)
+            with connection.connection.dbapi_connection.cursor() as cursor:
+                cursor.copy_expert(COPY_SQL, data)
+        else:
+            connection.execute(insert(PriceTick), chunk)
@@ -0,0 +1,67 @@
+"""
+Сбор и сводка метрик бенчмарков
+"""
+import math
+import resource
+from typing import Dict, List, Optional
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Вычисляет перцентиль методом ближайшего ранга
+
+    :param values: Отсортированный список значений
+    :param percent: Перцентиль от 0 до 100
+    :return: Значение перцентиля (0.0 для пустого списка)
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict:
+    """
+    Сводит замеры операций в метрики задержки и пропускной способности
+
+    :param latencies: Задержки успешных операций в секундах
+    :param elapsed: Общее время прогона в секундах
+    :param errors: Количество неуспешных операций
+    :return: Словарь с count, errors, throughput (оп/с) и задержками в миллисекундах
+    """
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            'p50': round(percentile(values, 50) * 1000, 3),
+            'p95': round(percentile(values, 95) * 1000, 3),
+            'p99': round(percentile(values, 99) * 1000, 3),
+            'max': round(values[-1] * 1000, 3) if values else 0.0,
+        },
+    }
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """
+    Возвращает пиковый RSS процесса в мегабайтах
+
+    :param pid: PID процесса (по умолчанию текущий процесс); для чужого
+        процесса значение читается из /proc и доступно только в Linux
+    :return: Пиковый RSS или None, если его не удалось получить
+    """
+    if pid is None:
+        # В Linux ru_maxrss возвращается в килобайтах
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 2)
+    except OSError:
+        return None
+    return None
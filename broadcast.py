@@ -0,0 +1,196 @@
+"""
+Раздача новых тиков клиентам live потока цен (WebSocket и SSE)
+
+Broadcaster - единственный подписчик канала новых цен в процессе API:
+каждый тик сериализуется один раз и раскладывается в очереди клиентов,
+подписанных на его тикер. Очередь клиента ограничена LIVE_STREAM_QUEUE_SIZE
+тиками; клиент, не успевающий их забирать, отключается, чтобы не
+задерживать остальных и не накапливать память процесса.
+"""
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set
+
+from deribit_task import price_feed
+from deribit_task.cache import encode_tick
+from deribit_task.config import LIVE_STREAM_MAX_CLIENTS, LIVE_STREAM_QUEUE_SIZE
+from deribit_task.metrics import LIVE_STREAM_CLIENTS, LIVE_STREAM_DROPPED_CLIENTS
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Подписка клиента на тики набора тикеров
+    """
+
+    def __init__(self, tickers: Iterable[str], queue_size: int):
+        """
+        Инициализация подписки
+
+        :param tickers: Тикеры подписки
+        :param queue_size: Максимальное количество непрочитанных тиков
+        """
+        self.tickers = frozenset(tickers)
+        self.dropped = False
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def get(self) -> Optional[bytes]:
+        """
+        Ожидает следующий тик
+
+        :return: JSON тика (PriceTickResponse) или None, если подписка закрыта
+        """
+        if self.closed and self._queue.empty():
+            return None
+        return await self._queue.get()
+
+    def put(self, message: bytes) -> bool:
+        """
+        Добавляет тик в очередь без ожидания
+
+        :return: False, если очередь переполнена и подписка отключена
+        """
+        if self.closed:
+            return True
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            self.close()
+            return False
+
+    def close(self):
+        """
+        Закрывает подписку: непрочитанные тики отбрасываются, ожидающий get() получает None
+        """
+        if self.closed:
+            return
+        self.closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+
+class PriceBroadcaster:
+    """
+    Раздача тиков канала новых цен подписчикам процесса
+
+    Все операции с подписками выполняются в event loop приложения;
+    тики из потока слушателя Redis передаются в него через
+    call_soon_threadsafe.
+    """
+
+    def __init__(self, queue_size: int = LIVE_STREAM_QUEUE_SIZE, max_clients: int = LIVE_STREAM_MAX_CLIENTS):
+        """
+        Инициализация broadcaster
+
+        :param queue_size: Размер очереди клиента в тиках
+        :param max_clients: Максимальное количество подписок
+        """
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._clients = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def clients(self) -> int:
+        """
+        Количество активных подписок
+        """
+        return self._clients
+
+    @property
+    def full(self) -> bool:
+        """
+        Достигнут ли лимит подписок
+        """
+        return self._clients >= self.max_clients
+
+    def start(self):
+        """
+        Подписывает broadcaster на канал новых цен (вызывается в event loop приложения)
+        """
+        self._loop = asyncio.get_running_loop()
+        price_feed.add_handler(self.publish)
+
+    def stop(self):
+        """
+        Отписывает broadcaster от канала и закрывает все подписки
+        """
+        price_feed.remove_handler(self.publish)
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+        self._loop = None
+
+    def subscribe(self, tickers: Iterable[str]) -> Optional[Subscription]:
+        """
+        Создает подписку клиента
+
+        :param tickers: Тикеры подписки
+        :return: Подписка или None, если достигнут лимит клиентов
+        """
+        if self.full:
+            logger.warning(f"Достигнут лимит клиентов live потока цен: {self.max_clients}")
+            return None
+        subscription = Subscription(tickers, self.queue_size)
+        for ticker in subscription.tickers:
+            self._subscribers.setdefault(ticker, set()).add(subscription)
+        self._clients += 1
+        LIVE_STREAM_CLIENTS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Удаляет подписку клиента
+        """
+        removed = False
+        for ticker in subscription.tickers:
+            subscriptions = self._subscribers.get(ticker)
+            if subscriptions is None or subscription not in subscriptions:
+                continue
+            subscriptions.discard(subscription)
+            removed = True
+            if not subscriptions:
+                del self._subscribers[ticker]
+        if removed:
+            self._clients -= 1
+            LIVE_STREAM_CLIENTS.dec()
+        subscription.close()
+
+    def publish(self, tick: Dict):
+        """
+        Обработчик канала новых цен: передает тик подписчикам (из любого потока)
+
+        :param tick: Словарь с ключами id, ticker, price, timestamp
+        """
+        loop = self._loop
+        # Тики без id не соответствуют контракту PriceTickResponse
+        if loop is None or tick.get('id') is None or tick['ticker'] not in self._subscribers:
+            return
+        message = encode_tick(tick)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(tick['ticker'], message)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, tick['ticker'], message)
+
+    def _fan_out(self, ticker: str, message: bytes):
+        """
+        Раскладывает тик в очереди подписчиков тикера, отключая переполненные
+        """
+        for subscription in list(self._subscribers.get(ticker, ())):
+            if not subscription.put(message):
+                LIVE_STREAM_DROPPED_CLIENTS.inc()
+                logger.warning(f"Клиент live потока цен отключен: очередь из {self.queue_size} тиков переполнена")
+                self.unsubscribe(subscription)
+
+
+price_broadcaster = PriceBroadcaster()
@@ -0,0 +1,106 @@
+"""
+Кэш последних цен в памяти процесса API
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional
+
+from deribit_task.api.schemas import PriceTickResponse
+from deribit_task.config import LATEST_PRICE_CACHE_MAX_AGE
+
+# Шаг цены, совпадающий с масштабом колонки price_ticks.price
+PRICE_QUANTUM = Decimal('0.00000001')
+
+
+def encode_tick(tick: Dict) -> bytes:
+    """
+    Сериализует тик в JSON тело PriceTickResponse
+
+    :param tick: Словарь с ключами id, ticker, price, timestamp
+    :return: JSON в байтах
+    """
+    response = PriceTickResponse(
+        id=tick['id'],
+        ticker=tick['ticker'],
+        price=Decimal(str(tick['price'])).quantize(PRICE_QUANTUM),
+        timestamp=tick['timestamp']
+    )
+    return response.model_dump_json().encode()
+
+
+class CachedPrice(NamedTuple):
+    """
+    Запись кэша: время тика, готовое JSON тело ответа и момент кэширования
+    """
+    timestamp: int
+    body: bytes
+    cached_at: float
+
+
+class LatestPriceCache:
+    """
+    Кэш последней цены по тикеру с ограничением устаревания
+
+    Записи обновляются по push-уведомлениям ингестера и при чтении из БД.
+    Запись старше max_age секунд считается устаревшей и не отдается,
+    поэтому пропущенное уведомление задерживает обновление не дольше max_age.
+    """
+
+    def __init__(self, max_age: float = LATEST_PRICE_CACHE_MAX_AGE):
+        """
+        Инициализация кэша
+
+        :param max_age: Максимальный возраст записи в секундах
+        """
+        self.max_age = max_age
+        self._entries: Dict[str, CachedPrice] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str) -> Optional[CachedPrice]:
+        """
+        Получает свежую запись кэша
+
+        :param ticker: Тикер валюты
+        :return: Запись кэша или None, если ее нет или она устарела
+        """
+        entry = self._entries.get(ticker)
+        if entry is None or time.monotonic() - entry.cached_at > self.max_age:
+            return None
+        return entry
+
+    def update(self, tick: Dict):
+        """
+        Обновляет кэш новым тиком
+
+        Более старые тики игнорируются. Тик без id (например, записанный
+        через COPY) только сбрасывает запись, чтобы следующее чтение
+        загрузило последний тик из БД.
+
+        :param tick: Словарь с ключами ticker, price, timestamp и (опционально) id
+        """
+        ticker = tick['ticker']
+        with self._lock:
+            current = self._entries.get(ticker)
+            if current is not None and tick['timestamp'] < current.timestamp:
+                return
+
+            if tick.get('id') is None:
+                self._entries.pop(ticker, None)
+                return
+
+            self._entries[ticker] = CachedPrice(
+                timestamp=tick['timestamp'],
+                body=encode_tick(tick),
+                cached_at=time.monotonic()
+            )
+
+    def clear(self):
+        """
+        Очищает кэш
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+latest_price_cache = LatestPriceCache()
@@ -2,10 +2,24 @@
 Конфигурация Celery для периодических задач
 """
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
 from datetime import timedelta
 import logging
+import os
 
-from deribit_task.config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
+from prometheus_client import multiprocess
+
+from deribit_task import price_feed
+from deribit_task.config import (
+    CELERY_BROKER_URL,
+    CELERY_RESULT_BACKEND,
+    METRICS_ENABLED,
+    CELERY_METRICS_PORT,
+    FETCH_PRICES_INTERVAL,
+    GAP_SCAN_INTERVAL,
+)
+from deribit_task.metrics import observe_tick, start_metrics_server
+from deribit_task.worker_runtime import worker_runtime
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +28,7 @@ celery_app = Celery(
     'deribit_task',
     broker=CELERY_BROKER_URL,
     backend=CELERY_RESULT_BACKEND,
-    include=['deribit_task.tasks']
+    include=['deribit_task.tasks', 'deribit_task.gaps']
 )
 
 # Конфигурация Celery
@@ -27,7 +41,61 @@ celery_app.conf.update(
     beat_schedule={
         'fetch-prices-every-minute': {
             'task': 'deribit_task.tasks.fetch_prices',
-            'schedule': timedelta(minutes=1),
+            'schedule': timedelta(seconds=FETCH_PRICES_INTERVAL),
+            # Не выполнять запуски, простоявшие в очереди дольше интервала, чтобы они не копились
+            'options': {'expires': FETCH_PRICES_INTERVAL},
+        },
+        'backfill-price-gaps': {
+            'task': 'deribit_task.gaps.backfill_price_gaps',
+            'schedule': timedelta(seconds=GAP_SCAN_INTERVAL),
+            'options': {'expires': GAP_SCAN_INTERVAL},
+        },
+        'maintain-price-partitions-daily': {
+            'task': 'deribit_task.tasks.maintain_price_partitions',
+            'schedule': timedelta(days=1),
         },
     },
 )
+
+
+@worker_init.connect
+def setup_worker_metrics(**kwargs):
+    """
+    Запускает сервер метрик worker и подписывает метрики на сохраняемые тики
+
+    Обработчик регистрируется до запуска дочерних процессов prefork пула
+    и наследуется ими.
+    """
+    if not METRICS_ENABLED:
+        return
+    price_feed.add_handler(observe_tick)
+    try:
+        start_metrics_server(CELERY_METRICS_PORT)
+    except OSError as e:
+        logger.error(f"Не удалось запустить сервер метрик на порту {CELERY_METRICS_PORT}: {e}")
+
+
+@worker_process_shutdown.connect
+def cleanup_worker_metrics(pid=None, **kwargs):
+    """
+    Удаляет live-метрики завершившегося дочернего процесса в multiprocess режиме
+    """
+    if METRICS_ENABLED and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs):
+    """
+    Создает event loop и пул HTTP соединений дочернего процесса prefork пула
+    """
+    worker_runtime.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_worker_runtime(**kwargs):
+    """
+    Закрывает пул HTTP соединений и event loop процесса
+    """
+    worker_runtime.close()
@@ -0,0 +1,345 @@
+"""
+Компактная схема хранения тиков price_ticks_compact
+
+Цена хранится целым числом долей 1e-8 (BIGINT), тикер - smallint ссылкой
+на tickers, первичный ключ - (ticker_id, timestamp). Переход выполняется
+в несколько шагов:
+
+1. PRICE_STORAGE_WRITE=dual - новые тики пишутся в обе таблицы;
+2. python -m deribit_task.compact backfill - перенос истории из price_ticks;
+3. python -m deribit_task.compact verify - сверка таблиц;
+4. PRICE_STORAGE_READ=compact - чтение из компактной таблицы (price_ticks
+   продолжает пополняться и позволяет вернуться назад);
+5. PRICE_STORAGE_WRITE=compact - запись только в компактную таблицу.
+"""
+import argparse
+import logging
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from sqlalchemy import BigInteger, and_, cast, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from deribit_task.config import PRICE_STORAGE_READ, PRICE_STORAGE_WRITE
+from deribit_task.models import COMPACT_ID_FACTOR, PRICE_SCALE, PriceTick, PriceTickCompact, Ticker
+from deribit_task.rollups import UPSERT_DIALECTS
+from deribit_task.tickers import KIND_INDEX, TickerInfo, sync_tickers, ticker_registry
+
+logger = logging.getLogger(__name__)
+
+
+def writes_legacy() -> bool:
+    """
+    Пишутся ли тики в price_ticks
+    """
+    return PRICE_STORAGE_WRITE != 'compact'
+
+
+def writes_compact() -> bool:
+    """
+    Пишутся ли тики в price_ticks_compact
+    """
+    return PRICE_STORAGE_WRITE in ('dual', 'compact')
+
+
+def scale_price(price: Union[float, Decimal, str]) -> int:
+    """
+    Переводит цену в целое число долей 1e-8 с банковским округлением
+    """
+    return int((Decimal(str(price)) * PRICE_SCALE).to_integral_value(ROUND_HALF_EVEN))
+
+
+def unscale_price(value: int) -> Decimal:
+    """
+    Переводит целое число долей 1e-8 в цену с 8 знаками после запятой
+    """
+    return Decimal(value).scaleb(-8)
+
+
+def compact_tick_id(ticker_id: int, timestamp: int) -> int:
+    """
+    Возвращает синтетический id тика компактной схемы
+    """
+    return timestamp * COMPACT_ID_FACTOR + ticker_id
+
+
+def ticker_ids(db: Union[Connection, Session], names: Iterable[str], register: bool = False) -> Dict[str, int]:
+    """
+    Получает id тикеров из таблицы tickers
+
+    :param db: Соединение или сессия БД
+    :param names: Имена тикеров
+    :param register: Зарегистрировать отсутствующие тикеры (вид цены берется из реестра)
+    :return: Словарь имя -> id для зарегистрированных тикеров
+    """
+    names = set(names)
+    rows = db.execute(select(Ticker.name, Ticker.id).where(Ticker.name.in_(names)))
+    ids = {name: ticker_id for name, ticker_id in rows}
+    missing = names - set(ids)
+    if register and missing:
+        sync_tickers(db, [
+            ticker_registry.get(name) or TickerInfo(name, KIND_INDEX) for name in sorted(missing)
+        ])
+        return ticker_ids(db, names)
+    return ids
+
+
+def save_legacy_ticks(db: Union[Connection, Session], ticks: List[Dict]) -> List[Dict]:
+    """
+    Записывает пачку тиков в price_ticks через INSERT ... ON CONFLICT DO NOTHING
+
+    Тик с уже сохраненными (ticker, timestamp) пропускается, поэтому
+    повторная запись той же пачки (повтор задачи, пересекающиеся запуски)
+    не создает дубликатов. Выполняется в текущей транзакции db, фиксацию
+    выполняет вызывающий код.
+
+    :param db: Соединение или сессия БД
+    :param ticks: Список словарей с ключами ticker, price, timestamp
+    :return: Вставленные тики с ключами id, ticker, price, timestamp
+    """
+    if not ticks:
+        return []
+
+    dialect = db.get_bind().dialect.name if isinstance(db, Session) else db.dialect.name
+    upsert = UPSERT_DIALECTS.get(dialect)
+    if upsert is None:
+        raise NotImplementedError(f"Upsert тиков не поддерживается для {dialect}")
+
+    table = PriceTick.__table__
+    stmt = upsert(table).on_conflict_do_nothing(
+        index_elements=[table.c.ticker, table.c.timestamp]
+    ).returning(table.c.id, table.c.ticker, table.c.price, table.c.timestamp)
+    return [
+        dict(row._mapping)
+        for row in db.execute(stmt, [
+            {'ticker': tick['ticker'], 'price': tick['price'], 'timestamp': tick['timestamp']} for tick in ticks
+        ])
+    ]
+
+
+def save_compact_ticks(db: Union[Connection, Session], ticks: List[Dict]) -> List[Dict]:
+    """
+    Записывает пачку тиков в price_ticks_compact через INSERT ... ON CONFLICT DO NOTHING
+
+    Как и в price_ticks, сохраняется первый записанный тик (ticker, timestamp):
+    повторная запись пропускается и не меняет цену, поэтому в режиме dual
+    таблицы не расходятся. Тикеры, отсутствующие в таблице tickers
+    (например, добавленные в конфигурацию без tickers sync),
+    регистрируются при записи. Выполняется в текущей транзакции db,
+    фиксацию выполняет вызывающий код.
+
+    :param db: Соединение или сессия БД
+    :param ticks: Список словарей с ключами ticker, price, timestamp
+    :return: Вставленные тики с ключами id, ticker, price, timestamp
+    """
+    if not ticks:
+        return []
+
+    dialect = db.get_bind().dialect.name if isinstance(db, Session) else db.dialect.name
+    upsert = UPSERT_DIALECTS.get(dialect)
+    if upsert is None:
+        raise NotImplementedError(f"Upsert тиков не поддерживается для {dialect}")
+
+    ids = ticker_ids(db, (tick['ticker'] for tick in ticks), register=True)
+    names = {ticker_id: name for name, ticker_id in ids.items()}
+    rows: Dict[tuple, Dict] = {}
+    for tick in ticks:
+        ticker_id = ids[tick['ticker']]
+        # Первый тик пачки с тем же ключом побеждает, как при INSERT ... ON CONFLICT DO NOTHING
+        rows.setdefault((ticker_id, tick['timestamp']), {
+            'ticker_id': ticker_id,
+            'timestamp': tick['timestamp'],
+            'price': scale_price(tick['price']),
+        })
+    if not rows:
+        return []
+
+    table = PriceTickCompact.__table__
+    stmt = upsert(table).on_conflict_do_nothing(
+        index_elements=[table.c.ticker_id, table.c.timestamp]
+    ).returning(table.c.ticker_id, table.c.timestamp, table.c.price)
+    return [
+        {
+            'id': compact_tick_id(ticker_id, timestamp),
+            'ticker': names[ticker_id],
+            'price': unscale_price(price),
+            'timestamp': timestamp,
+        }
+        for ticker_id, timestamp, price in db.execute(stmt, list(rows.values()))
+    ]
+
+
+def store_ticks(
+    db: Union[Connection, Session],
+    ticks: List[Dict],
+    save_legacy: Callable[[Union[Connection, Session], List[Dict]], List[Dict]] = save_legacy_ticks
+) -> List[Dict]:
+    """
+    Записывает пачку тиков в таблицы согласно PRICE_STORAGE_WRITE
+
+    Результат - тики, действительно вставленные в основную таблицу:
+    ту, из которой читает API (PRICE_STORAGE_READ), или единственную
+    записываемую. Повторно записанные тики в него не попадают, поэтому
+    не учитываются в свечах и не публикуются повторно.
+
+    :param db: Соединение или сессия БД
+    :param ticks: Список словарей с ключами ticker, price, timestamp
+    :param save_legacy: Функция записи в price_ticks (например, через COPY)
+    :return: Вставленные тики основной таблицы с ключами id, ticker, price, timestamp
+    """
+    legacy = save_legacy(db, ticks) if writes_legacy() else None
+    compact = save_compact_ticks(db, ticks) if writes_compact() else None
+    if compact is not None and (legacy is None or PRICE_STORAGE_READ == 'compact'):
+        return compact
+    return legacy
+
+
+def _legacy_conditions(ticker: Optional[str], date_from: Optional[int], date_to: Optional[int]) -> List:
+    """
+    Условия выборки тиков price_ticks по тикеру и периоду
+    """
+    conditions = [Ticker.name == PriceTick.ticker]
+    if ticker:
+        conditions.append(PriceTick.ticker == ticker)
+    if date_from:
+        conditions.append(PriceTick.timestamp >= date_from)
+    if date_to:
+        conditions.append(PriceTick.timestamp <= date_to)
+    return conditions
+
+
+def backfill_compact(
+    db: Union[Connection, Session],
+    ticker: Optional[str] = None,
+    date_from: Optional[int] = None,
+    date_to: Optional[int] = None
+) -> int:
+    """
+    Переносит тики из price_ticks в price_ticks_compact за указанный период
+
+    Перенос выполняется одним INSERT ... SELECT на стороне БД. Как и в
+    save_compact_ticks, сохраняется первая запись: уже перенесенные тики
+    и тики, записанные в режиме dual, не изменяются (ON CONFLICT DO
+    NOTHING). В price_ticks тик тикера в одну секунду уникален
+    (миграция 006), поэтому конфликтов внутри переносимой выборки нет.
+    Для больших таблиц перенос удобно выполнять по месяцам. Выполняется в текущей транзакции db, фиксацию выполняет
+    вызывающий код.
+
+    :param db: Соединение или сессия БД
+    :param ticker: Тикер валюты (опционально, по умолчанию все тикеры)
+    :param date_from: Начальная дата в UNIX timestamp (опционально)
+    :param date_to: Конечная дата в UNIX timestamp (опционально)
+    :return: Количество перенесенных тиков
+    """
+    dialect = db.get_bind().dialect.name if isinstance(db, Session) else db.dialect.name
+    upsert = UPSERT_DIALECTS.get(dialect)
+    if upsert is None:
+        raise NotImplementedError(f"Перенос тиков не поддерживается для {dialect}")
+
+    # Условие соединения с tickers стоит в WHERE: в SQLite ON CONFLICT после JOIN ... ON неоднозначен
+    ticks = select(
+        Ticker.id,
+        PriceTick.timestamp,
+        cast(func.round(PriceTick.price * PRICE_SCALE), BigInteger),
+    ).where(*_legacy_conditions(ticker, date_from, date_to))
+
+    table = PriceTickCompact.__table__
+    stmt = upsert(table).from_select(['ticker_id', 'timestamp', 'price'], ticks).on_conflict_do_nothing(
+        index_elements=[table.c.ticker_id, table.c.timestamp]
+    )
+    result = db.execute(stmt)
+    logger.info(f"Перенесено тиков в {table.name}: {result.rowcount}")
+    return result.rowcount
+
+
+def verify_compact(
+    db: Union[Connection, Session],
+    ticker: Optional[str] = None,
+    date_from: Optional[int] = None,
+    date_to: Optional[int] = None
+) -> List[Dict]:
+    """
+    Сверяет price_ticks и price_ticks_compact по тикерам за указанный период
+
+    Для каждого тикера сравниваются количество секунд с тиками, границы
+    периода и сумма цен в долях 1e-8 (контрольная сумма, расходящаяся
+    при разных ценах одного тика). Тикеры, отсутствующие в таблице
+    tickers, не сверяются.
+
+    :param db: Соединение или сессия БД
+    :param ticker: Тикер валюты (опционально, по умолчанию все тикеры)
+    :param date_from: Начальная дата в UNIX timestamp (опционально)
+    :param date_to: Конечная дата в UNIX timestamp (опционально)
+    :return: Расхождения: словари с ключами ticker, legacy, compact
+    """
+    legacy = db.execute(
+        select(
+            PriceTick.ticker,
+            func.count(PriceTick.timestamp.distinct()),
+            func.min(PriceTick.timestamp),
+            func.max(PriceTick.timestamp),
+            func.sum(cast(func.round(PriceTick.price * PRICE_SCALE), BigInteger)),
+        ).where(*_legacy_conditions(ticker, date_from, date_to)).group_by(PriceTick.ticker)
+    )
+
+    conditions = [Ticker.id == PriceTickCompact.ticker_id]
+    if ticker:
+        conditions.append(Ticker.name == ticker)
+    if date_from:
+        conditions.append(PriceTickCompact.timestamp >= date_from)
+    if date_to:
+        conditions.append(PriceTickCompact.timestamp <= date_to)
+    compact = db.execute(
+        select(
+            Ticker.name,
+            func.count(),
+            func.min(PriceTickCompact.timestamp),
+            func.max(PriceTickCompact.timestamp),
+            func.sum(PriceTickCompact.price),
+        ).where(and_(*conditions)).group_by(Ticker.name)
+    )
+
+    # Сумма приводится к int: в PostgreSQL sum(bigint) возвращает numeric
+    legacy_stats = {row[0]: (*row[1:4], int(row[4])) for row in legacy}
+    compact_stats = {row[0]: (*row[1:4], int(row[4])) for row in compact}
+    mismatches = []
+    for name in sorted(set(legacy_stats) | set(compact_stats)):
+        if legacy_stats.get(name) != compact_stats.get(name):
+            mismatches.append({'ticker': name, 'legacy': legacy_stats.get(name), 'compact': compact_stats.get(name)})
+            logger.warning(f"Расхождение по {name}: price_ticks={legacy_stats.get(name)}, "
+                           f"price_ticks_compact={compact_stats.get(name)}")
+    return mismatches
+
+
+def main():
+    """
+    Точка входа командной строки
+    """
+    from deribit_task.database import engine
+
+    parser = argparse.ArgumentParser(description="Перенос тиков в компактную схему хранения")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (
+        ('backfill', "Перенести тики из price_ticks в price_ticks_compact"),
+        ('verify', "Сверить price_ticks и price_ticks_compact"),
+    ):
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument('--ticker', help="Тикер валюты (по умолчанию все)")
+        command_parser.add_argument('--date-from', type=int, help="Начальная дата в UNIX timestamp")
+        command_parser.add_argument('--date-to', type=int, help="Конечная дата в UNIX timestamp")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with engine.begin() as connection:
+        if args.command == 'backfill':
+            backfill_compact(connection, args.ticker, args.date_from, args.date_to)
+        else:
+            mismatches = verify_compact(connection, args.ticker, args.date_from, args.date_to)
+            if mismatches:
+                raise SystemExit(1)
+            logger.info("Расхождений не найдено")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,13 +14,142 @@ DB_HOST = getenv('DB_HOST', 'localhost')
 DB_PORT = getenv('DB_PORT', '5432')
 
 DATABASE_URL = f'postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+ASYNC_DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+
+# Пулы соединений по ролям: запись (Celery и скрипты, синхронный engine) и чтение API
+# (асинхронные engine основной БД и каждой реплики)
+DB_WRITE_POOL_SIZE = int(getenv('DB_WRITE_POOL_SIZE', '10'))
+DB_WRITE_MAX_OVERFLOW = int(getenv('DB_WRITE_MAX_OVERFLOW', '20'))
+DB_READ_POOL_SIZE = int(getenv('DB_READ_POOL_SIZE', '10'))
+DB_READ_MAX_OVERFLOW = int(getenv('DB_READ_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = int(getenv('DB_POOL_TIMEOUT', '30'))
+
+# Реплики для чтения API: host[:port] через запятую (пользователь, пароль и БД как у основной).
+# Без реплик чтения идут в основную БД
+DB_READ_REPLICAS = [host.strip() for host in getenv('DB_READ_REPLICAS', '').split(',') if host.strip()]
+# Таймаут подключения к реплике и время исключения недоступной реплики из ротации (в секундах)
+DB_REPLICA_CONNECT_TIMEOUT = float(getenv('DB_REPLICA_CONNECT_TIMEOUT', '5'))
+DB_REPLICA_RETRY_INTERVAL = float(getenv('DB_REPLICA_RETRY_INTERVAL', '30'))
+# Максимальное отставание реплики для /latest (в секундах, 0 - без проверки) и период его замера
+DB_REPLICA_MAX_LAG = float(getenv('DB_REPLICA_MAX_LAG', '0'))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
 
 # Настройки Celery
 CELERY_BROKER_URL = getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 
+# Настройки канала новых цен (Redis pub/sub) и кэша последней цены
+PRICE_FEED_ENABLED = getenv('PRICE_FEED_ENABLED', 'true').lower() == 'true'
+PRICE_FEED_REDIS_URL = getenv('PRICE_FEED_REDIS_URL', CELERY_BROKER_URL)
+PRICE_FEED_CHANNEL = getenv('PRICE_FEED_CHANNEL', 'deribit_task:prices')
+LATEST_PRICE_CACHE_MAX_AGE = float(getenv('LATEST_PRICE_CACHE_MAX_AGE', '5'))
+
 # Настройки Deribit API
 DERIBIT_API_URL = 'https://www.deribit.com/api/v2'
+DERIBIT_MAX_CONCURRENCY = int(getenv('DERIBIT_MAX_CONCURRENCY', '20'))
+DERIBIT_REQUEST_TIMEOUT = float(getenv('DERIBIT_REQUEST_TIMEOUT', '5'))
+DERIBIT_CONNECT_TIMEOUT = float(getenv('DERIBIT_CONNECT_TIMEOUT', '2'))
+DERIBIT_MAX_RETRIES = int(getenv('DERIBIT_MAX_RETRIES', '2'))
+DERIBIT_RETRY_BASE_DELAY = float(getenv('DERIBIT_RETRY_BASE_DELAY', '0.2'))
+DERIBIT_RETRY_MAX_DELAY = float(getenv('DERIBIT_RETRY_MAX_DELAY', '2'))
+DERIBIT_BREAKER_FAILURES = int(getenv('DERIBIT_BREAKER_FAILURES', '5'))
+DERIBIT_BREAKER_RESET_TIMEOUT = float(getenv('DERIBIT_BREAKER_RESET_TIMEOUT', '30'))
+# Пул соединений HTTP сессии клиента Deribit: keep-alive дольше интервала опроса, чтобы циклы
+# Celery переиспользовали прогретые соединения
+DERIBIT_POOL_LIMIT = int(getenv('DERIBIT_POOL_LIMIT', '100'))
+DERIBIT_KEEPALIVE_TIMEOUT = float(getenv('DERIBIT_KEEPALIVE_TIMEOUT', '90'))
+DERIBIT_DNS_CACHE_TTL = int(getenv('DERIBIT_DNS_CACHE_TTL', '300'))
+# Лимит кредитов Deribit для публичных методов: пополнение 20 запросов в секунду, запас 50 запросов
+DERIBIT_RATE_LIMIT = float(getenv('DERIBIT_RATE_LIMIT', '20'))
+DERIBIT_RATE_BURST = float(getenv('DERIBIT_RATE_BURST', '50'))
+DERIBIT_WS_URL = getenv('DERIBIT_WS_URL', 'wss://www.deribit.com/ws/api/v2')
+
+# Настройки опроса цен: интервал задачи Celery beat и высокочастотного сэмплера (в секундах)
+FETCH_PRICES_INTERVAL = int(getenv('FETCH_PRICES_INTERVAL', '60'))
+SAMPLER_INTERVAL = int(getenv('SAMPLER_INTERVAL', '1'))
+# Время тика: slot - начало интервала опроса, exchange - время расчета цены биржей (если оно есть в ответе)
+SAMPLE_TIMESTAMP_SOURCE = getenv('SAMPLE_TIMESTAMP_SOURCE', 'slot')
+
+# Настройки потокового ингестера (WebSocket)
+STREAM_RECONNECT_MIN_DELAY = float(getenv('STREAM_RECONNECT_MIN_DELAY', '1'))
+STREAM_RECONNECT_MAX_DELAY = float(getenv('STREAM_RECONNECT_MAX_DELAY', '60'))
+STREAM_HEARTBEAT_INTERVAL = int(getenv('STREAM_HEARTBEAT_INTERVAL', '30'))
+
+# Настройки буфера пакетной записи тиков
+WRITE_BUFFER_MAX_BATCH = int(getenv('WRITE_BUFFER_MAX_BATCH', '1000'))
+WRITE_BUFFER_FLUSH_INTERVAL = float(getenv('WRITE_BUFFER_FLUSH_INTERVAL', '0.5'))
+WRITE_BUFFER_MAX_PENDING = int(getenv('WRITE_BUFFER_MAX_PENDING', '10000'))
+WRITE_BUFFER_USE_COPY = getenv('WRITE_BUFFER_USE_COPY', 'true').lower() == 'true'
+
+# Настройки метрик Prometheus
+METRICS_ENABLED = getenv('METRICS_ENABLED', 'true').lower() == 'true'
+CELERY_METRICS_PORT = int(getenv('CELERY_METRICS_PORT', '9100'))
+
+# Настройки запуска API: прогрев пулов чтения (соединений на engine) и кэша последних цен
+# до готовности процесса, с ограничением по времени (в секундах)
+STARTUP_WARMUP = getenv('STARTUP_WARMUP', 'true').lower() == 'true'
+STARTUP_WARMUP_CONNECTIONS = int(getenv('STARTUP_WARMUP_CONNECTIONS', '5'))
+STARTUP_WARMUP_TIMEOUT = float(getenv('STARTUP_WARMUP_TIMEOUT', '10'))
+# Таймаут каждой проверки /ready (БД и Redis) в секундах
+READY_CHECK_TIMEOUT = float(getenv('READY_CHECK_TIMEOUT', '2'))
+
+# Настройки API
+API_DEFAULT_PAGE_SIZE = int(getenv('API_DEFAULT_PAGE_SIZE', '1000'))
+API_MAX_PAGE_SIZE = int(getenv('API_MAX_PAGE_SIZE', '10000'))
+API_STREAM_BATCH_SIZE = int(getenv('API_STREAM_BATCH_SIZE', '1000'))
+# Максимальное количество тикеров в одном запросе batch endpoints
+API_MAX_BATCH_TICKERS = int(getenv('API_MAX_BATCH_TICKERS', '50'))
+EXPORT_BATCH_SIZE = int(getenv('EXPORT_BATCH_SIZE', '100000'))
+# Сериализовать списки тиков через orjson из строк колонок, минуя ORM и Pydantic
+API_FAST_SERIALIZATION = getenv('API_FAST_SERIALIZATION', 'false').lower() == 'true'
+
+# Обновлять таблицы предагрегированных свечей при записи и читать свечи из них
+ROLLUPS_ENABLED = getenv('ROLLUPS_ENABLED', 'true').lower() == 'true'
+
+# Настройки компактной схемы хранения тиков (price_ticks_compact)
+# PRICE_STORAGE_WRITE: legacy - только price_ticks, dual - обе таблицы, compact - только price_ticks_compact
+# PRICE_STORAGE_READ: legacy или compact - таблица, из которой читаются тики
+PRICE_STORAGE_WRITE = getenv('PRICE_STORAGE_WRITE', 'legacy')
+PRICE_STORAGE_READ = getenv('PRICE_STORAGE_READ', 'legacy')
+
+# Настройки месячных партиций таблиц тиков (только PostgreSQL)
+PARTITION_PREMAKE_MONTHS = int(getenv('PARTITION_PREMAKE_MONTHS', '3'))
+PARTITION_RETENTION_MONTHS = int(getenv('PARTITION_RETENTION_MONTHS', '0'))
+PARTITION_DROP_EXPIRED = getenv('PARTITION_DROP_EXPIRED', 'false').lower() == 'true'
+
+# Поддерживаемые интервалы свечей OHLC (в секундах)
+OHLC_INTERVALS = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '1h': 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+
+# Реестр тикеров: индексы Deribit и инструменты, по которым сохраняется mark price
+# (источник config - эти списки, db - таблица tickers)
+SUPPORTED_TICKERS = [name.strip() for name in getenv('SUPPORTED_TICKERS', 'BTC_USD,ETH_USD').split(',') if name.strip()]
+MARK_PRICE_INSTRUMENTS = [name.strip() for name in getenv('MARK_PRICE_INSTRUMENTS', '').split(',') if name.strip()]
+TICKER_REGISTRY_SOURCE = getenv('TICKER_REGISTRY_SOURCE', 'config')
+
+# Настройки поиска и заполнения пропусков в ряду тиков (интервалы в секундах).
+# Заполняются только пропуски тикеров mark price (MARK_PRICE_INSTRUMENTS): у индексов
+# SUPPORTED_TICKERS нет истории цен в API Deribit, и без тикеров mark price задача ничего не делает
+# Промежуток между соседними тиками больше GAP_EXPECTED_INTERVAL * GAP_TOLERANCE считается пропуском
+GAP_EXPECTED_INTERVAL = int(getenv('GAP_EXPECTED_INTERVAL', str(FETCH_PRICES_INTERVAL)))
+GAP_TOLERANCE = float(getenv('GAP_TOLERANCE', '1.5'))
+GAP_SCAN_LOOKBACK = int(getenv('GAP_SCAN_LOOKBACK', str(24 * 60 * 60)))
+GAP_SCAN_INTERVAL = int(getenv('GAP_SCAN_INTERVAL', str(60 * 60)))
+# Количество свечей истории в одном запросе public/get_tradingview_chart_data
+GAP_BACKFILL_CHUNK = int(getenv('GAP_BACKFILL_CHUNK', '1000'))
+
+# Настройки HTTP кэширования списков тиков (в секундах)
+# Период, закончившийся раньше HTTP_CACHE_IMMUTABLE_AFTER секунд назад, уже не изменится
+# (заполнение пропусков его не затрагивает) и кэшируется браузерами и CDN на HTTP_CACHE_MAX_AGE
+HTTP_CACHE_IMMUTABLE_AFTER = int(getenv('HTTP_CACHE_IMMUTABLE_AFTER', str(GAP_SCAN_LOOKBACK + 2 * GAP_EXPECTED_INTERVAL)))
+HTTP_CACHE_MAX_AGE = int(getenv('HTTP_CACHE_MAX_AGE', str(24 * 60 * 60)))
 
-# Поддерживаемые тикеры
-SUPPORTED_TICKERS = ['BTC_USD', 'ETH_USD']
+# Настройки live потока цен API (WebSocket и SSE): размер очереди клиента в тиках,
+# максимум подключенных клиентов на процесс и интервал keep-alive сообщений в секундах
+LIVE_STREAM_QUEUE_SIZE = int(getenv('LIVE_STREAM_QUEUE_SIZE', '100'))
+LIVE_STREAM_MAX_CLIENTS = int(getenv('LIVE_STREAM_MAX_CLIENTS', '10000'))
+LIVE_STREAM_KEEPALIVE = float(getenv('LIVE_STREAM_KEEPALIVE', '15'))
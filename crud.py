@@ -1,12 +1,365 @@
 """
 CRUD операции для работы с ценами
 """
-from typing import List, Optional
-from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from typing import AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
+from sqlalchemy import desc, tuple_, select, func, union_all, CompoundSelect, Select
 
-from deribit_task.models import PriceTick
+from deribit_task.config import PRICE_STORAGE_READ
+from deribit_task.metrics import timed_query
+from deribit_task.models import PriceTick, ROLLUP_MODELS, compact_ticks_view
+
+# PriceTick, отображенный на компактную таблицу price_ticks_compact
+CompactPriceTick = aliased(PriceTick, compact_ticks_view(), adapt_on_names=True)
+
+
+def tick_entity():
+    """
+    Возвращает сущность тиков для чтения согласно PRICE_STORAGE_READ
+
+    :return: PriceTick или CompactPriceTick
+    """
+    return CompactPriceTick if PRICE_STORAGE_READ == 'compact' else PriceTick
+
+
+class PriceQueries:
+    """
+    Построители запросов к ценам, общие для синхронного и асинхронного репозиториев
+    """
+
+    @staticmethod
+    def all_by_ticker(ticker: str) -> Select:
+        """
+        Запрос всех тиков по тикеру
+        """
+        ticks = tick_entity()
+        return select(ticks).where(ticks.ticker == ticker).order_by(ticks.timestamp)
+
+    @staticmethod
+    def latest_price(ticker: str) -> Select:
+        """
+        Запрос последнего тика по тикеру
+        """
+        ticks = tick_entity()
+        return select(ticks).where(ticks.ticker == ticker).order_by(desc(ticks.timestamp)).limit(1)
+
+    @staticmethod
+    def price_by_date(ticker: str, date_from: Optional[int] = None, date_to: Optional[int] = None) -> Select:
+        """
+        Запрос тиков по тикеру с фильтром по дате
+        """
+        ticks = tick_entity()
+        return PriceQueries.ticks_in_range(ticker, date_from, date_to).order_by(ticks.timestamp)
+
+    @staticmethod
+    def page(
+        ticker: str,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> Select:
+        """
+        Запрос страницы тиков с keyset-пагинацией по (timestamp, id)
+        """
+        return PriceQueries.stream(ticker, date_from, date_to, after).limit(limit)
+
+    @staticmethod
+    def stream(
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None
+    ) -> Select:
+        """
+        Запрос тиков в порядке (timestamp, id) для постраничной и потоковой выдачи
+        """
+        ticks = tick_entity()
+        return PriceQueries.ticks_in_range(ticker, date_from, date_to, after).order_by(ticks.timestamp, ticks.id)
+
+    @staticmethod
+    def stream_rows(
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None
+    ) -> Select:
+        """
+        Запрос колонок (id, price, timestamp) тиков в порядке (timestamp, id) без ORM объектов
+        """
+        ticks = tick_entity()
+        return PriceQueries.stream(ticker, date_from, date_to, after).with_only_columns(
+            ticks.id, ticks.price, ticks.timestamp
+        )
+
+    @staticmethod
+    def ticks_in_range(
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None
+    ) -> Select:
+        """
+        Запрос тиков по тикеру с фильтрами по дате и keyset-курсору
+        """
+        ticks = tick_entity()
+        query = select(ticks).where(ticks.ticker == ticker)
+
+        if date_from:
+            query = query.where(ticks.timestamp >= date_from)
+
+        if date_to:
+            query = query.where(ticks.timestamp <= date_to)
+
+        if after is not None:
+            # Отдельное условие по timestamp позволяет БД использовать индекс по (ticker, timestamp)
+            query = query.where(ticks.timestamp >= after[0], tuple_(ticks.timestamp, ticks.id) > tuple_(*after))
+
+        return query
+
+    @staticmethod
+    def gaps(
+        ticker: str,
+        threshold: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> Select:
+        """
+        Запрос пропусков в ряду тиков: пар соседних тиков, между которыми больше threshold секунд
+
+        Соседний тик берется оконной функцией lag по порядку timestamp,
+        который обеспечивает индекс по (ticker, timestamp) без сортировки.
+
+        :return: Запрос с полями ticker, gap_start, gap_end (время соседних тиков)
+        """
+        ticks = tick_entity()
+        pairs = PriceQueries.ticks_in_range(ticker, date_from, date_to).with_only_columns(
+            ticks.ticker,
+            func.lag(ticks.timestamp).over(order_by=ticks.timestamp).label('gap_start'),
+            ticks.timestamp.label('gap_end'),
+        ).subquery()
+        return select(pairs.c.ticker, pairs.c.gap_start, pairs.c.gap_end).where(
+            pairs.c.gap_end - pairs.c.gap_start > threshold
+        ).order_by(pairs.c.gap_start)
+
+    @staticmethod
+    def timestamp_bounds(ticker: str, date_from: Optional[int] = None, date_to: Optional[int] = None) -> Select:
+        """
+        Запрос времени первого и последнего тика в периоде
+        """
+        ticks = tick_entity()
+        return PriceQueries.ticks_in_range(ticker, date_from, date_to).with_only_columns(
+            func.min(ticks.timestamp), func.max(ticks.timestamp)
+        )
+
+    @staticmethod
+    def range_stats(ticker: str, date_from: Optional[int] = None, date_to: Optional[int] = None) -> Select:
+        """
+        Запрос сводки тиков периода: количество, время первого и последнего
+        тика, наибольший id и сумма цен (контрольная сумма содержимого)
+        """
+        ticks = tick_entity()
+        return PriceQueries.ticks_in_range(ticker, date_from, date_to).with_only_columns(
+            func.count(ticks.timestamp).label('count'),
+            func.min(ticks.timestamp).label('first_timestamp'),
+            func.max(ticks.timestamp).label('last_timestamp'),
+            func.max(ticks.id).label('last_id'),
+            func.sum(ticks.price).label('price_sum'),
+        )
+
+    @staticmethod
+    def latest_prices(tickers: Sequence[str]) -> CompoundSelect:
+        """
+        Запрос последних тиков набора тикеров одним запросом
+
+        Каждый тикер - отдельная ветка UNION ALL с ORDER BY timestamp DESC
+        LIMIT 1, которая читает одну запись с конца индекса (ticker, timestamp),
+        как LATERAL подзапрос, но переносимо между PostgreSQL и SQLite.
+
+        :return: Запрос с полями id, ticker, price, timestamp (тикеры без тиков отсутствуют)
+        """
+        ticks = tick_entity()
+        return union_all(*(
+            select(latest.c.id, latest.c.ticker, latest.c.price, latest.c.timestamp)
+            for latest in (
+                PriceQueries.latest_price(ticker).with_only_columns(
+                    ticks.id, ticks.ticker, ticks.price, ticks.timestamp
+                ).subquery()
+                for ticker in tickers
+            )
+        ))
+
+    @staticmethod
+    def batch_rows(
+        tickers: Sequence[str],
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Select:
+        """
+        Запрос колонок (ticker, id, price, timestamp) тиков набора тикеров одним запросом
+
+        Ветка UNION ALL на тикер читает свой диапазон индекса (ticker, timestamp)
+        и ограничивает его limit тиками, поэтому лимит действует на каждый тикер.
+
+        :return: Запрос, упорядоченный по (ticker, timestamp, id)
+        """
+        ticks = tick_entity()
+        branches = []
+        for ticker in tickers:
+            query = PriceQueries.stream(ticker, date_from, date_to).with_only_columns(
+                ticks.ticker, ticks.id, ticks.price, ticks.timestamp
+            )
+            if limit is not None:
+                query = query.limit(limit)
+            branch = query.subquery()
+            branches.append(select(branch.c.ticker, branch.c.id, branch.c.price, branch.c.timestamp))
+        rows = union_all(*branches).subquery()
+        return select(rows).order_by(rows.c.ticker, rows.c.timestamp, rows.c.id)
+
+    @staticmethod
+    def ohlc(
+        ticker: str,
+        interval: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> Select:
+        """
+        Запрос свечей OHLC по сырым тикам с полями timestamp, open, high, low, close, count
+        """
+        candles = PriceQueries.ohlc_candles(interval, ticker, date_from, date_to).subquery()
+        return select(
+            candles.c.bucket.label('timestamp'),
+            candles.c.open,
+            candles.c.high,
+            candles.c.low,
+            candles.c.close,
+            candles.c.count,
+        ).order_by(candles.c.bucket)
+
+    @staticmethod
+    def ohlc_from_rollups(
+        ticker: str,
+        interval: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> Select:
+        """
+        Запрос свечей OHLC по таблицам предагрегированных свечей
+
+        Используется самая крупная таблица, размер свечи которой делит
+        запрошенный интервал: свечи этой таблицы либо отдаются как есть,
+        либо объединяются в более крупные. Свечи на границах диапазона
+        дат возвращаются целиком. Если подходящей таблицы нет, свечи
+        считаются по сырым тикам.
+        """
+        models = [model for model in ROLLUP_MODELS if interval % model.interval == 0]
+        if not models:
+            return PriceQueries.ohlc(ticker, interval, date_from, date_to)
+        model = models[-1]
+
+        conditions = [model.ticker == ticker]
+        if date_from:
+            conditions.append(model.bucket >= date_from - date_from % interval)
+        if date_to:
+            conditions.append(model.bucket <= date_to)
+
+        if model.interval == interval:
+            return select(
+                model.bucket.label('timestamp'),
+                model.open,
+                model.high,
+                model.low,
+                model.close,
+                model.count,
+            ).where(*conditions).order_by(model.bucket)
+
+        bucket = model.bucket - model.bucket % interval
+        price_type = model.open.type
+        rollups = select(
+            bucket.label('bucket'),
+            model.high,
+            model.low,
+            model.count,
+            func.first_value(model.open, type_=price_type).over(
+                partition_by=bucket, order_by=model.bucket
+            ).label('open'),
+            func.first_value(model.close, type_=price_type).over(
+                partition_by=bucket, order_by=model.bucket.desc()
+            ).label('close'),
+        ).where(*conditions).subquery()
+
+        return select(
+            rollups.c.bucket.label('timestamp'),
+            func.min(rollups.c.open).label('open'),
+            func.max(rollups.c.high).label('high'),
+            func.min(rollups.c.low).label('low'),
+            func.min(rollups.c.close).label('close'),
+            func.sum(rollups.c.count).label('count'),
+        ).group_by(rollups.c.bucket).order_by(rollups.c.bucket)
+
+    @staticmethod
+    def ohlc_candles(
+        interval: int,
+        ticker: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> Select:
+        """
+        Запрос агрегации сырых тиков в свечи OHLC
+
+        Тики группируются по тикеру и интервалам, выровненным по UNIX эпохе
+        (timestamp - timestamp % interval). Цены открытия и закрытия
+        берутся оконными функциями по порядку (timestamp, id).
+
+        :param interval: Размер свечи в секундах
+        :param ticker: Тикер валюты (опционально, по умолчанию все тикеры)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Запрос с полями ticker, bucket, open, high, low, close,
+                 open_timestamp, close_timestamp, count
+        """
+        source = tick_entity()
+        bucket = source.timestamp - source.timestamp % interval
+        price_type = source.price.type
+        partition = (source.ticker, bucket)
+
+        ticks = select(
+            source.ticker,
+            bucket.label('bucket'),
+            source.price,
+            source.timestamp,
+            func.first_value(source.price, type_=price_type).over(
+                partition_by=partition, order_by=(source.timestamp, source.id)
+            ).label('open'),
+            func.first_value(source.price, type_=price_type).over(
+                partition_by=partition, order_by=(source.timestamp.desc(), source.id.desc())
+            ).label('close'),
+        )
+
+        if ticker:
+            ticks = ticks.where(source.ticker == ticker)
+
+        if date_from:
+            ticks = ticks.where(source.timestamp >= date_from)
+
+        if date_to:
+            ticks = ticks.where(source.timestamp <= date_to)
+
+        ticks = ticks.subquery()
+        return select(
+            ticks.c.ticker,
+            ticks.c.bucket,
+            func.min(ticks.c.open).label('open'),
+            func.max(ticks.c.price).label('high'),
+            func.min(ticks.c.price).label('low'),
+            func.min(ticks.c.close).label('close'),
+            func.min(ticks.c.timestamp).label('open_timestamp'),
+            func.max(ticks.c.timestamp).label('close_timestamp'),
+            func.count().label('count'),
+        ).group_by(ticks.c.ticker, ticks.c.bucket)
 
 
 class PriceRepository:
@@ -15,44 +368,414 @@ class PriceRepository:
     """
 
     @staticmethod
+    @timed_query
     def get_all_by_ticker(db: Session, ticker: str) -> List[PriceTick]:
         """
         Получает все сохраненные данные по указанной валюте
-        
+
         :param db: Сессия БД
         :param ticker: Тикер валюты (BTC_USD или ETH_USD)
         :return: Список всех тиков для указанного тикера
         """
-        return db.query(PriceTick).filter(PriceTick.ticker == ticker).order_by(PriceTick.timestamp).all()
+        return db.scalars(PriceQueries.all_by_ticker(ticker)).all()
 
     @staticmethod
+    @timed_query
     def get_latest_price(db: Session, ticker: str) -> Optional[PriceTick]:
         """
         Получает последнюю цену валюты
-        
+
         :param db: Сессия БД
         :param ticker: Тикер валюты (BTC_USD или ETH_USD)
         :return: Последний тик цены или None
         """
-        return db.query(PriceTick).filter(PriceTick.ticker == ticker).order_by(desc(PriceTick.timestamp)).first()
+        return db.scalars(PriceQueries.latest_price(ticker)).first()
 
     @staticmethod
+    @timed_query
     def get_price_by_date(db: Session, ticker: str, date_from: Optional[int] = None, date_to: Optional[int] = None) -> List[PriceTick]:
         """
         Получает цены валюты с фильтром по дате
-        
+
         :param db: Сессия БД
         :param ticker: Тикер валюты (BTC_USD или ETH_USD)
         :param date_from: Начальная дата в UNIX timestamp (опционально)
         :param date_to: Конечная дата в UNIX timestamp (опционально)
         :return: Список тиков, отфильтрованных по дате
         """
-        query = db.query(PriceTick).filter(PriceTick.ticker == ticker)
-        
-        if date_from:
-            query = query.filter(PriceTick.timestamp >= date_from)
-        
-        if date_to:
-            query = query.filter(PriceTick.timestamp <= date_to)
-        
-        return query.order_by(PriceTick.timestamp).all()
+        return db.scalars(PriceQueries.price_by_date(ticker, date_from, date_to)).all()
+
+    @staticmethod
+    @timed_query
+    def get_page(
+        db: Session,
+        ticker: str,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[PriceTick]:
+        """
+        Получает страницу тиков с keyset-пагинацией по (timestamp, id)
+
+        :param db: Сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param limit: Максимальное количество тиков на странице
+        :param after: Ключ (timestamp, id) последнего тика предыдущей страницы (опционально)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Список тиков, упорядоченных по (timestamp, id)
+        """
+        return db.scalars(PriceQueries.page(ticker, limit, after, date_from, date_to)).all()
+
+    @staticmethod
+    @timed_query
+    def iter_by_ticker(
+        db: Session,
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None,
+        batch_size: int = 1000
+    ) -> Iterator[PriceTick]:
+        """
+        Итерирует тики порциями через серверный курсор, не загружая всю историю в память
+
+        :param db: Сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :param after: Ключ (timestamp, id), после которого начинать выдачу (опционально)
+        :param batch_size: Количество строк, получаемых из курсора за раз
+        :return: Итератор тиков, упорядоченных по (timestamp, id)
+        """
+        query = PriceQueries.stream(ticker, date_from, date_to, after)
+        yield from db.scalars(query.execution_options(yield_per=batch_size))
+
+    @staticmethod
+    @timed_query
+    def get_ohlc(
+        db: Session,
+        ticker: str,
+        interval: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Агрегирует сырые тики в свечи OHLC средствами БД
+
+        :param db: Сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param interval: Размер свечи в секундах
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Строки с полями timestamp, open, high, low, close, count
+        """
+        return db.execute(PriceQueries.ohlc(ticker, interval, date_from, date_to)).all()
+
+    @staticmethod
+    @timed_query
+    def get_ohlc_from_rollups(
+        db: Session,
+        ticker: str,
+        interval: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Получает свечи OHLC из таблиц предагрегированных свечей
+
+        :param db: Сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param interval: Размер свечи в секундах
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Строки с полями timestamp, open, high, low, close, count
+        """
+        return db.execute(PriceQueries.ohlc_from_rollups(ticker, interval, date_from, date_to)).all()
+
+
+    @staticmethod
+    @timed_query
+    def get_gaps(
+        db: Session,
+        ticker: str,
+        threshold: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Находит пропуски в ряду тиков за указанный период
+
+        :param db: Сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param threshold: Промежуток между соседними тиками в секундах, начиная с которого он считается пропуском
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Список пар (время тика до пропуска, время тика после пропуска), упорядоченных по времени
+        """
+        return [(start, end) for _, start, end in db.execute(PriceQueries.gaps(ticker, threshold, date_from, date_to))]
+
+    @staticmethod
+    @timed_query
+    def get_timestamp_bounds(
+        db: Session,
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Получает время первого и последнего тика за указанный период
+
+        :return: Пара UNIX timestamp (None, None), если тиков нет
+        """
+        first, last = db.execute(PriceQueries.timestamp_bounds(ticker, date_from, date_to)).one()
+        return first, last
+
+
+class AsyncPriceRepository:
+    """
+    Асинхронный репозиторий для работы с ценами криптовалют
+    """
+
+    @staticmethod
+    @timed_query
+    async def get_all_by_ticker(db: AsyncSession, ticker: str) -> List[PriceTick]:
+        """
+        Получает все сохраненные данные по указанной валюте
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :return: Список всех тиков для указанного тикера
+        """
+        return (await db.scalars(PriceQueries.all_by_ticker(ticker))).all()
+
+    @staticmethod
+    @timed_query
+    async def get_latest_price(db: AsyncSession, ticker: str) -> Optional[PriceTick]:
+        """
+        Получает последнюю цену валюты
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :return: Последний тик цены или None
+        """
+        return (await db.scalars(PriceQueries.latest_price(ticker))).first()
+
+    @staticmethod
+    @timed_query
+    async def get_latest_prices(db: AsyncSession, tickers: Sequence[str]) -> List[Row]:
+        """
+        Получает последние цены набора валют одним запросом
+
+        :param db: Асинхронная сессия БД
+        :param tickers: Тикеры валют
+        :return: Строки с полями id, ticker, price, timestamp (тикеры без тиков отсутствуют)
+        """
+        if not tickers:
+            return []
+        return (await db.execute(PriceQueries.latest_prices(tickers))).all()
+
+    @staticmethod
+    @timed_query
+    async def get_batch_rows(
+        db: AsyncSession,
+        tickers: Sequence[str],
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Получает строки (ticker, id, price, timestamp) тиков набора валют одним запросом
+
+        :param db: Асинхронная сессия БД
+        :param tickers: Тикеры валют
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :param limit: Максимальное количество строк на тикер (опционально)
+        :return: Список строк, упорядоченных по (ticker, timestamp, id)
+        """
+        if not tickers:
+            return []
+        return (await db.execute(PriceQueries.batch_rows(tickers, date_from, date_to, limit))).all()
+
+    @staticmethod
+    @timed_query
+    async def get_price_by_date(
+        db: AsyncSession,
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[PriceTick]:
+        """
+        Получает цены валюты с фильтром по дате
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Список тиков, отфильтрованных по дате
+        """
+        return (await db.scalars(PriceQueries.price_by_date(ticker, date_from, date_to))).all()
+
+    @staticmethod
+    @timed_query
+    async def get_page(
+        db: AsyncSession,
+        ticker: str,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[PriceTick]:
+        """
+        Получает страницу тиков с keyset-пагинацией по (timestamp, id)
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param limit: Максимальное количество тиков на странице
+        :param after: Ключ (timestamp, id) последнего тика предыдущей страницы (опционально)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Список тиков, упорядоченных по (timestamp, id)
+        """
+        return (await db.scalars(PriceQueries.page(ticker, limit, after, date_from, date_to))).all()
+
+    @staticmethod
+    @timed_query
+    async def iter_by_ticker(
+        db: AsyncSession,
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[PriceTick]:
+        """
+        Итерирует тики порциями через серверный курсор, не загружая всю историю в память
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :param after: Ключ (timestamp, id), после которого начинать выдачу (опционально)
+        :param batch_size: Количество строк, получаемых из курсора за раз
+        :return: Асинхронный итератор тиков, упорядоченных по (timestamp, id)
+        """
+        query = PriceQueries.stream(ticker, date_from, date_to, after)
+        result = await db.stream_scalars(query.execution_options(yield_per=batch_size))
+        async for tick in result:
+            yield tick
+
+    @staticmethod
+    @timed_query
+    async def get_rows(
+        db: AsyncSession,
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None,
+        limit: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Получает строки (id, price, timestamp) тиков без создания ORM объектов
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :param after: Ключ (timestamp, id) последнего тика предыдущей страницы (опционально)
+        :param limit: Максимальное количество строк (опционально)
+        :return: Список строк, упорядоченных по (timestamp, id)
+        """
+        query = PriceQueries.stream_rows(ticker, date_from, date_to, after)
+        if limit is not None:
+            query = query.limit(limit)
+        return (await db.execute(query)).all()
+
+    @staticmethod
+    @timed_query
+    async def iter_row_batches(
+        db: AsyncSession,
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Итерирует пачки строк (id, price, timestamp) через серверный курсор без создания ORM объектов
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :param after: Ключ (timestamp, id), после которого начинать выдачу (опционально)
+        :param batch_size: Размер пачки
+        :return: Асинхронный итератор пачек строк, упорядоченных по (timestamp, id)
+        """
+        query = PriceQueries.stream_rows(ticker, date_from, date_to, after)
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            yield rows
+
+    @staticmethod
+    @timed_query
+    async def get_ohlc(
+        db: AsyncSession,
+        ticker: str,
+        interval: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Агрегирует сырые тики в свечи OHLC средствами БД
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param interval: Размер свечи в секундах
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Строки с полями timestamp, open, high, low, close, count
+        """
+        return (await db.execute(PriceQueries.ohlc(ticker, interval, date_from, date_to))).all()
+
+    @staticmethod
+    @timed_query
+    async def get_ohlc_from_rollups(
+        db: AsyncSession,
+        ticker: str,
+        interval: int,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Получает свечи OHLC из таблиц предагрегированных свечей
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param interval: Размер свечи в секундах
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Строки с полями timestamp, open, high, low, close, count
+        """
+        return (await db.execute(PriceQueries.ohlc_from_rollups(ticker, interval, date_from, date_to))).all()
+
+    @staticmethod
+    @timed_query
+    async def get_range_stats(
+        db: AsyncSession,
+        ticker: str,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None
+    ) -> Row:
+        """
+        Получает сводку тиков периода для валидатора HTTP кэширования
+
+        :param db: Асинхронная сессия БД
+        :param ticker: Тикер валюты (BTC_USD или ETH_USD)
+        :param date_from: Начальная дата в UNIX timestamp (опционально)
+        :param date_to: Конечная дата в UNIX timestamp (опционально)
+        :return: Строка с полями count, first_timestamp, last_timestamp, last_id, price_sum
+        """
+        return (await db.execute(PriceQueries.range_stats(ticker, date_from, date_to))).one()
@@ -1,28 +1,259 @@
 """
 Модуль для работы с базой данных
+
+Синхронный engine - соединения записи (Celery и скрипты) к основной БД.
+Чтения API идут через ReadReplicaRouter: по кругу по репликам
+DB_READ_REPLICAS с исключением недоступных и с переходом на основную
+БД, если доступных реплик нет. Пулы записи и чтения настраиваются
+отдельно.
 """
-from sqlalchemy import create_engine
+import asyncio
+import functools
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from deribit_task.config import DATABASE_URL
+from deribit_task.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_USER,
+    DB_PASSWORD,
+    DB_NAME,
+    DB_WRITE_POOL_SIZE,
+    DB_WRITE_MAX_OVERFLOW,
+    DB_READ_POOL_SIZE,
+    DB_READ_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_READ_REPLICAS,
+    DB_REPLICA_CONNECT_TIMEOUT,
+    DB_REPLICA_RETRY_INTERVAL,
+    DB_REPLICA_MAX_LAG,
+    DB_REPLICA_LAG_CHECK_INTERVAL,
+    METRICS_ENABLED,
+)
+from deribit_task.metrics import DB_REPLICA_UNAVAILABLE, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Фабрика сессий чтения: соединение открывается при входе в сессию
+ReadSessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+# Отставание реплики: время с последней примененной транзакции основной БД (0 на основной БД).
+# При постоянной записи тиков совпадает с задержкой репликации
+REPLICA_LAG_SQL = """
+    SELECT CASE WHEN pg_is_in_recovery()
+        THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        ELSE 0 END
+"""
 
-# Создаем engine для подключения к БД
+# Создаем engine для подключения к БД (синхронный, для записи из Celery и скриптов)
 engine = create_engine(
     DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
+    pool_size=DB_WRITE_POOL_SIZE,
+    max_overflow=DB_WRITE_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
     pool_pre_ping=True
 )
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def create_read_engine(url: str, **kwargs) -> AsyncEngine:
+    """
+    Создает асинхронный engine чтения с пулом DB_READ_POOL_SIZE
+
+    :param url: URL базы данных
+    :return: Асинхронный engine
+    """
+    return create_async_engine(
+        url,
+        pool_size=DB_READ_POOL_SIZE,
+        max_overflow=DB_READ_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        **kwargs
+    )
+
+
+def replica_url(host: str) -> str:
+    """
+    Формирует URL asyncpg реплики по host[:port] с учетными данными основной БД
+    """
+    if ':' not in host:
+        host = f'{host}:5432'
+    return f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{host}/{DB_NAME}'
+
+
+# Создаем асинхронный engine (asyncpg) основной БД для API
+async_engine = create_read_engine(ASYNC_DATABASE_URL)
+
+# Engine реплик чтения: подключение с таймаутом, чтобы недоступная реплика быстро уступала следующей
+replica_engines = [
+    (host, create_read_engine(replica_url(host), connect_args={'timeout': DB_REPLICA_CONNECT_TIMEOUT}))
+    for host in DB_READ_REPLICAS
+]
+
+# Метрики ожидания и загрузки пулов соединений
+if METRICS_ENABLED:
+    instrument_engine(engine, 'sync')
+    instrument_engine(async_engine, 'async')
+    for host, replica_engine in replica_engines:
+        instrument_engine(replica_engine, f'replica:{host}')
+
+# Создаем фабрику асинхронных сессий
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Базовый класс для моделей
 Base = declarative_base()
 
 
+class ReadReplicaRouter:
+    """
+    Выбор соединения для чтения: реплики по кругу, основная БД - запасной вариант
+
+    Реплика, к которой не удалось подключиться, исключается из ротации на
+    retry_interval секунд. Для чтений, чувствительных к свежести данных,
+    реплика с отставанием больше max_lag пропускается; отставание
+    замеряется не чаще раза в lag_check_interval секунд на реплику.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: Sequence[Tuple[str, AsyncEngine]] = (),
+        retry_interval: float = DB_REPLICA_RETRY_INTERVAL,
+        lag_check_interval: float = DB_REPLICA_LAG_CHECK_INTERVAL
+    ):
+        """
+        Инициализация маршрутизатора
+
+        :param primary: Engine основной БД
+        :param replicas: Пары (имя, engine) реплик
+        :param retry_interval: Время исключения недоступной реплики в секундах
+        :param lag_check_interval: Период замера отставания реплики в секундах
+        """
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_interval = retry_interval
+        self.lag_check_interval = lag_check_interval
+        self._counter = itertools.count()
+        self._down_until: Dict[str, float] = {}
+        self._lag: Dict[str, Tuple[float, float]] = {}
+
+    def available_replicas(self) -> List[Tuple[str, AsyncEngine]]:
+        """
+        Возвращает доступные реплики в порядке очередного круга ротации
+        """
+        if not self.replicas:
+            return []
+        start = next(self._counter) % len(self.replicas)
+        now = time.monotonic()
+        return [
+            (name, replica) for name, replica in self.replicas[start:] + self.replicas[:start]
+            if self._down_until.get(name, 0) <= now
+        ]
+
+    def mark_down(self, name: str, error: BaseException):
+        """
+        Исключает реплику из ротации на retry_interval секунд
+        """
+        self._down_until[name] = time.monotonic() + self.retry_interval
+        DB_REPLICA_UNAVAILABLE.labels(name, 'error').inc()
+        logger.warning(f"Реплика {name} недоступна, исключена из ротации на {self.retry_interval} с: {error}")
+
+    async def replica_lag(self, name: str, connection: AsyncConnection) -> float:
+        """
+        Возвращает отставание реплики в секундах (замер кэшируется на lag_check_interval)
+        """
+        now = time.monotonic()
+        cached = self._lag.get(name)
+        if cached is not None and now - cached[1] < self.lag_check_interval:
+            return cached[0]
+        lag = float((await connection.execute(text(REPLICA_LAG_SQL))).scalar() or 0)
+        await connection.rollback()
+        self._lag[name] = (lag, now)
+        return lag
+
+    async def connect(self, max_lag: Optional[float] = None) -> AsyncConnection:
+        """
+        Открывает соединение для чтения
+
+        :param max_lag: Максимальное отставание реплики в секундах (опционально)
+        :return: Соединение с первой подходящей репликой или с основной БД
+        """
+        for name, replica in self.available_replicas():
+            try:
+                connection = await replica.connect()
+            except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+                self.mark_down(name, e)
+                continue
+
+            if max_lag is None:
+                return connection
+            try:
+                lag = await self.replica_lag(name, connection)
+            except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+                await connection.close()
+                self.mark_down(name, e)
+                continue
+            if lag <= max_lag:
+                return connection
+            await connection.close()
+            DB_REPLICA_UNAVAILABLE.labels(name, 'lag').inc()
+            logger.debug(f"Реплика {name} отстает на {lag:.1f} с (максимум {max_lag} с)")
+
+        return await self.primary.connect()
+
+    async def warm_up(self, connections: int):
+        """
+        Открывает соединения в пулах основной БД и реплик, чтобы первые запросы не ждали подключения
+
+        Недоступная реплика исключается из ротации; ошибка основной БД
+        только логируется - готовность процесса проверяет /ready.
+
+        :param connections: Количество соединений на engine
+        """
+        async def connect(engine: AsyncEngine):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+
+        for name, target in [('primary', self.primary)] + self.replicas:
+            results = await asyncio.gather(*(connect(target) for _ in range(connections)), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if not errors:
+                logger.info(f"Пул соединений {name} прогрет: {connections} соединений")
+            elif target is self.primary:
+                logger.warning(f"Не удалось прогреть пул соединений основной БД: {errors[0]}")
+            else:
+                self.mark_down(name, errors[0])
+
+    @asynccontextmanager
+    async def session(self, max_lag: Optional[float] = None) -> AsyncIterator[AsyncSession]:
+        """
+        Открывает асинхронную сессию чтения на соединении connect()
+
+        :param max_lag: Максимальное отставание реплики в секундах (опционально)
+        """
+        connection = await self.connect(max_lag)
+        try:
+            async with AsyncSession(bind=connection, autoflush=False, expire_on_commit=False) as db:
+                yield db
+        finally:
+            await connection.close()
+
+
+read_router = ReadReplicaRouter(async_engine, replica_engines)
+
+
 def get_db():
     """
     Dependency для получения сессии БД в FastAPI
@@ -32,3 +263,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency для получения асинхронной сессии основной БД в FastAPI
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """
+    Dependency для получения асинхронной сессии чтения (реплика или основная БД)
+    """
+    async with read_router.session() as db:
+        yield db
+
+
+def get_fresh_read_sessions() -> ReadSessionFactory:
+    """
+    Dependency для получения фабрики сессий чтения с реплики, отстающей не больше DB_REPLICA_MAX_LAG секунд
+
+    Соединение не открывается до входа в сессию, поэтому запрос, ответ на
+    который есть в кэше, не занимает соединение из пула и не проверяет
+    отставание реплики.
+    """
+    return functools.partial(read_router.session, DB_REPLICA_MAX_LAG or None)
@@ -1,42 +1,150 @@
 """
 Клиент для работы с API криптобиржи Deribit
+
+Запросы ограничены по времени (DERIBIT_REQUEST_TIMEOUT), повторяются при
+таймаутах, сетевых ошибках, ответах 5xx и превышении лимита запросов
+с экспоненциальной задержкой и джиттером. Частота запросов ограничена
+token bucket по лимиту кредитов Deribit, а при недоступности биржи
+circuit breaker прекращает запросы до пробного через
+DERIBIT_BREAKER_RESET_TIMEOUT секунд. Ограничитель и breaker общие
+для всех клиентов процесса с одним base_url.
+
+HTTP сессия держит пул keep-alive соединений с кэшем DNS; долгоживущий
+клиент (например, клиент процесса Celery worker) переиспользует
+прогретые соединения между циклами опроса.
 """
+import asyncio
+import time
 import aiohttp
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 
-from deribit_task.config import DERIBIT_API_URL
+from deribit_task.config import (
+    DERIBIT_API_URL,
+    DERIBIT_MAX_CONCURRENCY,
+    DERIBIT_REQUEST_TIMEOUT,
+    DERIBIT_CONNECT_TIMEOUT,
+    DERIBIT_MAX_RETRIES,
+    DERIBIT_RETRY_BASE_DELAY,
+    DERIBIT_RETRY_MAX_DELAY,
+    DERIBIT_BREAKER_FAILURES,
+    DERIBIT_BREAKER_RESET_TIMEOUT,
+    DERIBIT_RATE_LIMIT,
+    DERIBIT_RATE_BURST,
+    DERIBIT_POOL_LIMIT,
+    DERIBIT_KEEPALIVE_TIMEOUT,
+    DERIBIT_DNS_CACHE_TTL,
+)
+from deribit_task.metrics import (
+    DERIBIT_REQUEST_DURATION,
+    DERIBIT_REQUEST_ERRORS,
+    DERIBIT_REQUEST_RETRIES,
+    DERIBIT_CIRCUIT_OPEN,
+)
+from deribit_task.resilience import CircuitBreaker, TokenBucket, backoff_delay
 
 logger = logging.getLogger(__name__)
 
+# Код ошибки Deribit о превышении лимита запросов
+TOO_MANY_REQUESTS_CODE = 10028
+
+# Задержка после превышения лимита, если Deribit не прислал Retry-After
+RATE_LIMIT_PAUSE = 1.0
+
+# Исходы попытки запроса
+OK = 'ok'
+REJECTED = 'rejected'
+RATE_LIMITED = 'rate_limited'
+FAILED = 'failed'
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_rate_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    """
+    Возвращает общий для процесса circuit breaker API с указанным base_url
+    """
+    if base_url not in _circuit_breakers:
+        _circuit_breakers[base_url] = CircuitBreaker(DERIBIT_BREAKER_FAILURES, DERIBIT_BREAKER_RESET_TIMEOUT)
+    return _circuit_breakers[base_url]
+
+
+def get_rate_limiter(base_url: str) -> TokenBucket:
+    """
+    Возвращает общий для процесса ограничитель частоты запросов к API с указанным base_url
+    """
+    if base_url not in _rate_limiters:
+        _rate_limiters[base_url] = TokenBucket(DERIBIT_RATE_LIMIT, DERIBIT_RATE_BURST)
+    return _rate_limiters[base_url]
+
 
 class DeribitClient:
     """
     Клиент для получения данных с биржи Deribit
     """
 
-    def __init__(self, base_url: str = DERIBIT_API_URL):
+    def __init__(
+        self,
+        base_url: str = DERIBIT_API_URL,
+        max_concurrency: int = DERIBIT_MAX_CONCURRENCY,
+        timeout: float = DERIBIT_REQUEST_TIMEOUT,
+        max_retries: int = DERIBIT_MAX_RETRIES,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        rate_limiter: Optional[TokenBucket] = None
+    ):
         """
         Инициализация клиента
         
         :param base_url: Базовый URL API Deribit
+        :param max_concurrency: Максимальное количество одновременных запросов
+        :param timeout: Максимальное время одной попытки запроса в секундах
+        :param max_retries: Максимальное количество повторов запроса
+        :param circuit_breaker: Circuit breaker (по умолчанию общий для base_url)
+        :param rate_limiter: Ограничитель частоты запросов (по умолчанию общий для base_url)
         """
         self.base_url = base_url
         self.session: Optional[aiohttp.ClientSession] = None
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=min(DERIBIT_CONNECT_TIMEOUT, timeout))
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(base_url)
+        self.rate_limiter = rate_limiter or get_rate_limiter(base_url)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
 
     async def __aenter__(self):
         """
         Асинхронный контекстный менеджер - вход
         """
-        self.session = aiohttp.ClientSession()
+        await self.open()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """
         Асинхронный контекстный менеджер - выход
         """
+        await self.close()
+
+    async def open(self):
+        """
+        Создает HTTP сессию с пулом keep-alive соединений, если она еще не создана
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=DERIBIT_POOL_LIMIT,
+                limit_per_host=self.max_concurrency,
+                keepalive_timeout=DERIBIT_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=DERIBIT_DNS_CACHE_TTL,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def close(self):
+        """
+        Закрывает HTTP сессию и ее соединения
+        """
         if self.session:
             await self.session.close()
+            self.session = None
 
     async def get_index_price(self, currency: str) -> Optional[Dict]:
         """
@@ -45,30 +153,187 @@ class DeribitClient:
         :param currency: Валюта (BTC или ETH)
         :return: Словарь с данными о цене или None в случае ошибки
         """
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        return await self.get_index_price_by_name(f"{currency}_USD")
+
+    async def get_index_price_by_name(self, index_name: str) -> Optional[Dict]:
+        """
+        Получает цену индекса по его имени
+        
+        :param index_name: Имя индекса Deribit (например, BTC_USD)
+        :return: Словарь с данными о цене (ключ index_price) или None в случае ошибки
+        """
+        return await self._request('public/get_index_price', {"index_name": index_name}, index_name)
+
+    async def get_mark_price(self, instrument_name: str) -> Optional[Dict]:
+        """
+        Получает тикер инструмента (фьючерса или опциона) с mark price
+        
+        :param instrument_name: Имя инструмента Deribit (например, BTC-PERPETUAL)
+        :return: Словарь с данными тикера (ключи mark_price и timestamp - время
+                 расчета цены в миллисекундах) или None в случае ошибки
+        """
+        return await self._request('public/ticker', {"instrument_name": instrument_name}, instrument_name)
+
+    async def get_chart_data(
+        self,
+        instrument_name: str,
+        start_timestamp: int,
+        end_timestamp: int,
+        resolution: str
+    ) -> Optional[Dict]:
+        """
+        Получает свечи истории цен инструмента
+        
+        :param instrument_name: Имя инструмента Deribit (например, BTC-PERPETUAL)
+        :param start_timestamp: Начало периода в миллисекундах
+        :param end_timestamp: Конец периода в миллисекундах
+        :param resolution: Размер свечи в минутах (1, 3, 5, 10, 15, 30, 60, 120, 180, 360, 720) или 1D
+        :return: Словарь со списками ticks (время открытия свечей в миллисекундах), open, high, low,
+                 close и полем status (ok или no_data) или None в случае ошибки
+        """
+        return await self._request(
+            'public/get_tradingview_chart_data',
+            {
+                "instrument_name": instrument_name,
+                "start_timestamp": start_timestamp,
+                "end_timestamp": end_timestamp,
+                "resolution": resolution,
+            },
+            instrument_name
+        )
 
+    async def _request(self, method: str, params: Dict, name: str) -> Optional[Dict]:
+        """
+        Выполняет GET запрос к публичному методу API с повторами, ограничением
+        частоты и числа одновременных запросов
+        
+        :param method: Метод API (например, public/get_index_price)
+        :param params: Параметры запроса
+        :param name: Имя индекса или инструмента для логов и метрик
+        :return: Поле result ответа или None в случае ошибки
+        """
+        await self.open()
+
+        breaker = self.circuit_breaker
+        if not breaker.allow():
+            logger.warning(f"Запрос цены для {name} пропущен: circuit breaker разомкнут")
+            DERIBIT_REQUEST_ERRORS.labels(name, 'circuit_open').inc()
+            return None
+
+        url = f"{self.base_url}/{method}"
+        outcome = None
         try:
-            url = f"{self.base_url}/public/get_index_price"
-            params = {"index_name": f"{currency}_USD"}
-            
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    DERIBIT_REQUEST_RETRIES.labels(name, outcome).inc()
+                    await asyncio.sleep(delay)
+                outcome, result, retry_after = await self._attempt(url, params, name)
+                if outcome in (OK, REJECTED):
+                    break
+                delay = backoff_delay(attempt, DERIBIT_RETRY_BASE_DELAY, DERIBIT_RETRY_MAX_DELAY)
+                if outcome == RATE_LIMITED:
+                    pause = retry_after if retry_after is not None else RATE_LIMIT_PAUSE
+                    self.rate_limiter.penalize(pause)
+                    delay = max(delay, pause)
+        finally:
+            # Breaker учитывает только исход запроса после всех повторов
+            if outcome in (OK, REJECTED):
+                breaker.record_success()
+            elif outcome == FAILED:
+                breaker.record_failure()
+            else:
+                breaker.release()
+            DERIBIT_CIRCUIT_OPEN.set(int(breaker.state != CircuitBreaker.CLOSED))
+
+        if outcome == FAILED and breaker.state != CircuitBreaker.CLOSED:
+            logger.error(f"Circuit breaker клиента Deribit разомкнут после ошибки запроса для {name}")
+        return result
+
+    async def _attempt(self, url: str, params: Dict, name: str) -> Tuple[str, Optional[Dict], Optional[float]]:
+        """
+        Выполняет одну попытку запроса
+        
+        :return: Исход попытки (ok, rejected, rate_limited, failed), поле result
+                 ответа и задержка из заголовка Retry-After
+        """
+        await self.rate_limiter.acquire()
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with self.session.get(url, params=params) as response:
+                    if response.status == 429:
+                        logger.warning(f"Превышен лимит запросов Deribit при получении цены для {name}")
+                        DERIBIT_REQUEST_ERRORS.labels(name, 'rate_limited').inc()
+                        return RATE_LIMITED, None, _retry_after(response)
+                    if response.status >= 500:
+                        logger.error(f"HTTP ошибка {response.status} при получении цены для {name}")
+                        DERIBIT_REQUEST_ERRORS.labels(name, f"http_{response.status}").inc()
+                        return FAILED, None, None
+                    if response.status != 200:
+                        logger.error(f"HTTP ошибка {response.status} при получении цены для {name}")
+                        DERIBIT_REQUEST_ERRORS.labels(name, f"http_{response.status}").inc()
+                        return REJECTED, None, None
+
                     data = await response.json()
                     if data.get('result'):
-                        return data['result']
-                    else:
-                        logger.error(f"Ошибка получения цены для {currency}: {data}")
-                        return None
-                else:
-                    logger.error(f"HTTP ошибка {response.status} при получении цены для {currency}")
-                    return None
-        except aiohttp.ClientError as e:
-            logger.error(f"Ошибка клиента при получении цены для {currency}: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка при получении цены для {currency}: {e}")
-            return None
+                        return OK, data['result'], None
+                    if (data.get('error') or {}).get('code') == TOO_MANY_REQUESTS_CODE:
+                        logger.warning(f"Превышен лимит запросов Deribit при получении цены для {name}")
+                        DERIBIT_REQUEST_ERRORS.labels(name, 'rate_limited').inc()
+                        return RATE_LIMITED, None, None
+                    logger.error(f"Ошибка получения цены для {name}: {data}")
+                    DERIBIT_REQUEST_ERRORS.labels(name, 'api_error').inc()
+                    return REJECTED, None, None
+            except asyncio.TimeoutError:
+                logger.error(f"Таймаут запроса цены для {name}")
+                DERIBIT_REQUEST_ERRORS.labels(name, 'timeout').inc()
+                return FAILED, None, None
+            except aiohttp.ClientError as e:
+                logger.error(f"Ошибка клиента при получении цены для {name}: {e}")
+                DERIBIT_REQUEST_ERRORS.labels(name, 'client_error').inc()
+                return FAILED, None, None
+            except Exception as e:
+                # Непредвиденная ошибка (разбор ответа, неожиданный формат) - сбой, а не отказ биржи
+                logger.error(f"Неожиданная ошибка при получении цены для {name}: {e}")
+                DERIBIT_REQUEST_ERRORS.labels(name, 'unexpected').inc()
+                return FAILED, None, None
+            finally:
+                DERIBIT_REQUEST_DURATION.labels(name).observe(time.perf_counter() - started)
+
+    async def get_index_prices(self, index_names: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Параллельно получает цены нескольких индексов в рамках одной сессии
+        
+        Ошибка по одному индексу не влияет на остальные: для него
+        возвращается None.
+        
+        :param index_names: Список имен индексов Deribit
+        :return: Словарь {имя индекса: данные о цене или None}
+        """
+        return await self._gather(self.get_index_price_by_name, index_names)
+
+    async def get_mark_prices(self, instrument_names: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Параллельно получает тикеры нескольких инструментов в рамках одной сессии
+        
+        :param instrument_names: Список имен инструментов Deribit
+        :return: Словарь {имя инструмента: данные тикера или None}
+        """
+        return await self._gather(self.get_mark_price, instrument_names)
+
+    async def _gather(self, fetch, names: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Параллельно выполняет запросы по списку имен, заменяя исключения на None
+        """
+        results = await asyncio.gather(*(fetch(name) for name in names), return_exceptions=True)
+
+        prices: Dict[str, Optional[Dict]] = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Неожиданная ошибка при получении цены для {name}: {result}")
+                result = None
+            prices[name] = result
+        return prices
 
     async def get_btc_price(self) -> Optional[Dict]:
         """
@@ -85,3 +350,13 @@ class DeribitClient:
         :return: Словарь с данными о цене ETH
         """
         return await self.get_index_price("ETH")
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+    """
+    Возвращает задержку из заголовка Retry-After в секундах или None
+    """
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, TypeError, ValueError):
+        return None
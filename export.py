@@ -0,0 +1,159 @@
+"""
+Выгрузка истории тиков в колоночных и бинарных форматах
+
+Пачки строк (id, price, timestamp) из серверного курсора кодируются
+целиком по колонкам, без ORM объектов и Pydantic моделей на каждую строку.
+Кодирование выполняется в threadpool, чтобы не блокировать event loop.
+"""
+import zlib
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from starlette.concurrency import run_in_threadpool
+
+# Строка выгрузки: (id, price, timestamp)
+ExportRow = Tuple[int, Decimal, int]
+
+PRICE_TYPE = pa.decimal128(20, 8)
+
+EXPORT_SCHEMA = pa.schema([
+    pa.field('id', pa.int64(), nullable=False),
+    pa.field('ticker', pa.dictionary(pa.int8(), pa.string()), nullable=False),
+    pa.field('price', PRICE_TYPE, nullable=False),
+    pa.field('timestamp', pa.int64(), nullable=False),
+])
+
+
+class _ChunkSink:
+    """
+    Файлоподобный приемник, накапливающий записанные байты до очередного drain()
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        """
+        Возвращает и очищает накопленные байты
+        """
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _record_batch(ticker: str, rows: Sequence[ExportRow]) -> pa.RecordBatch:
+    """
+    Собирает RecordBatch из пачки строк по колонкам
+    """
+    ids, prices, timestamps = zip(*rows)
+    tickers = pa.DictionaryArray.from_arrays(pa.array([0] * len(rows), type=pa.int8()), pa.array([ticker]))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(ids, type=pa.int64()), tickers, pa.array(prices, type=PRICE_TYPE), pa.array(timestamps, type=pa.int64())],
+        schema=EXPORT_SCHEMA
+    )
+
+
+class ArrowEncoder:
+    """
+    Кодировщик в поток Apache Arrow IPC (streaming format)
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    extension = 'arrow'
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self._sink = _ChunkSink()
+        self._writer = pa.ipc.new_stream(self._sink, EXPORT_SCHEMA)
+
+    def write(self, rows: Sequence[ExportRow]) -> bytes:
+        self._writer.write_batch(_record_batch(self.ticker, rows))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+class ParquetEncoder:
+    """
+    Кодировщик в Parquet: одна row group на пачку, сжатие zstd
+    """
+    media_type = 'application/vnd.apache.parquet'
+    extension = 'parquet'
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, EXPORT_SCHEMA, compression='zstd')
+
+    def write(self, rows: Sequence[ExportRow]) -> bytes:
+        self._writer.write_batch(_record_batch(self.ticker, rows))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+class CsvGzipEncoder:
+    """
+    Кодировщик в CSV, сжатый потоковым gzip
+    """
+    media_type = 'application/gzip'
+    extension = 'csv.gz'
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self._header = b'id,ticker,price,timestamp\n'
+
+    def write(self, rows: Sequence[ExportRow]) -> bytes:
+        lines = ''.join(f"{tick_id},{self.ticker},{price},{timestamp}\n" for tick_id, price, timestamp in rows)
+        data, self._header = self._header + lines.encode(), b''
+        return self._compressor.compress(data)
+
+    def close(self) -> bytes:
+        return self._compressor.compress(self._header) + self._compressor.flush()
+
+
+EXPORT_ENCODERS: Dict[str, type] = {
+    'arrow': ArrowEncoder,
+    'parquet': ParquetEncoder,
+    'csv': CsvGzipEncoder,
+}
+
+
+async def encode_batches(batches: AsyncIterator[Sequence[ExportRow]], encoder) -> AsyncIterator[bytes]:
+    """
+    Кодирует пачки строк в байты выбранного формата
+
+    :param batches: Асинхронный итератор пачек строк (id, price, timestamp)
+    :param encoder: Кодировщик из EXPORT_ENCODERS
+    :return: Асинхронный итератор фрагментов файла
+    """
+    async for rows in batches:
+        if not rows:
+            continue
+        chunk = await run_in_threadpool(encoder.write, rows)
+        if chunk:
+            yield chunk
+    yield await run_in_threadpool(encoder.close)
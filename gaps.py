@@ -0,0 +1,340 @@
+"""
+Поиск пропусков в ряду тиков и их заполнение историей цен Deribit
+
+Пропуск - промежуток между соседними тиками тикера больше
+GAP_EXPECTED_INTERVAL * GAP_TOLERANCE секунд, а также промежутки от
+начала периода до первого тика и от последнего тика до конца периода
+(период без тиков - один пропуск целиком). Пропуски тикера ищутся одним
+запросом с оконной функцией lag по индексу (ticker, timestamp).
+
+Пропуски тикеров mark price заполняются свечами
+public/get_tradingview_chart_data самого инструмента: тик пропуска -
+цена открытия свечи на время ее открытия. У индексов Deribit нет истории
+в API, а цена другого инструмента (например, бессрочного фьючерса) не
+равна цене индекса, поэтому индексы не заполняются: задача Celery
+проверяет только тикеры mark price реестра и пропускает запуск, если
+их нет (в конфигурации по умолчанию, только с индексами, задача ничего
+не делает). Пропуски индекса, явно переданного в backfill_gaps или
+командной строке, только учитываются в метрике и логе.
+Запросы истории разбиваются на пачки по GAP_BACKFILL_CHUNK свечей и
+выполняются параллельно с ограничением частоты и числа одновременных
+запросов клиента Deribit. Сохраненные тики истории не публикуются в
+канал новых цен.
+
+Запуск: python -m deribit_task.gaps [--ticker BTC_USD] [--date-from ...] [--date-to ...] [--dry-run]
+"""
+import argparse
+import asyncio
+import bisect
+import logging
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from deribit_task.celery_app import celery_app
+from deribit_task.config import (
+    GAP_BACKFILL_CHUNK,
+    GAP_EXPECTED_INTERVAL,
+    GAP_SCAN_LOOKBACK,
+    GAP_TOLERANCE,
+)
+from deribit_task.crud import PriceRepository
+from deribit_task.database import SessionLocal
+from deribit_task.deribit_client import DeribitClient
+from deribit_task.metrics import PRICE_GAP_BACKFILLED_TICKS, PRICE_GAPS_FOUND
+from deribit_task.tasks import save_price_ticks
+from deribit_task.tickers import KIND_MARK, TickerInfo, refresh_registry, ticker_registry
+from deribit_task.worker_runtime import worker_runtime
+
+logger = logging.getLogger(__name__)
+
+# Размеры свечей public/get_tradingview_chart_data в минутах
+CHART_RESOLUTIONS = (1, 3, 5, 10, 15, 30, 60, 120, 180, 360, 720)
+
+
+class Gap(NamedTuple):
+    """
+    Пропуск: тикер и период недостающих сэмплов в UNIX timestamp (границы включительно)
+    """
+    ticker: str
+    date_from: int
+    date_to: int
+
+
+def chart_resolution(interval: int) -> int:
+    """
+    Возвращает наибольший размер свечи в минутах, не превышающий интервал сэмплов
+    (не меньше 1 минуты)
+    """
+    suitable = [minutes for minutes in CHART_RESOLUTIONS if minutes * 60 <= interval]
+    return suitable[-1] if suitable else CHART_RESOLUTIONS[0]
+
+
+def history_instrument(ticker: TickerInfo) -> Optional[str]:
+    """
+    Возвращает инструмент Deribit, история цен которого заполняет пропуски тикера
+
+    История есть только у инструментов mark price; для индексов возвращается None.
+    """
+    return ticker.name if ticker.kind == KIND_MARK else None
+
+
+def fillable_tickers() -> List[TickerInfo]:
+    """
+    Возвращает тикеры реестра, пропуски которых можно заполнить историей цен
+    """
+    return [ticker for ticker in ticker_registry if history_instrument(ticker) is not None]
+
+
+def find_gaps(
+    db: Session,
+    ticker: str,
+    date_from: Optional[int] = None,
+    date_to: Optional[int] = None,
+    interval: int = GAP_EXPECTED_INTERVAL,
+    tolerance: float = GAP_TOLERANCE
+) -> List[Gap]:
+    """
+    Находит пропуски в ряду тиков тикера за период
+
+    Период пропуска отступает от соседних тиков на половину интервала,
+    чтобы тики истории не ложились вплотную к сохраненным.
+
+    :param db: Сессия БД
+    :param ticker: Тикер валюты
+    :param date_from: Начальная дата в UNIX timestamp (опционально)
+    :param date_to: Конечная дата в UNIX timestamp (опционально)
+    :param interval: Ожидаемый интервал между тиками в секундах
+    :param tolerance: Во сколько раз промежуток между тиками должен превышать интервал, чтобы считаться пропуском
+    :return: Список пропусков, упорядоченных по времени
+    """
+    threshold = int(interval * tolerance)
+    margin = interval // 2
+    first, last = PriceRepository.get_timestamp_bounds(db, ticker, date_from, date_to)
+    if first is None:
+        # Тиков в периоде нет: пропуск - весь период, если известны обе его границы
+        if date_from is not None and date_to is not None and date_to - date_from > threshold:
+            return [Gap(ticker, date_from, date_to)]
+        return []
+
+    gaps = [
+        Gap(ticker, start + margin, end - margin)
+        for start, end in PriceRepository.get_gaps(db, ticker, threshold, date_from, date_to)
+    ]
+    if date_from is not None and first - date_from > threshold:
+        gaps.insert(0, Gap(ticker, date_from, first - margin))
+    if date_to is not None and date_to - last > threshold:
+        gaps.append(Gap(ticker, last + margin, date_to))
+    return gaps
+
+
+def request_windows(gaps: Iterable[Gap], span: int) -> List[Tuple[int, int]]:
+    """
+    Разбивает пропуски на периоды запросов истории длиной не больше span секунд
+
+    Соседние короткие пропуски объединяются в один запрос, длинные
+    разбиваются на несколько.
+
+    :param gaps: Пропуски, упорядоченные по времени
+    :param span: Максимальная длина периода запроса в секундах
+    :return: Список периодов (начало, конец) в UNIX timestamp
+    """
+    windows: List[Tuple[int, int]] = []
+    for gap in gaps:
+        start = gap.date_from
+        while start <= gap.date_to:
+            end = min(gap.date_to, start + span - 1)
+            if windows and end - windows[-1][0] < span:
+                windows[-1] = (windows[-1][0], end)
+            else:
+                windows.append((start, end))
+            start = end + 1
+    return windows
+
+
+async def fetch_history(
+    client: DeribitClient,
+    instrument: str,
+    windows: List[Tuple[int, int]],
+    resolution: int
+) -> List[Tuple[int, float]]:
+    """
+    Параллельно получает свечи инструмента за периоды запросов
+
+    Ошибка по одному периоду не мешает получить остальные.
+
+    :param client: Открытый клиент Deribit
+    :param instrument: Имя инструмента Deribit
+    :param windows: Периоды (начало, конец) в UNIX timestamp
+    :param resolution: Размер свечи в минутах
+    :return: Список пар (время открытия свечи в UNIX timestamp, цена открытия), упорядоченный по времени
+    """
+    results = await asyncio.gather(
+        *(
+            client.get_chart_data(instrument, start * 1000, end * 1000, str(resolution))
+            for start, end in windows
+        ),
+        return_exceptions=True
+    )
+
+    bars: Dict[int, float] = {}
+    for (start, end), result in zip(windows, results):
+        if isinstance(result, BaseException) or not result:
+            logger.warning(f"Не удалось получить историю {instrument} за период {start} - {end}: {result}")
+            continue
+        for timestamp, price in zip(result.get('ticks') or [], result.get('open') or []):
+            if price is not None:
+                bars[int(timestamp) // 1000] = float(price)
+    return sorted(bars.items())
+
+
+def gap_ticks(gap: Gap, bars: List[Tuple[int, float]], interval: int) -> List[Dict]:
+    """
+    Выбирает из свечей тики пропуска не чаще ожидаемого интервала
+
+    :param gap: Пропуск
+    :param bars: Свечи (время открытия, цена открытия), упорядоченные по времени
+    :param interval: Ожидаемый интервал между тиками в секундах
+    :return: Список тиков с ключами ticker, price, timestamp
+    """
+    ticks: List[Dict] = []
+    for timestamp, price in bars[bisect.bisect_left(bars, (gap.date_from,)):]:
+        if timestamp > gap.date_to:
+            break
+        if ticks and timestamp - ticks[-1]['timestamp'] < interval:
+            continue
+        ticks.append({'ticker': gap.ticker, 'price': price, 'timestamp': timestamp})
+    return ticks
+
+
+async def backfill_gaps(
+    db: Session,
+    client: DeribitClient,
+    date_from: Optional[int] = None,
+    date_to: Optional[int] = None,
+    tickers: Optional[Iterable[TickerInfo]] = None,
+    interval: int = GAP_EXPECTED_INTERVAL,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """
+    Находит пропуски тикеров и заполняет их историей цен Deribit
+
+    История всех тикеров запрашивается параллельно, тики сохраняются
+    пачками по GAP_BACKFILL_CHUNK.
+
+    :param db: Сессия БД
+    :param client: Открытый клиент Deribit
+    :param date_from: Начальная дата в UNIX timestamp (опционально)
+    :param date_to: Конечная дата в UNIX timestamp (опционально)
+    :param tickers: Тикеры (по умолчанию тикеры реестра, которые можно заполнить)
+    :param interval: Ожидаемый интервал между тиками в секундах
+    :param dry_run: Только найти пропуски и получить историю, не сохраняя тики
+    :return: Словарь {тикер: количество сохраненных (при dry_run - найденных) тиков}
+    """
+    resolution = chart_resolution(interval)
+    span = GAP_BACKFILL_CHUNK * resolution * 60
+
+    plans = []
+    for ticker in tickers if tickers is not None else fillable_tickers():
+        gaps = find_gaps(db, ticker.name, date_from, date_to, interval)
+        if not gaps:
+            continue
+        PRICE_GAPS_FOUND.labels(ticker.name).inc(len(gaps))
+        logger.info(f"Найдено пропусков {ticker.name}: {len(gaps)}, "
+                    f"недостает до {sum(gap.date_to - gap.date_from for gap in gaps) // interval + len(gaps)} тиков")
+        instrument = history_instrument(ticker)
+        if instrument is None:
+            logger.warning(f"У индекса {ticker.name} нет истории цен в API Deribit, пропуски не заполнены")
+            continue
+        plans.append((ticker.name, instrument, gaps))
+
+    histories = await asyncio.gather(*(
+        fetch_history(client, instrument, request_windows(gaps, span), resolution)
+        for _, instrument, gaps in plans
+    ))
+
+    filled: Dict[str, int] = {}
+    for (name, instrument, gaps), bars in zip(plans, histories):
+        ticks = [tick for gap in gaps for tick in gap_ticks(gap, bars, interval)]
+        if dry_run:
+            filled[name] = len(ticks)
+            continue
+        saved = 0
+        for start in range(0, len(ticks), GAP_BACKFILL_CHUNK):
+            saved += save_price_ticks(db, ticks[start:start + GAP_BACKFILL_CHUNK], publish=False)
+        PRICE_GAP_BACKFILLED_TICKS.labels(name).inc(saved)
+        logger.info(f"Пропуски {name} заполнены историей {instrument}: сохранено тиков {saved}")
+        filled[name] = saved
+    return filled
+
+
+@celery_app.task(name='deribit_task.gaps.backfill_price_gaps')
+def backfill_price_gaps():
+    """
+    Celery задача поиска и заполнения пропусков тиков за последние GAP_SCAN_LOOKBACK секунд
+
+    Проверяются только тикеры mark price; без них запуск пропускается.
+    """
+    db: Optional[Session] = None
+    try:
+        db = SessionLocal()
+        refresh_registry(db)
+        tickers = fillable_tickers()
+        if not tickers:
+            logger.info("В реестре нет тикеров mark price с историей цен, заполнение пропусков пропущено")
+            return
+        # Последние интервалы не проверяются: их тики могут быть еще не сохранены
+        date_to = int(time.time()) - 2 * GAP_EXPECTED_INTERVAL
+
+        worker_runtime.start()
+        worker_runtime.run(backfill_gaps(db, worker_runtime.client, date_to - GAP_SCAN_LOOKBACK, date_to, tickers))
+    except Exception as e:
+        logger.error(f"Ошибка в задаче backfill_price_gaps: {e}")
+    finally:
+        if db:
+            db.close()
+
+
+async def run_backfill(args: argparse.Namespace) -> Dict[str, int]:
+    """
+    Выполняет заполнение пропусков с параметрами командной строки
+    """
+    db = SessionLocal()
+    try:
+        refresh_registry(db)
+        tickers = None
+        if args.ticker:
+            ticker = ticker_registry.get(args.ticker)
+            if ticker is None:
+                raise SystemExit(f"Тикер {args.ticker} не поддерживается")
+            tickers = [ticker]
+        date_to = args.date_to or int(time.time()) - 2 * args.interval
+        date_from = args.date_from or date_to - GAP_SCAN_LOOKBACK
+        async with DeribitClient() as client:
+            return await backfill_gaps(db, client, date_from, date_to, tickers, args.interval, args.dry_run)
+    finally:
+        db.close()
+
+
+def main():
+    """
+    Точка входа командной строки
+    """
+    parser = argparse.ArgumentParser(description="Поиск и заполнение пропусков в ряду тиков")
+    parser.add_argument('--ticker', help="Тикер валюты (по умолчанию тикеры mark price реестра)")
+    parser.add_argument('--date-from', type=int, help="Начальная дата в UNIX timestamp "
+                                                      "(по умолчанию GAP_SCAN_LOOKBACK секунд до конечной)")
+    parser.add_argument('--date-to', type=int, help="Конечная дата в UNIX timestamp (по умолчанию текущее время)")
+    parser.add_argument('--interval', type=int, default=GAP_EXPECTED_INTERVAL,
+                        help="Ожидаемый интервал между тиками в секундах")
+    parser.add_argument('--dry-run', action='store_true', help="Не сохранять тики, только вывести их количество")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for name, count in asyncio.run(run_backfill(args)).items():
+        logger.info(f"{name}: {'найдено' if args.dry_run else 'сохранено'} тиков истории {count}")
+
+
+if __name__ == '__main__':
+    main()
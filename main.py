@@ -1,36 +1,171 @@
 """
 Главный файл приложения FastAPI
+
+Импорт модуля не обращается к БД и Redis: схема БД управляется миграциями
+Alembic, а подключения открываются в lifespan приложения. Процесс
+сообщает о готовности (/ready) только после прогрева пулов соединений и
+кэшей, поэтому балансировщик не отправляет запросы в холодный worker.
 """
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+import redis.asyncio as aioredis
+from fastapi import APIRouter, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import text
 
+from deribit_task import price_feed
 from deribit_task.api.routers import router
-from deribit_task.database import Base, engine
+from deribit_task.broadcast import price_broadcaster
+from deribit_task.cache import latest_price_cache
+from deribit_task.config import (
+    PRICE_FEED_ENABLED,
+    PRICE_FEED_REDIS_URL,
+    METRICS_ENABLED,
+    TICKER_REGISTRY_SOURCE,
+    STARTUP_WARMUP,
+    STARTUP_WARMUP_CONNECTIONS,
+    STARTUP_WARMUP_TIMEOUT,
+    READY_CHECK_TIMEOUT,
+)
+from deribit_task.crud import AsyncPriceRepository
+from deribit_task.database import AsyncSessionLocal, read_router
+from deribit_task.metrics import HTTP_REQUEST_DURATION, observe_tick
+from deribit_task.tickers import ticker_registry
 
-# Создаем таблицы в БД
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-# Создаем приложение FastAPI
-app = FastAPI(
-    title="Deribit Price API",
-    description="API для получения цен криптовалют с биржи Deribit",
-    version="1.0.0"
-)
 
-# Добавляем CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+async def warm_latest_prices():
+    """
+    Загружает последние цены всех тикеров реестра в кэш одним запросом
+    """
+    async with read_router.session() as db:
+        rows = await AsyncPriceRepository.get_latest_prices(db, [ticker.name for ticker in ticker_registry])
+    for row in rows:
+        latest_price_cache.update({'id': row.id, 'ticker': row.ticker, 'price': row.price, 'timestamp': row.timestamp})
+
+
+async def load_ticker_registry():
+    """
+    Загружает реестр тикеров из таблицы tickers не дольше STARTUP_WARMUP_TIMEOUT секунд
+
+    Без реестра процесс не стартует: при ошибке или таймауте lifespan
+    завершается исключением, и процесс перезапускается оркестратором.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await asyncio.wait_for(db.run_sync(ticker_registry.load_from_db), timeout=STARTUP_WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"Реестр тикеров не загружен из БД за {STARTUP_WARMUP_TIMEOUT} с")
+        raise
+
+
+async def warm_up():
+    """
+    Прогревает пулы соединений чтения и кэш последних цен
+
+    Прогрев целиком ограничен STARTUP_WARMUP_TIMEOUT секундами; при ошибке
+    или таймауте процесс все равно стартует, а первые запросы открывают
+    соединения сами.
+    """
+    async def steps():
+        await read_router.warm_up(STARTUP_WARMUP_CONNECTIONS)
+        await warm_latest_prices()
+
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(steps(), timeout=STARTUP_WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Прогрев не завершился за {STARTUP_WARMUP_TIMEOUT} с")
+    except Exception as e:
+        logger.warning(f"Ошибка прогрева: {e}")
+    else:
+        logger.info(f"Прогрев завершен за {time.perf_counter() - started:.2f} с")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Загружает реестр тикеров, прогревает пулы и кэши и подписывает кэш
+    последних цен, метрики и live поток цен на канал новых цен на время
+    работы приложения
+    """
+    app.state.ready = False
+    if TICKER_REGISTRY_SOURCE == 'db':
+        await load_ticker_registry()
+    price_feed.add_handler(latest_price_cache.update)
+    price_broadcaster.start()
+    if METRICS_ENABLED:
+        price_feed.add_handler(observe_tick)
+    listener = price_feed.PriceFeedListener() if PRICE_FEED_ENABLED else None
+    if listener:
+        listener.start()
+    if STARTUP_WARMUP:
+        await warm_up()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        # Завершающийся процесс перестает принимать новые запросы от балансировщика
+        app.state.ready = False
+        if listener:
+            listener.stop()
+        price_feed.remove_handler(observe_tick)
+        price_broadcaster.stop()
+        price_feed.remove_handler(latest_price_cache.update)
+
+
+async def record_request_duration(request: Request, call_next):
+    """
+    Записывает время обработки запроса в гистограмму по шаблону маршрута
+    """
+    if not METRICS_ENABLED:
+        return await call_next(request)
+
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Шаблон маршрута вместо пути, чтобы не плодить метки для каждого URL
+        route = request.scope.get('route')
+        HTTP_REQUEST_DURATION.labels(
+            request.method,
+            route.path if route is not None else 'unmatched',
+            status
+        ).observe(time.perf_counter() - started)
+
+
+async def check_database():
+    """
+    Проверяет доступность БД для чтения запросом SELECT 1
+    """
+    async with read_router.session() as db:
+        await db.execute(text("SELECT 1"))
+
+
+async def check_redis():
+    """
+    Проверяет доступность Redis канала новых цен командой PING
+    """
+    client = aioredis.from_url(PRICE_FEED_REDIS_URL, socket_connect_timeout=READY_CHECK_TIMEOUT)
+    try:
+        await client.ping()
+    finally:
+        await client.aclose()
 
-# Подключаем роутеры
-app.include_router(router)
 
+service_router = APIRouter()
 
-@app.get("/")
+
+@service_router.get("/")
 def root():
     """
     Корневой endpoint
@@ -42,9 +177,85 @@ def root():
     }
 
 
-@app.get("/health")
+@service_router.get("/health")
 def health_check():
     """
-    Health check endpoint
+    Liveness probe: процесс запущен и обрабатывает запросы
     """
     return {"status": "ok"}
+
+
+@service_router.get("/ready")
+async def readiness_check(request: Request):
+    """
+    Readiness probe: процесс прогрет, БД и Redis отвечают за READY_CHECK_TIMEOUT секунд
+
+    Возвращает 503 с результатами проверок, если процесс не готов
+    принимать запросы.
+    """
+    if not getattr(request.app.state, 'ready', False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+
+    checks = {'database': check_database()}
+    if PRICE_FEED_ENABLED:
+        checks['redis'] = check_redis()
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check, timeout=READY_CHECK_TIMEOUT) for check in checks.values()),
+        return_exceptions=True
+    )
+
+    statuses = {}
+    for name, result in zip(checks, results):
+        if isinstance(result, asyncio.TimeoutError):
+            statuses[name] = 'timeout'
+        elif isinstance(result, Exception):
+            logger.warning(f"Проверка готовности {name} не пройдена: {result}")
+            statuses[name] = 'error'
+        else:
+            statuses[name] = 'ok'
+    ready = all(status == 'ok' for status in statuses.values())
+    return JSONResponse(
+        {"status": "ready" if ready else "unavailable", "checks": statuses},
+        status_code=200 if ready else 503
+    )
+
+
+@service_router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Метрики Prometheus
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def create_app() -> FastAPI:
+    """
+    Создает приложение FastAPI без обращений к БД и Redis
+
+    :return: Приложение; подключения открываются в его lifespan
+    """
+    app = FastAPI(
+        title="Deribit Price API",
+        description="API для получения цен криптовалют с биржи Deribit",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    app.state.ready = False
+
+    # Добавляем CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(record_request_duration)
+
+    # Подключаем роутеры
+    app.include_router(router)
+    app.include_router(service_router)
+    return app
+
+
+app = create_app()
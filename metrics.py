@@ -0,0 +1,307 @@
+"""
+Метрики Prometheus для API, Celery и клиента Deribit
+
+API отдает метрики на /metrics, Celery worker - на отдельном HTTP порту
+CELERY_METRICS_PORT. При запуске worker с prefork пулом метрики дочерних
+процессов собираются через multiprocess режим prometheus_client
+(переменная окружения PROMETHEUS_MULTIPROC_DIR).
+"""
+import functools
+import inspect
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional, Union
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Бакеты для быстрых операций с БД (в секундах)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'deribit_http_request_duration_seconds',
+    "Время обработки HTTP запроса API",
+    ['method', 'route', 'status']
+)
+
+DB_QUERY_DURATION = Histogram(
+    'deribit_db_query_duration_seconds',
+    "Время выполнения запроса методом репозитория цен",
+    ['repository', 'method'],
+    buckets=DB_BUCKETS
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'deribit_db_pool_checkout_wait_seconds',
+    "Время получения соединения из пула",
+    ['engine'],
+    buckets=DB_BUCKETS
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    'deribit_db_pool_checked_out',
+    "Количество соединений, выданных из пула",
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_CAPACITY = Gauge(
+    'deribit_db_pool_capacity',
+    "Максимальное количество соединений пула (pool_size + max_overflow)",
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+
+DB_REPLICA_UNAVAILABLE = Counter(
+    'deribit_db_replica_unavailable_total',
+    "Количество пропусков реплики при выборе соединения для чтения (ошибка подключения или отставание)",
+    ['replica', 'reason']
+)
+
+DERIBIT_REQUEST_DURATION = Histogram(
+    'deribit_client_request_duration_seconds',
+    "Время запроса к API Deribit",
+    ['index_name']
+)
+
+DERIBIT_REQUEST_ERRORS = Counter(
+    'deribit_client_request_errors_total',
+    "Количество неуспешных запросов к API Deribit",
+    ['index_name', 'reason']
+)
+
+DERIBIT_REQUEST_RETRIES = Counter(
+    'deribit_client_request_retries_total',
+    "Количество повторных запросов к API Deribit",
+    ['index_name', 'reason']
+)
+
+DERIBIT_CIRCUIT_OPEN = Gauge(
+    'deribit_client_circuit_open',
+    "Circuit breaker клиента Deribit разомкнут (1) или замкнут (0)",
+    multiprocess_mode='livemax'
+)
+
+SAMPLER_LATENESS = Histogram(
+    'deribit_sampler_lateness_seconds',
+    "Опоздание запуска опроса сэмплера относительно границы интервала",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+SAMPLER_MISSED_SAMPLES = Counter(
+    'deribit_sampler_missed_samples_total',
+    "Количество пропущенных сэмплов по тикерам",
+    ['ticker', 'reason']
+)
+
+PRICE_GAPS_FOUND = Counter(
+    'deribit_price_gaps_found_total',
+    "Количество найденных пропусков в ряду тиков",
+    ['ticker']
+)
+
+PRICE_GAP_BACKFILLED_TICKS = Counter(
+    'deribit_price_gap_backfilled_ticks_total',
+    "Количество тиков, сохраненных из истории Deribit для заполнения пропусков",
+    ['ticker']
+)
+
+LIVE_STREAM_CLIENTS = Gauge(
+    'deribit_live_stream_clients',
+    "Количество клиентов live потока цен",
+    multiprocess_mode='livesum'
+)
+
+LIVE_STREAM_DROPPED_CLIENTS = Counter(
+    'deribit_live_stream_dropped_clients_total',
+    "Количество клиентов live потока цен, отключенных из-за переполнения очереди"
+)
+
+LAST_TICK_TIMESTAMP = Gauge(
+    'deribit_last_tick_timestamp_seconds',
+    "Время последнего сохраненного тика (UNIX timestamp)",
+    ['ticker'],
+    multiprocess_mode='max'
+)
+
+_last_ticks: Dict[str, int] = {}
+
+
+class IngestionLagCollector:
+    """
+    Вычисляет отставание последнего тика от текущего времени в момент сбора метрик
+
+    Учитываются тики, полученные текущим процессом через канал новых цен.
+    В multiprocess режиме метрика не агрегируется, отставание считается
+    по deribit_last_tick_timestamp_seconds: time() - deribit_last_tick_timestamp_seconds.
+    """
+
+    def collect(self):
+        """
+        Возвращает метрику deribit_ingestion_lag_seconds по тикерам
+        """
+        lag = GaugeMetricFamily(
+            'deribit_ingestion_lag_seconds',
+            "Отставание последнего тика от текущего времени",
+            labels=['ticker']
+        )
+        now = time.time()
+        for ticker, timestamp in list(_last_ticks.items()):
+            lag.add_metric([ticker], now - timestamp)
+        yield lag
+
+
+REGISTRY.register(IngestionLagCollector())
+
+
+def observe_tick(tick: Dict):
+    """
+    Обработчик канала новых цен: запоминает время последнего тика по тикеру
+
+    :param tick: Словарь с ключами ticker, price, timestamp
+    """
+    ticker, timestamp = tick['ticker'], tick['timestamp']
+    if timestamp < _last_ticks.get(ticker, 0):
+        return
+    _last_ticks[ticker] = timestamp
+    LAST_TICK_TIMESTAMP.labels(ticker).set(timestamp)
+
+
+def timed_query(func: Callable) -> Callable:
+    """
+    Декоратор метода репозитория цен: записывает время выполнения в DB_QUERY_DURATION
+
+    Для итераторов учитывается только время получения строк из БД,
+    без времени обработки строк вызывающим кодом.
+    """
+    repository, method = func.__qualname__.split('.')[-2:]
+    histogram = DB_QUERY_DURATION.labels(repository, method)
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def async_gen_wrapper(*args, **kwargs):
+            rows = func(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        row = await rows.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - started
+                    yield row
+            finally:
+                await rows.aclose()
+                histogram.observe(elapsed)
+        return async_gen_wrapper
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def gen_wrapper(*args, **kwargs):
+            rows = func(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        row = next(rows)
+                    except StopIteration:
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - started
+                    yield row
+            finally:
+                rows.close()
+                histogram.observe(elapsed)
+        return gen_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
+
+
+def instrument_engine(engine: Union[Engine, AsyncEngine], name: str):
+    """
+    Подключает метрики пула соединений engine
+
+    Время ожидания соединения измеряется вокруг Engine.raw_connection(),
+    через который проходит каждое получение соединения из пула, поэтому
+    замер переживает пересоздание пула в engine.dispose().
+
+    :param engine: Синхронный или асинхронный engine SQLAlchemy
+    :param name: Имя engine в метках метрик
+    """
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if getattr(sync_engine, '_metrics_instrumented', False):
+        return
+    sync_engine._metrics_instrumented = True
+
+    wait = DB_POOL_CHECKOUT_WAIT.labels(name)
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    raw_connection = sync_engine.raw_connection
+
+    @functools.wraps(raw_connection)
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            wait.observe(time.perf_counter() - started)
+
+    sync_engine.raw_connection = timed_raw_connection
+    event.listen(sync_engine, 'checkout', lambda *args: checked_out.inc())
+    event.listen(sync_engine, 'checkin', lambda *args: checked_out.dec())
+
+    pool = sync_engine.pool
+    if hasattr(pool, 'size') and hasattr(pool, '_max_overflow'):
+        DB_POOL_CAPACITY.labels(name).set(pool.size() + max(pool._max_overflow, 0))
+
+
+def start_metrics_server(port: int, addr: str = '0.0.0.0'):
+    """
+    Запускает HTTP сервер метрик для процессов без API (Celery worker)
+
+    В multiprocess режиме отдаются агрегированные метрики всех процессов.
+
+    :param port: Порт HTTP сервера
+    :param addr: Адрес для прослушивания
+    """
+    registry: Optional[CollectorRegistry] = None
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        start_http_server(port, addr, registry=registry)
+    else:
+        start_http_server(port, addr)
+    logger.info(f"Сервер метрик запущен на порту {port}")
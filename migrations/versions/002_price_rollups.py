@@ -0,0 +1,38 @@
+"""Price rollup tables
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ['price_rollups_1m', 'price_rollups_1h', 'price_rollups_1d']
+
+
+def upgrade() -> None:
+    for table_name in ROLLUP_TABLES:
+        op.create_table(table_name,
+        sa.Column('ticker', sa.String(length=10), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('open', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('high', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('low', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('close', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('open_timestamp', sa.BigInteger(), nullable=False),
+        sa.Column('close_timestamp', sa.BigInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('ticker', 'bucket')
+        )
+
+
+def downgrade() -> None:
+    for table_name in reversed(ROLLUP_TABLES):
+        op.drop_table(table_name)
@@ -0,0 +1,125 @@
+"""Partition price_ticks by month
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+import time
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# На сколько месяцев вперед создаются партиции при миграции
+PREMAKE_MONTHS = 3
+
+REDUNDANT_INDEXES = ['ix_price_ticks_id', 'ix_price_ticks_ticker', 'ix_price_ticks_timestamp']
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Секционирование есть только в PostgreSQL, остальным БД достаточно убрать лишние индексы
+        for index_name in REDUNDANT_INDEXES:
+            op.drop_index(index_name, table_name='price_ticks')
+        return
+
+    # Старая таблица переименовывается, а ее первичный ключ и индексы
+    # освобождают имена для секционированной таблицы
+    op.execute("ALTER TABLE price_ticks RENAME TO price_ticks_legacy")
+    op.execute("ALTER TABLE price_ticks_legacy RENAME CONSTRAINT price_ticks_pkey TO price_ticks_legacy_pkey")
+    for index_name in REDUNDANT_INDEXES + ['idx_ticker_timestamp']:
+        op.execute(f"DROP INDEX {index_name}")
+
+    # Первичный ключ секционированной таблицы обязан включать ключ секционирования
+    op.execute("""
+        CREATE TABLE price_ticks (
+            id INTEGER NOT NULL DEFAULT nextval('price_ticks_id_seq'),
+            ticker VARCHAR(10) NOT NULL,
+            price NUMERIC(20, 8) NOT NULL,
+            timestamp BIGINT NOT NULL,
+            CONSTRAINT price_ticks_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE price_ticks_id_seq OWNED BY price_ticks.id")
+    op.create_index('idx_ticker_timestamp', 'price_ticks', ['ticker', 'timestamp'], unique=False)
+
+    now = int(time.time())
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM price_ticks_legacy")).scalar()
+    month = _month_of(min(oldest, now) if oldest is not None else now)
+    last = _add_months(_month_of(now), PREMAKE_MONTHS)
+    while month <= last:
+        date_from, date_to = _month_start(month), _month_start(_add_months(month, 1))
+        op.execute(
+            f"CREATE TABLE price_ticks_p{month[0]:04d}{month[1]:02d} PARTITION OF price_ticks "
+            f"FOR VALUES FROM ({date_from}) TO ({date_to})"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE price_ticks_default PARTITION OF price_ticks DEFAULT")
+
+    op.execute(
+        "INSERT INTO price_ticks (id, ticker, price, timestamp) "
+        "SELECT id, ticker, price, timestamp FROM price_ticks_legacy"
+    )
+    op.drop_table('price_ticks_legacy')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        _create_redundant_indexes()
+        return
+
+    op.execute("ALTER TABLE price_ticks RENAME TO price_ticks_partitioned")
+    op.execute("ALTER TABLE price_ticks_partitioned RENAME CONSTRAINT price_ticks_pkey TO price_ticks_partitioned_pkey")
+    op.execute("DROP INDEX idx_ticker_timestamp")
+
+    op.execute("""
+        CREATE TABLE price_ticks (
+            id INTEGER NOT NULL DEFAULT nextval('price_ticks_id_seq'),
+            ticker VARCHAR(10) NOT NULL,
+            price NUMERIC(20, 8) NOT NULL,
+            timestamp BIGINT NOT NULL,
+            CONSTRAINT price_ticks_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE price_ticks_id_seq OWNED BY price_ticks.id")
+    op.execute(
+        "INSERT INTO price_ticks (id, ticker, price, timestamp) "
+        "SELECT id, ticker, price, timestamp FROM price_ticks_partitioned"
+    )
+    # Удаление родительской таблицы удаляет и все ее партиции
+    op.drop_table('price_ticks_partitioned')
+
+    _create_redundant_indexes()
+    op.create_index('idx_ticker_timestamp', 'price_ticks', ['ticker', 'timestamp'], unique=False)
+
+
+def _create_redundant_indexes() -> None:
+    op.create_index(op.f('ix_price_ticks_id'), 'price_ticks', ['id'], unique=False)
+    op.create_index(op.f('ix_price_ticks_ticker'), 'price_ticks', ['ticker'], unique=False)
+    op.create_index(op.f('ix_price_ticks_timestamp'), 'price_ticks', ['timestamp'], unique=False)
+
+
+# Вспомогательные функции месяцев повторяют deribit_task.partitions на момент миграции,
+# чтобы миграция не зависела от текущего кода приложения
+
+def _add_months(month, count):
+    index = month[0] * 12 + month[1] - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def _month_of(timestamp):
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return moment.year, moment.month
+
+
+def _month_start(month):
+    return int(datetime(month[0], month[1], 1, tzinfo=timezone.utc).timestamp())
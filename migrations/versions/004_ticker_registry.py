@@ -0,0 +1,45 @@
+"""Ticker registry
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-04-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+TICKER_TABLES = ['price_ticks', 'price_rollups_1m', 'price_rollups_1h', 'price_rollups_1d']
+
+
+def upgrade() -> None:
+    tickers = op.create_table('tickers',
+    sa.Column('id', sa.SmallInteger(), sa.Identity(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False, server_default='index'),
+    sa.Column('enabled', sa.Boolean(), nullable=False, server_default=sa.true()),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.bulk_insert(tickers, [
+        {'name': 'BTC_USD', 'kind': 'index', 'enabled': True},
+        {'name': 'ETH_USD', 'kind': 'index', 'enabled': True},
+    ])
+
+    # Имена инструментов Deribit (например, BTC-27DEC24-100000-C) длиннее 10 символов.
+    # В PostgreSQL увеличение длины varchar не перезаписывает таблицу.
+    if op.get_bind().dialect.name == 'postgresql':
+        for table_name in TICKER_TABLES:
+            op.alter_column(table_name, 'ticker', type_=sa.String(length=64), existing_type=sa.String(length=10))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table_name in TICKER_TABLES:
+            op.alter_column(table_name, 'ticker', type_=sa.String(length=10), existing_type=sa.String(length=64))
+    op.drop_table('tickers')
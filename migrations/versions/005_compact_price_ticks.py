@@ -0,0 +1,96 @@
+"""Compact price ticks storage
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-05-01 00:00:00.000000
+
+"""
+import re
+import time
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+TABLE = 'price_ticks_compact'
+
+# На сколько месяцев вперед создаются партиции при миграции
+PREMAKE_MONTHS = 3
+
+# Месячные партиции price_ticks (миграция 003): price_ticks_pYYYYMM
+PARTITION_NAME_RE = re.compile(r'price_ticks_p(\d{4})(\d{2})')
+
+LIST_PARTITIONS_SQL = """
+    SELECT child.relname FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'price_ticks'
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.create_table(TABLE,
+        sa.Column('timestamp', sa.BigInteger(), nullable=False),
+        sa.Column('price', sa.BigInteger(), nullable=False),
+        sa.Column('ticker_id', sa.SmallInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['ticker_id'], ['tickers.id']),
+        sa.PrimaryKeyConstraint('ticker_id', 'timestamp')
+        )
+        return
+
+    # Колонки BIGINT идут перед SMALLINT, чтобы в строке не было выравнивающих байтов
+    op.execute(f"""
+        CREATE TABLE {TABLE} (
+            timestamp BIGINT NOT NULL,
+            price BIGINT NOT NULL,
+            ticker_id SMALLINT NOT NULL REFERENCES tickers (id),
+            CONSTRAINT {TABLE}_pkey PRIMARY KEY (ticker_id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+
+    # Партиции повторяют месяцы price_ticks, чтобы перенос истории не попадал в партицию по умолчанию
+    now = int(time.time())
+    months = {
+        (int(match.group(1)), int(match.group(2)))
+        for match in (PARTITION_NAME_RE.fullmatch(name) for name, in bind.execute(sa.text(LIST_PARTITIONS_SQL)))
+        if match is not None
+    }
+    month = min(months | {_month_of(now)})
+    last = max(months | {_add_months(_month_of(now), PREMAKE_MONTHS)})
+    while month <= last:
+        date_from, date_to = _month_start(month), _month_start(_add_months(month, 1))
+        op.execute(
+            f"CREATE TABLE {TABLE}_p{month[0]:04d}{month[1]:02d} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ({date_from}) TO ({date_to})"
+        )
+        month = _add_months(month, 1)
+    op.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+
+def downgrade() -> None:
+    # Удаление родительской таблицы удаляет и все ее партиции
+    op.drop_table(TABLE)
+
+
+# Месяцы партиций считаются так же, как в миграции 003
+
+def _add_months(month, count):
+    index = month[0] * 12 + month[1] - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def _month_of(timestamp):
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return moment.year, moment.month
+
+
+def _month_start(month):
+    return int(datetime(month[0], month[1], 1, tzinfo=timezone.utc).timestamp())
@@ -0,0 +1,112 @@
+"""Unique (ticker, timestamp) for price ticks
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-06-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = 'uq_price_ticks_ticker_timestamp'
+
+# Периоды с дубликатами по тикерам: свечи этих периодов учли дубликаты и пересобираются
+DUPLICATE_RANGES_SQL = """
+    SELECT ticker, min(timestamp), max(timestamp) FROM (
+        SELECT ticker, timestamp FROM price_ticks GROUP BY ticker, timestamp HAVING count(*) > 1
+    ) AS duplicates
+    GROUP BY ticker
+"""
+
+# Таблицы свечей (миграция 002) и их интервалы в секундах
+ROLLUP_INTERVALS = {
+    'price_rollups_1m': 60,
+    'price_rollups_1h': 60 * 60,
+    'price_rollups_1d': 24 * 60 * 60,
+}
+
+DELETE_ROLLUPS_SQL = """
+    DELETE FROM {table} WHERE ticker = :ticker AND bucket >= :bucket_from AND bucket <= :bucket_to
+"""
+
+# Свечи из сырых тиков: открытие и закрытие - первый и последний тик свечи по (timestamp, id)
+INSERT_ROLLUPS_SQL = """
+    INSERT INTO {table} (ticker, bucket, open, high, low, close, open_timestamp, close_timestamp, count)
+    SELECT ticker, bucket, min(open), max(price), min(price), min(close), min(timestamp), max(timestamp), count(*)
+    FROM (
+        SELECT ticker, timestamp - timestamp % {interval} AS bucket, price, timestamp,
+               first_value(price) OVER (
+                   PARTITION BY ticker, timestamp - timestamp % {interval} ORDER BY timestamp, id
+               ) AS open,
+               first_value(price) OVER (
+                   PARTITION BY ticker, timestamp - timestamp % {interval} ORDER BY timestamp DESC, id DESC
+               ) AS close
+        FROM price_ticks
+        WHERE ticker = :ticker AND timestamp >= :bucket_from AND timestamp < :bucket_to + {interval}
+    ) AS ticks
+    GROUP BY ticker, bucket
+"""
+
+# Из дубликатов остается первый записанный тик (наименьший id), как и при INSERT ... ON CONFLICT DO NOTHING
+DEDUP_SQL = {
+    'postgresql': """
+        DELETE FROM price_ticks AS duplicate USING price_ticks AS original
+        WHERE duplicate.ticker = original.ticker
+          AND duplicate.timestamp = original.timestamp
+          AND duplicate.id > original.id
+    """,
+    'default': """
+        DELETE FROM price_ticks
+        WHERE id NOT IN (SELECT min(id) FROM price_ticks GROUP BY ticker, timestamp)
+    """,
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    ranges = bind.execute(sa.text(DUPLICATE_RANGES_SQL)).all()
+    if ranges:
+        bind.execute(sa.text(DEDUP_SQL.get(dialect, DEDUP_SQL['default'])))
+        for ticker, date_from, date_to in ranges:
+            _rebuild_rollups(bind, ticker, date_from, date_to)
+
+    # Уникальный индекс заменяет неуникальный idx_ticker_timestamp с теми же колонками.
+    # В PostgreSQL ограничение на секционированной таблице создается и во всех партициях.
+    if dialect == 'postgresql':
+        op.drop_index('idx_ticker_timestamp', table_name='price_ticks')
+        op.create_unique_constraint(CONSTRAINT, 'price_ticks', ['ticker', 'timestamp'])
+    else:
+        with op.batch_alter_table('price_ticks') as batch_op:
+            batch_op.drop_index('idx_ticker_timestamp')
+            batch_op.create_unique_constraint(CONSTRAINT, ['ticker', 'timestamp'])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint(CONSTRAINT, 'price_ticks', type_='unique')
+        op.create_index('idx_ticker_timestamp', 'price_ticks', ['ticker', 'timestamp'], unique=False)
+    else:
+        with op.batch_alter_table('price_ticks') as batch_op:
+            batch_op.drop_constraint(CONSTRAINT, type_='unique')
+            batch_op.create_index('idx_ticker_timestamp', ['ticker', 'timestamp'], unique=False)
+
+
+def _rebuild_rollups(bind, ticker, date_from, date_to):
+    # Пересборка повторяет deribit_task.rollups.rebuild_rollups на момент миграции,
+    # но всегда читает price_ticks, независимо от текущих настроек приложения
+    for table, interval in ROLLUP_INTERVALS.items():
+        params = {
+            'ticker': ticker,
+            'bucket_from': date_from - date_from % interval,
+            'bucket_to': date_to - date_to % interval,
+        }
+        bind.execute(sa.text(DELETE_ROLLUPS_SQL.format(table=table)), params)
+        bind.execute(sa.text(INSERT_ROLLUPS_SQL.format(table=table, interval=interval)), params)
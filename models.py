@@ -1,7 +1,9 @@
 """
 Модели базы данных для хранения цен криптовалют
 """
-from sqlalchemy import Column, Integer, String, Numeric, BigInteger, Index
+from decimal import Decimal
+
+from sqlalchemy import Column, Integer, SmallInteger, String, Numeric, BigInteger, Boolean, ForeignKey, PrimaryKeyConstraint, UniqueConstraint, cast, literal, select
 from sqlalchemy.sql import func
 
 from deribit_task.database import Base
@@ -10,18 +12,142 @@ from deribit_task.database import Base
 class PriceTick(Base):
     """
     Модель для хранения тиков цен криптовалют
+    
+    В PostgreSQL таблица секционирована по месяцам timestamp (миграция 003)
+    и ее первичный ключ - (id, timestamp); id остается уникальным за счет
+    общей последовательности. На тикер хранится не более одного тика
+    в секунду (миграция 006).
     """
     __tablename__ = 'price_ticks'
 
-    id = Column(Integer, primary_key=True, index=True)
-    ticker = Column(String(10), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    ticker = Column(String(64), nullable=False)
     price = Column(Numeric(precision=20, scale=8), nullable=False)
-    timestamp = Column(BigInteger, nullable=False, index=True)
+    timestamp = Column(BigInteger, nullable=False)
 
-    # Индекс для быстрого поиска по тикеру и времени
+    # Уникальный ключ исключает дубликаты тиков и обслуживает поиск по тикеру и времени
     __table_args__ = (
-        Index('idx_ticker_timestamp', 'ticker', 'timestamp'),
+        UniqueConstraint('ticker', 'timestamp', name='uq_price_ticks_ticker_timestamp'),
     )
 
     def __repr__(self):
         return f"<PriceTick(ticker={self.ticker}, price={self.price}, timestamp={self.timestamp})>"
+
+
+class Ticker(Base):
+    """
+    Реестр тикеров: индексы Deribit и инструменты, по которым сохраняется mark price
+    
+    Компактный smallint id используется для ссылок на тикер вместо его имени.
+    """
+    __tablename__ = 'tickers'
+
+    # SQLite автоинкрементирует только INTEGER PRIMARY KEY
+    id = Column(SmallInteger().with_variant(Integer, 'sqlite'), primary_key=True)
+    name = Column(String(64), nullable=False, unique=True)
+    kind = Column(String(16), nullable=False, default='index')
+    enabled = Column(Boolean, nullable=False, default=True)
+
+    def __repr__(self):
+        return f"<Ticker(id={self.id}, name={self.name}, kind={self.kind})>"
+
+
+# Цена в компактной схеме хранится целым числом долей 1e-8
+PRICE_SCALE = 10 ** 8
+
+# Синтетический id тика компактной схемы: timestamp * COMPACT_ID_FACTOR + ticker_id
+COMPACT_ID_FACTOR = 1 << 16
+
+
+class PriceTickCompact(Base):
+    """
+    Компактная модель тиков: цена - BIGINT с фиксированной точкой (PRICE_SCALE),
+    тикер - smallint ссылка на tickers, первичный ключ - (ticker_id, timestamp)
+    
+    Колонки BIGINT идут перед SMALLINT, чтобы строка не содержала
+    выравнивающих байтов. На один тикер хранится не более одного тика
+    в секунду. В PostgreSQL таблица секционирована по месяцам timestamp
+    (миграция 005).
+    """
+    __tablename__ = 'price_ticks_compact'
+
+    timestamp = Column(BigInteger, nullable=False)
+    price = Column(BigInteger, nullable=False)
+    ticker_id = Column(SmallInteger, ForeignKey('tickers.id'), nullable=False)
+
+    # Первичный ключ заменяет индекс (ticker, timestamp) и суррогатный id
+    __table_args__ = (
+        PrimaryKeyConstraint('ticker_id', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f"<PriceTickCompact(ticker_id={self.ticker_id}, price={self.price}, timestamp={self.timestamp})>"
+
+
+def compact_ticks_view():
+    """
+    Подзапрос к price_ticks_compact с колонками price_ticks: id, ticker, price, timestamp
+
+    Цена переводится в Numeric(20, 8), имя тикера берется из tickers,
+    id - синтетический (timestamp * COMPACT_ID_FACTOR + ticker_id).
+    """
+    return select(
+        (PriceTickCompact.timestamp * COMPACT_ID_FACTOR + PriceTickCompact.ticker_id).label('id'),
+        Ticker.name.label('ticker'),
+        cast(
+            PriceTickCompact.price * literal(Decimal(1).scaleb(-8), Numeric(20, 8)),
+            Numeric(precision=20, scale=8)
+        ).label('price'),
+        PriceTickCompact.timestamp.label('timestamp'),
+    ).where(Ticker.id == PriceTickCompact.ticker_id).subquery('price_ticks_compact_view')
+
+
+class PriceRollupMixin:
+    """
+    Общие колонки таблиц предагрегированных свечей
+    
+    Строка - свеча по тикеру за интервал, начинающийся в bucket
+    (UNIX timestamp, кратный размеру интервала interval в секундах).
+    Время тиков открытия и закрытия хранится для инкрементального
+    обновления свечи.
+    """
+    ticker = Column(String(64), primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    open = Column(Numeric(precision=20, scale=8), nullable=False)
+    high = Column(Numeric(precision=20, scale=8), nullable=False)
+    low = Column(Numeric(precision=20, scale=8), nullable=False)
+    close = Column(Numeric(precision=20, scale=8), nullable=False)
+    open_timestamp = Column(BigInteger, nullable=False)
+    close_timestamp = Column(BigInteger, nullable=False)
+    count = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<{type(self).__name__}(ticker={self.ticker}, bucket={self.bucket}, close={self.close})>"
+
+
+class PriceRollup1m(PriceRollupMixin, Base):
+    """
+    Минутные свечи
+    """
+    __tablename__ = 'price_rollups_1m'
+    interval = 60
+
+
+class PriceRollup1h(PriceRollupMixin, Base):
+    """
+    Часовые свечи
+    """
+    __tablename__ = 'price_rollups_1h'
+    interval = 60 * 60
+
+
+class PriceRollup1d(PriceRollupMixin, Base):
+    """
+    Дневные свечи
+    """
+    __tablename__ = 'price_rollups_1d'
+    interval = 24 * 60 * 60
+
+
+# Таблицы свечей от мелкого интервала к крупному
+ROLLUP_MODELS = [PriceRollup1m, PriceRollup1h, PriceRollup1d]
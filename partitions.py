@@ -0,0 +1,236 @@
+"""
+Обслуживание месячных партиций таблиц тиков (PostgreSQL)
+
+Таблицы price_ticks (миграция 003) и price_ticks_compact (миграция 005)
+секционированы по диапазону timestamp: партиция {таблица}_pYYYYMM хранит
+тики за календарный месяц UTC, партиция {таблица}_default - тики вне
+созданных диапазонов.
+Задача обслуживания заранее создает партиции на будущие месяцы
+и отключает (или удаляет) партиции старше срока хранения.
+
+Ручной запуск: python -m deribit_task.partitions
+"""
+import argparse
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from deribit_task.config import (
+    PARTITION_PREMAKE_MONTHS,
+    PARTITION_RETENTION_MONTHS,
+    PARTITION_DROP_EXPIRED,
+)
+from deribit_task.models import PriceTick, PriceTickCompact
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = PriceTick.__tablename__
+PARTITIONED_TABLES = [PARENT_TABLE, PriceTickCompact.__tablename__]
+PARTITION_SUFFIX_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+# Месяц партиции: (год, номер месяца)
+Month = Tuple[int, int]
+
+
+def add_months(month: Month, count: int) -> Month:
+    """
+    Сдвигает месяц на count месяцев вперед (или назад при отрицательном count)
+    """
+    index = month[0] * 12 + month[1] - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def month_of(timestamp: int) -> Month:
+    """
+    Возвращает месяц UTC, в который попадает UNIX timestamp
+    """
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return moment.year, moment.month
+
+
+def partition_name(month: Month, parent: str = PARENT_TABLE) -> str:
+    """
+    Возвращает имя партиции месяца таблицы parent
+    """
+    return f"{parent}_p{month[0]:04d}{month[1]:02d}"
+
+
+def partition_bounds(month: Month) -> Tuple[int, int]:
+    """
+    Возвращает границы партиции месяца в UNIX timestamp: [начало месяца, начало следующего)
+    """
+    def start(value: Month) -> int:
+        return int(datetime(value[0], value[1], 1, tzinfo=timezone.utc).timestamp())
+
+    return start(month), start(add_months(month, 1))
+
+
+def parse_partition_name(name: str, parent: str = PARENT_TABLE) -> Optional[Month]:
+    """
+    Извлекает месяц из имени партиции таблицы parent
+
+    :return: Месяц или None, если имя не является именем месячной партиции
+    """
+    if not name.startswith(parent):
+        return None
+    match = PARTITION_SUFFIX_RE.fullmatch(name[len(parent):])
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def plan_partitions(
+    existing: Iterable[Month],
+    now: int,
+    premake_months: int,
+    retention_months: int
+) -> Tuple[List[Month], List[Month]]:
+    """
+    Определяет, какие партиции нужно создать и какие устарели
+
+    :param existing: Месяцы существующих партиций
+    :param now: Текущее время в UNIX timestamp
+    :param premake_months: На сколько месяцев вперед создавать партиции
+    :param retention_months: Срок хранения в месяцах, включая текущий (0 - хранить бессрочно)
+    :return: Месяцы для создания и месяцы устаревших партиций
+    """
+    existing = set(existing)
+    current = month_of(now)
+    to_create = [
+        month for month in (add_months(current, offset) for offset in range(premake_months + 1))
+        if month not in existing
+    ]
+
+    to_expire = []
+    if retention_months > 0:
+        oldest_kept = add_months(current, -(retention_months - 1))
+        to_expire = sorted(month for month in existing if month < oldest_kept)
+    return to_create, to_expire
+
+
+def is_partitioned(connection: Connection, parent: str) -> bool:
+    """
+    Проверяет, что таблица parent существует и секционирована
+    """
+    return connection.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table "
+            "JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+            "WHERE pg_class.relname = :parent"
+        ),
+        {'parent': parent}
+    ).first() is not None
+
+
+def list_partitions(connection: Connection, parent: str = PARENT_TABLE) -> Set[Month]:
+    """
+    Получает месяцы партиций, подключенных к таблице parent
+    """
+    rows = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :parent"
+        ),
+        {'parent': parent}
+    )
+    return {month for month in (parse_partition_name(name, parent) for name, in rows) if month is not None}
+
+
+def create_partition(connection: Connection, month: Month, parent: str = PARENT_TABLE):
+    """
+    Создает партицию месяца таблицы parent, если ее еще нет
+    """
+    name = partition_name(month, parent)
+    date_from, date_to = partition_bounds(month)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} "
+        f"FOR VALUES FROM ({date_from}) TO ({date_to})"
+    ))
+    logger.info(f"Создана партиция {name} [{date_from}, {date_to})")
+
+
+def expire_partition(connection: Connection, month: Month, drop: bool, parent: str = PARENT_TABLE):
+    """
+    Отключает партицию месяца от таблицы parent и при drop=True удаляет ее
+    """
+    name = partition_name(month, parent)
+    connection.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+    if drop:
+        connection.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Партиция {name} удалена по сроку хранения")
+    else:
+        logger.info(f"Партиция {name} отключена по сроку хранения")
+
+
+def maintain_partitions(
+    connection: Connection,
+    now: int,
+    premake_months: int,
+    retention_months: int,
+    drop_expired: bool
+) -> Dict[str, List[str]]:
+    """
+    Создает партиции на будущие месяцы и отключает устаревшие во всех
+    секционированных таблицах тиков
+
+    Выполняется в текущей транзакции connection, фиксацию выполняет
+    вызывающий код. Для других СУБД ничего не делает.
+
+    :param connection: Соединение с БД
+    :param now: Текущее время в UNIX timestamp
+    :param premake_months: На сколько месяцев вперед создавать партиции
+    :param retention_months: Срок хранения в месяцах (0 - хранить бессрочно)
+    :param drop_expired: Удалять устаревшие партиции, а не только отключать
+    :return: Имена созданных и устаревших партиций
+    """
+    if connection.dialect.name != 'postgresql':
+        logger.info(f"Секционирование не поддерживается для {connection.dialect.name}, пропуск")
+        return {'created': [], 'expired': []}
+
+    result = {'created': [], 'expired': []}
+    for parent in PARTITIONED_TABLES:
+        if not is_partitioned(connection, parent):
+            continue
+        to_create, to_expire = plan_partitions(
+            list_partitions(connection, parent), now, premake_months, retention_months
+        )
+        for month in to_create:
+            create_partition(connection, month, parent)
+        for month in to_expire:
+            expire_partition(connection, month, drop_expired, parent)
+        result['created'] += [partition_name(month, parent) for month in to_create]
+        result['expired'] += [partition_name(month, parent) for month in to_expire]
+    return result
+
+
+def main():
+    """
+    Точка входа командной строки
+    """
+    from deribit_task.database import engine
+
+    parser = argparse.ArgumentParser(description="Обслуживание партиций таблиц тиков")
+    parser.add_argument('--premake-months', type=int, default=PARTITION_PREMAKE_MONTHS,
+                        help="На сколько месяцев вперед создавать партиции")
+    parser.add_argument('--retention-months', type=int, default=PARTITION_RETENTION_MONTHS,
+                        help="Срок хранения в месяцах (0 - бессрочно)")
+    parser.add_argument('--drop-expired', action='store_true', default=PARTITION_DROP_EXPIRED,
+                        help="Удалять устаревшие партиции, а не только отключать")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with engine.begin() as connection:
+        maintain_partitions(
+            connection, int(time.time()), args.premake_months, args.retention_months, args.drop_expired
+        )
+
+
+if __name__ == '__main__':
+    main()
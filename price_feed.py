@@ -0,0 +1,188 @@
+"""
+Поток новых тиков цен между ингестером и API процессами
+
+Ингестер публикует сохраненные тики в канал Redis pub/sub (используется
+тот же Redis, что и брокер Celery), а API процессы подписываются на него
+и передают тики зарегистрированным обработчикам. Обработчики текущего
+процесса вызываются и напрямую, поэтому при недоступном Redis тики,
+сохраненные в этом же процессе, все равно доходят до подписчиков.
+"""
+import json
+import logging
+import threading
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+import redis
+
+from deribit_task.config import (
+    PRICE_FEED_ENABLED,
+    PRICE_FEED_REDIS_URL,
+    PRICE_FEED_CHANNEL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Обработчик тика: словарь с ключами ticker, price, timestamp и (опционально) id
+TickHandler = Callable[[Dict], None]
+
+_handlers: List[TickHandler] = []
+_redis_client: Optional[redis.Redis] = None
+
+
+def add_handler(handler: TickHandler):
+    """
+    Регистрирует обработчик новых тиков в текущем процессе
+
+    :param handler: Функция, принимающая словарь тика
+    """
+    if handler not in _handlers:
+        _handlers.append(handler)
+
+
+def remove_handler(handler: TickHandler):
+    """
+    Удаляет ранее зарегистрированный обработчик
+    """
+    if handler in _handlers:
+        _handlers.remove(handler)
+
+
+def dispatch(ticks: List[Dict]):
+    """
+    Передает тики всем обработчикам текущего процесса
+
+    :param ticks: Список словарей тиков
+    """
+    for tick in ticks:
+        for handler in list(_handlers):
+            try:
+                handler(tick)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика тика {tick.get('ticker')}: {e}")
+
+
+def _get_redis() -> redis.Redis:
+    """
+    Возвращает общий клиент Redis для публикации
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(PRICE_FEED_REDIS_URL)
+    return _redis_client
+
+
+def publish_ticks(ticks: List[Dict]):
+    """
+    Публикует сохраненные тики в канал цен и локальным обработчикам
+
+    Ошибки Redis только логируются: публикация не должна мешать записи.
+
+    :param ticks: Список словарей с ключами ticker, price, timestamp и (опционально) id
+    """
+    if not ticks:
+        return
+
+    dispatch(ticks)
+
+    if not PRICE_FEED_ENABLED:
+        return
+
+    message = json.dumps([_serialize(tick) for tick in ticks])
+    try:
+        _get_redis().publish(PRICE_FEED_CHANNEL, message)
+    except redis.RedisError as e:
+        logger.error(f"Ошибка публикации тиков в канал {PRICE_FEED_CHANNEL}: {e}")
+
+
+def _serialize(tick: Dict) -> Dict:
+    """
+    Готовит тик к передаче в JSON, сохраняя точность цены
+    """
+    return {**tick, 'price': str(tick['price'])}
+
+
+def _deserialize(tick: Dict) -> Dict:
+    """
+    Восстанавливает тик из JSON сообщения
+    """
+    return {**tick, 'price': Decimal(tick['price'])}
+
+
+class PriceFeedListener:
+    """
+    Фоновый поток, читающий канал цен из Redis и передающий тики обработчикам
+    """
+
+    def __init__(
+        self,
+        redis_url: str = PRICE_FEED_REDIS_URL,
+        channel: str = PRICE_FEED_CHANNEL,
+        reconnect_delay: float = 5.0,
+    ):
+        """
+        Инициализация слушателя
+
+        :param redis_url: URL Redis
+        :param channel: Имя канала pub/sub
+        :param reconnect_delay: Пауза перед повторной подпиской после ошибки в секундах
+        """
+        self.redis_url = redis_url
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Запускает поток слушателя
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='price-feed-listener', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Останавливает поток слушателя
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        """
+        Цикл подписки с переподключением при ошибках Redis
+        """
+        while not self._stopped.is_set():
+            pubsub = None
+            try:
+                client = redis.Redis.from_url(self.redis_url)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                logger.info(f"Подписка на канал цен {self.channel} оформлена")
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._handle(message['data'])
+            except redis.RedisError as e:
+                logger.error(f"Ошибка подписки на канал цен {self.channel}: {e}")
+                self._stopped.wait(self.reconnect_delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except redis.RedisError:
+                        pass
+
+    def _handle(self, data: bytes):
+        """
+        Разбирает сообщение канала и передает тики обработчикам
+        """
+        try:
+            ticks = [_deserialize(tick) for tick in json.loads(data)]
+        except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+            logger.error(f"Некорректное сообщение канала цен: {e}")
+            return
+        dispatch(ticks)
@@ -0,0 +1,163 @@
+"""
+Примитивы устойчивости запросов к внешним API: ограничитель частоты,
+circuit breaker и задержка повторов с джиттером
+
+Примитивы не используют блокировки asyncio и не привязаны к event loop,
+поэтому один экземпляр можно разделять между задачами процесса.
+"""
+import asyncio
+import random
+import time
+from typing import Callable
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Возвращает задержку перед повтором: экспоненциальный рост с джиттером
+
+    :param attempt: Номер повтора, начиная с 0
+    :param base_delay: Задержка первого повтора в секундах
+    :param max_delay: Максимальная задержка в секундах
+    :return: Случайная задержка из [delay / 2, delay], delay = min(base_delay * 2^attempt, max_delay)
+    """
+    delay = min(base_delay * 2 ** attempt, max_delay)
+    return random.uniform(delay / 2, delay)
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов по алгоритму token bucket
+
+    Корзина вмещает capacity токенов и пополняется со скоростью rate токенов
+    в секунду. Токены резервируются сразу при вызове acquire(), поэтому
+    одновременные запросы выстраиваются в очередь без блокировок. При
+    rate <= 0 ограничение отключено.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Инициализация ограничителя
+
+        :param rate: Скорость пополнения в токенах в секунду
+        :param capacity: Емкость корзины (допустимый всплеск запросов)
+        :param clock: Монотонные часы
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Резервирует токены и возвращает время ожидания до их появления
+
+        :param tokens: Стоимость запроса в токенах
+        :return: Задержка в секундах (0, если токены есть)
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill(self._clock())
+        self._tokens -= tokens
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, tokens: float = 1.0):
+        """
+        Ожидает появления токенов для запроса
+
+        :param tokens: Стоимость запроса в токенах
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, seconds: float):
+        """
+        Опустошает корзину так, чтобы следующие запросы ждали не менее seconds секунд
+
+        Используется при ответе API о превышении лимита.
+        """
+        if self.rate <= 0:
+            return
+        self._refill(self._clock())
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker: прекращает запросы к недоступному сервису
+
+    После failure_threshold неудачных запросов подряд breaker размыкается
+    (open) и запросы не выполняются. Через reset_timeout секунд пропускается
+    один пробный запрос (half-open): при успехе breaker замыкается, при
+    неудаче снова размыкается.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Инициализация breaker
+
+        :param failure_threshold: Количество неудач подряд для размыкания
+        :param reset_timeout: Время в секундах до пробного запроса
+        :param clock: Монотонные часы
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """
+        Текущее состояние: closed, open или half_open
+        """
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Проверяет, можно ли выполнить запрос; в состоянии half_open пропускает один пробный запрос
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        """
+        Учитывает успешный запрос: breaker замыкается
+        """
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """
+        Учитывает неудачный запрос: при достижении порога или неудаче пробного запроса breaker размыкается
+        """
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def release(self):
+        """
+        Освобождает пробный запрос, результат которого не говорит о доступности сервиса
+        """
+        self._probe_in_flight = False
@@ -0,0 +1,171 @@
+"""
+Инкрементальное обновление и пересборка таблиц предагрегированных свечей
+
+Пересборка из сырой истории: python -m deribit_task.rollups backfill
+"""
+import argparse
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import case, delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from deribit_task.crud import PriceQueries
+from deribit_task.models import ROLLUP_MODELS
+
+logger = logging.getLogger(__name__)
+
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def aggregate_ticks(ticks: List[Dict], interval: int) -> List[Dict]:
+    """
+    Сворачивает пачку тиков в свечи по (ticker, bucket)
+
+    При равном времени тика более поздний в пачке считается закрытием,
+    более ранний - открытием.
+
+    :param ticks: Список словарей с ключами ticker, price, timestamp
+    :param interval: Размер свечи в секундах
+    :return: Список строк свечей для upsert
+    """
+    candles: Dict[Tuple[str, int], Dict] = {}
+    for tick in ticks:
+        price, timestamp = tick['price'], tick['timestamp']
+        key = (tick['ticker'], timestamp - timestamp % interval)
+        candle = candles.get(key)
+        if candle is None:
+            candles[key] = {
+                'ticker': key[0],
+                'bucket': key[1],
+                'open': price,
+                'high': price,
+                'low': price,
+                'close': price,
+                'open_timestamp': timestamp,
+                'close_timestamp': timestamp,
+                'count': 1,
+            }
+            continue
+
+        if timestamp < candle['open_timestamp']:
+            candle['open'], candle['open_timestamp'] = price, timestamp
+        if timestamp >= candle['close_timestamp']:
+            candle['close'], candle['close_timestamp'] = price, timestamp
+        candle['high'] = max(candle['high'], price)
+        candle['low'] = min(candle['low'], price)
+        candle['count'] += 1
+    return list(candles.values())
+
+
+def upsert_rollups(db: Union[Connection, Session], ticks: List[Dict]):
+    """
+    Добавляет пачку тиков во все таблицы свечей через INSERT ... ON CONFLICT DO UPDATE
+
+    Выполняется в текущей транзакции db, фиксацию выполняет вызывающий код.
+
+    :param db: Соединение или сессия БД
+    :param ticks: Список словарей с ключами ticker, price, timestamp
+    """
+    if not ticks:
+        return
+
+    dialect = db.get_bind().dialect.name if isinstance(db, Session) else db.dialect.name
+    upsert = UPSERT_DIALECTS.get(dialect)
+    if upsert is None:
+        raise NotImplementedError(f"Upsert свечей не поддерживается для {dialect}")
+
+    for model in ROLLUP_MODELS:
+        table = model.__table__
+        stmt = upsert(table).values(aggregate_ticks(ticks, model.interval))
+        new = stmt.excluded
+        is_earlier = new.open_timestamp < table.c.open_timestamp
+        is_later = new.close_timestamp >= table.c.close_timestamp
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.ticker, table.c.bucket],
+            set_={
+                'open': case((is_earlier, new.open), else_=table.c.open),
+                'open_timestamp': case((is_earlier, new.open_timestamp), else_=table.c.open_timestamp),
+                'high': case((new.high > table.c.high, new.high), else_=table.c.high),
+                'low': case((new.low < table.c.low, new.low), else_=table.c.low),
+                'close': case((is_later, new.close), else_=table.c.close),
+                'close_timestamp': case((is_later, new.close_timestamp), else_=table.c.close_timestamp),
+                'count': table.c.count + new.count,
+            }
+        )
+        db.execute(stmt)
+
+
+def rebuild_rollups(
+    db: Union[Connection, Session],
+    ticker: Optional[str] = None,
+    date_from: Optional[int] = None,
+    date_to: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Пересобирает свечи из сырых тиков за указанный период
+
+    Границы периода расширяются до целых свечей каждой таблицы, поэтому
+    свечи на краях пересчитываются полностью. Выполняется в текущей
+    транзакции db, фиксацию выполняет вызывающий код.
+
+    :param db: Соединение или сессия БД
+    :param ticker: Тикер валюты (опционально, по умолчанию все тикеры)
+    :param date_from: Начальная дата в UNIX timestamp (опционально)
+    :param date_to: Конечная дата в UNIX timestamp (опционально)
+    :return: Количество пересобранных свечей по таблицам
+    """
+    rebuilt = {}
+    for model in ROLLUP_MODELS:
+        table = model.__table__
+        bucket_from = date_from - date_from % model.interval if date_from else None
+        bucket_to = date_to - date_to % model.interval if date_to else None
+
+        cleanup = delete(table)
+        if ticker:
+            cleanup = cleanup.where(table.c.ticker == ticker)
+        if bucket_from is not None:
+            cleanup = cleanup.where(table.c.bucket >= bucket_from)
+        if bucket_to is not None:
+            cleanup = cleanup.where(table.c.bucket <= bucket_to)
+        db.execute(cleanup)
+
+        candles = PriceQueries.ohlc_candles(
+            model.interval,
+            ticker,
+            bucket_from,
+            bucket_to + model.interval - 1 if bucket_to is not None else None
+        ).subquery()
+        columns = [column.name for column in table.columns]
+        result = db.execute(insert(table).from_select(columns, select(*(candles.c[name] for name in columns))))
+        rebuilt[table.name] = result.rowcount
+        logger.info(f"Пересобрано свечей в {table.name}: {result.rowcount}")
+    return rebuilt
+
+
+def main():
+    """
+    Точка входа командной строки
+    """
+    from deribit_task.database import engine
+
+    parser = argparse.ArgumentParser(description="Обслуживание таблиц предагрегированных свечей")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    backfill = subparsers.add_parser('backfill', help="Пересобрать свечи из сырых тиков")
+    backfill.add_argument('--ticker', help="Тикер валюты (по умолчанию все)")
+    backfill.add_argument('--date-from', type=int, help="Начальная дата в UNIX timestamp")
+    backfill.add_argument('--date-to', type=int, help="Конечная дата в UNIX timestamp")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with engine.begin() as connection:
+        rebuild_rollups(connection, args.ticker, args.date_from, args.date_to)
+
+
+if __name__ == '__main__':
+    main()
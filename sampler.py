@@ -0,0 +1,179 @@
+"""
+Высокочастотный сэмплер цен с выравниванием опросов по границам интервала
+
+Опросы выполняются на границах интервала SAMPLER_INTERVAL секунд от UNIX
+эпохи (при интервале 5 секунд - в :00, :05, :10 ...). Момент следующего
+опроса каждый раз вычисляется по часам от границы, а не от окончания
+предыдущего опроса, поэтому задержки не накапливаются. Одновременно
+выполняется не больше одного опроса: если предыдущий не завершился
+к следующей границе, интервал пропускается. Пропущенные сэмплы
+учитываются в метрике deribit_sampler_missed_samples_total и в логе.
+
+Время тиков хранится в секундах, поэтому интервал - целое число секунд
+не меньше 1, а время тика по умолчанию - граница интервала опроса.
+
+Запуск: python -m deribit_task.sampler
+"""
+import asyncio
+import logging
+import signal
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from deribit_task.config import SAMPLER_INTERVAL
+from deribit_task.database import engine as default_engine
+from deribit_task.deribit_client import DeribitClient
+from deribit_task.metrics import SAMPLER_LATENESS, SAMPLER_MISSED_SAMPLES
+from deribit_task.tasks import fetch_ticks
+from deribit_task.tickers import refresh_registry, ticker_registry
+from deribit_task.write_buffer import PriceTickBuffer
+
+logger = logging.getLogger(__name__)
+
+# Обработчик полученных тиков: список словарей с ключами ticker, price, timestamp
+TicksHandler = Callable[[List[Dict]], Awaitable[None]]
+
+
+def next_boundary(now: float, interval: int) -> int:
+    """
+    Возвращает ближайшую после now границу интервала в UNIX timestamp
+    """
+    return (int(now) // interval + 1) * interval
+
+
+class PriceSampler:
+    """
+    Периодический опрос цен тикеров реестра на границах интервала
+    """
+
+    def __init__(
+        self,
+        client: DeribitClient,
+        on_ticks: TicksHandler,
+        interval: int = SAMPLER_INTERVAL,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Инициализация сэмплера
+
+        :param client: Открытый клиент Deribit
+        :param on_ticks: Корутина, получающая тики каждого опроса
+        :param interval: Интервал опроса в секундах
+        :param clock: Часы UNIX времени
+        """
+        if interval < 1:
+            # Время тиков хранится и отдается API в секундах
+            raise ValueError(f"Интервал сэмплера должен быть не меньше 1 секунды, получено {interval}")
+        self.client = client
+        self.on_ticks = on_ticks
+        self.interval = interval
+        self.samples = 0
+        self.missed = 0
+        self._clock = clock
+        self._stopped: Optional[asyncio.Event] = None
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def run(self):
+        """
+        Выполняет опросы до вызова stop()
+        """
+        self._stopped = asyncio.Event()
+        slot = next_boundary(self._clock(), self.interval)
+        logger.info(f"Сэмплер запущен: интервал {self.interval} с, первый опрос в {slot}")
+
+        while not self._stopped.is_set():
+            delay = slot - self._clock()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+
+            lateness = self._clock() - slot
+            SAMPLER_LATENESS.observe(max(lateness, 0.0))
+            overslept = int(lateness // self.interval)
+            if overslept > 0:
+                logger.warning(f"Опрос опоздал на {lateness * 1000:.0f} мс, пропущено интервалов: {overslept}")
+                self._record_missed(ticker_registry.names(), 'late', overslept)
+                slot += overslept * self.interval
+
+            if self._inflight is not None and not self._inflight.done():
+                logger.warning(f"Предыдущий опрос не завершился к {slot}, интервал пропущен")
+                self._record_missed(ticker_registry.names(), 'overrun')
+            else:
+                self._inflight = asyncio.create_task(self.sample(slot))
+            slot += self.interval
+
+        if self._inflight is not None:
+            await self._inflight
+        logger.info(f"Сэмплер остановлен: опросов {self.samples}, пропущено сэмплов {self.missed}")
+
+    async def stop(self):
+        """
+        Останавливает сэмплер после завершения текущего опроса
+        """
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def sample(self, slot: int):
+        """
+        Выполняет один опрос и передает полученные тики обработчику
+
+        :param slot: Граница интервала опроса в UNIX timestamp
+        """
+        names = ticker_registry.names()
+        try:
+            ticks = await fetch_ticks(self.client, slot)
+            fetched = {tick['ticker'] for tick in ticks}
+            self._record_missed([name for name in names if name not in fetched], 'fetch_failed')
+            if ticks:
+                await self.on_ticks(ticks)
+        except Exception as e:
+            logger.error(f"Ошибка опроса цен в {slot}: {e}")
+            self._record_missed(names, 'error')
+            return
+        self.samples += 1
+
+    def _record_missed(self, tickers: List[str], reason: str, count: int = 1):
+        """
+        Учитывает пропущенные сэмплы тикеров
+        """
+        for ticker in tickers:
+            SAMPLER_MISSED_SAMPLES.labels(ticker, reason).inc(count)
+        self.missed += len(tickers) * count
+
+
+async def run_sampler(interval: int = SAMPLER_INTERVAL):
+    """
+    Запускает сэмплер с записью тиков через буфер пакетной записи до получения SIGINT/SIGTERM
+
+    :param interval: Интервал опроса в секундах
+    """
+    with default_engine.connect() as connection:
+        refresh_registry(connection)
+
+    async with DeribitClient() as client, PriceTickBuffer() as buffer:
+        async def on_ticks(ticks: List[Dict]):
+            for tick in ticks:
+                await buffer.put(tick['ticker'], tick['price'], tick['timestamp'])
+
+        sampler = PriceSampler(client, on_ticks, interval)
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(sampler.stop()))
+
+        await sampler.run()
+
+
+def main():
+    """
+    Точка входа для запуска сэмплера
+    """
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_sampler())
+
+
+if __name__ == '__main__':
+    main()
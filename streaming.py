@@ -0,0 +1,231 @@
+"""
+Потоковый ингестер цен через JSON-RPC WebSocket API Deribit
+
+Время тиков хранится в секундах, поэтому время сообщения канала
+(в миллисекундах) округляется вниз до секунды, и из нескольких сообщений
+тикера за одну секунду сохраняется только первое: остальные
+пропускаются как дубликаты (ticker, timestamp).
+
+Запуск: python -m deribit_task.streaming
+"""
+import asyncio
+import json
+import logging
+import random
+import signal
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from deribit_task.config import (
+    DERIBIT_WS_URL,
+    STREAM_RECONNECT_MIN_DELAY,
+    STREAM_RECONNECT_MAX_DELAY,
+    STREAM_HEARTBEAT_INTERVAL,
+)
+from deribit_task.database import engine as default_engine
+from deribit_task.tickers import KIND_INDEX, KIND_MARK, refresh_registry, ticker_registry
+from deribit_task.write_buffer import PriceTickBuffer
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'deribit_price_index.'
+TICKER_CHANNEL_PREFIX = 'ticker.'
+TICKER_CHANNEL_INTERVAL = '100ms'
+
+# Обработчик тика: (тикер, цена, время биржи в миллисекундах)
+TickHandler = Callable[[str, float, int], Awaitable[None]]
+
+
+class DeribitStreamClient:
+    """
+    Клиент WebSocket API Deribit, подписанный на каналы deribit_price_index.*
+    индексов и ticker.* инструментов (mark price)
+
+    Держит одно долгоживущее соединение и переподключается
+    с экспоненциальной задержкой при обрыве.
+    """
+
+    def __init__(
+        self,
+        on_tick: TickHandler,
+        index_names: Optional[List[str]] = None,
+        instrument_names: Optional[List[str]] = None,
+        ws_url: str = DERIBIT_WS_URL,
+        min_delay: float = STREAM_RECONNECT_MIN_DELAY,
+        max_delay: float = STREAM_RECONNECT_MAX_DELAY,
+        heartbeat_interval: int = STREAM_HEARTBEAT_INTERVAL,
+    ):
+        """
+        Инициализация клиента
+
+        :param on_tick: Корутина, вызываемая для каждого полученного тика
+        :param index_names: Имена индексов (по умолчанию индексы из реестра тикеров)
+        :param instrument_names: Имена инструментов для mark price (по умолчанию из реестра тикеров)
+        :param ws_url: URL WebSocket API Deribit
+        :param min_delay: Начальная задержка переподключения в секундах
+        :param max_delay: Максимальная задержка переподключения в секундах
+        :param heartbeat_interval: Интервал heartbeat Deribit в секундах (0 - отключен)
+        """
+        self.on_tick = on_tick
+        self.index_names = list(index_names or ticker_registry.names(KIND_INDEX))
+        self.instrument_names = list(
+            instrument_names if instrument_names is not None else ticker_registry.names(KIND_MARK)
+        )
+        self.ws_url = ws_url
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._request_id = 0
+        self._stopped = asyncio.Event()
+
+    @property
+    def channels(self) -> List[str]:
+        """
+        Каналы подписки для индексов и инструментов клиента
+        """
+        return (
+            [f"{CHANNEL_PREFIX}{name.lower()}" for name in self.index_names]
+            + [f"{TICKER_CHANNEL_PREFIX}{name}.{TICKER_CHANNEL_INTERVAL}" for name in self.instrument_names]
+        )
+
+    async def run(self):
+        """
+        Основной цикл: подключение, подписка, чтение сообщений и переподключение
+        """
+        delay = self.min_delay
+        async with aiohttp.ClientSession() as session:
+            while not self._stopped.is_set():
+                try:
+                    async with session.ws_connect(self.ws_url) as ws:
+                        self.ws = ws
+                        await self._subscribe(ws)
+                        logger.info(f"Подписка на каналы {self.channels} оформлена")
+                        delay = self.min_delay
+                        await self._consume(ws)
+                    if not self._stopped.is_set():
+                        logger.warning("WebSocket соединение с Deribit закрыто сервером")
+                except aiohttp.ClientError as e:
+                    logger.error(f"Ошибка WebSocket соединения с Deribit: {e}")
+                except Exception as e:
+                    logger.error(f"Неожиданная ошибка в потоке цен Deribit: {e}")
+                finally:
+                    self.ws = None
+
+                if self._stopped.is_set():
+                    break
+
+                pause = random.uniform(delay / 2, delay)
+                logger.info(f"Переподключение к Deribit через {pause:.1f} с")
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=pause)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, self.max_delay)
+
+    async def stop(self):
+        """
+        Останавливает клиент и закрывает текущее соединение
+        """
+        self._stopped.set()
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _send(self, ws: aiohttp.ClientWebSocketResponse, method: str, params: Dict) -> int:
+        """
+        Отправляет JSON-RPC запрос
+
+        :return: Идентификатор запроса
+        """
+        self._request_id += 1
+        await ws.send_json({
+            'jsonrpc': '2.0',
+            'id': self._request_id,
+            'method': method,
+            'params': params,
+        })
+        return self._request_id
+
+    async def _subscribe(self, ws: aiohttp.ClientWebSocketResponse):
+        """
+        Включает heartbeat и подписывается на каналы индексов
+        """
+        if self.heartbeat_interval:
+            await self._send(ws, 'public/set_heartbeat', {'interval': self.heartbeat_interval})
+        await self._send(ws, 'public/subscribe', {'channels': self.channels})
+
+    async def _consume(self, ws: aiohttp.ClientWebSocketResponse):
+        """
+        Читает сообщения до закрытия соединения
+        """
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                await self._handle_message(ws, json.loads(msg.data))
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                raise ws.exception()
+
+    async def _handle_message(self, ws: aiohttp.ClientWebSocketResponse, message: Dict):
+        """
+        Обрабатывает одно JSON-RPC сообщение
+        """
+        method = message.get('method')
+        params = message.get('params') or {}
+
+        if method == 'subscription':
+            channel = params.get('channel', '')
+            if channel.startswith(CHANNEL_PREFIX):
+                name_key, price_key = 'index_name', 'price'
+            elif channel.startswith(TICKER_CHANNEL_PREFIX):
+                name_key, price_key = 'instrument_name', 'mark_price'
+            else:
+                return
+            data = params.get('data') or {}
+            try:
+                ticker = data[name_key].upper()
+                price = float(data[price_key])
+                timestamp = int(data['timestamp'])
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Некорректное сообщение канала {channel}: {e}")
+                return
+            await self.on_tick(ticker, price, timestamp)
+        elif method == 'heartbeat':
+            if params.get('type') == 'test_request':
+                await self._send(ws, 'public/test', {})
+        elif 'error' in message:
+            logger.error(f"Ошибка JSON-RPC от Deribit: {message['error']}")
+
+
+async def run_ingester(index_names: Optional[List[str]] = None):
+    """
+    Запускает потоковый ингестер до получения SIGINT/SIGTERM
+
+    :param index_names: Имена индексов (по умолчанию индексы из реестра тикеров)
+    """
+    with default_engine.connect() as connection:
+        refresh_registry(connection)
+
+    async with PriceTickBuffer() as buffer:
+        async def on_tick(ticker: str, price: float, timestamp: int):
+            # Миллисекунды отбрасываются: столбец timestamp, свечи и API работают в секундах
+            await buffer.put(ticker, price, timestamp // 1000)
+
+        client = DeribitStreamClient(on_tick, index_names=index_names)
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(client.stop()))
+
+        await client.run()
+
+
+def main():
+    """
+    Точка входа для запуска потокового ингестера
+    """
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_ingester())
+
+
+if __name__ == '__main__':
+    main()
@@ -4,18 +4,42 @@ Celery задачи для получения и сохранения цен
 import time
 import logging
 import asyncio
-from typing import Optional
+from typing import Dict, List, Optional
 
 from sqlalchemy.orm import Session
 
 from deribit_task.celery_app import celery_app
 from deribit_task.deribit_client import DeribitClient
-from deribit_task.database import SessionLocal
-from deribit_task.models import PriceTick
+from deribit_task.database import SessionLocal, engine
+from deribit_task.compact import store_ticks
+from deribit_task.config import (
+    DERIBIT_API_URL,
+    FETCH_PRICES_INTERVAL,
+    SAMPLE_TIMESTAMP_SOURCE,
+    ROLLUPS_ENABLED,
+    PARTITION_PREMAKE_MONTHS,
+    PARTITION_RETENTION_MONTHS,
+    PARTITION_DROP_EXPIRED,
+)
+from deribit_task.partitions import maintain_partitions
+from deribit_task.tickers import KIND_INDEX, KIND_MARK, refresh_registry, ticker_registry
+from deribit_task.price_feed import publish_ticks
+from deribit_task.rollups import upsert_rollups
+from deribit_task.worker_runtime import worker_runtime
 
 logger = logging.getLogger(__name__)
 
 
+def slot_timestamp(interval: int = FETCH_PRICES_INTERVAL) -> int:
+    """
+    Возвращает начало текущего интервала опроса (граница от UNIX эпохи) в UNIX timestamp
+
+    Как и у сэмплера, время тика - граница интервала, поэтому задержка
+    задачи в очереди и в worker не попадает во время тика.
+    """
+    return int(time.time()) // interval * interval
+
+
 def save_price_tick(db: Session, ticker: str, price: float, timestamp: int) -> bool:
     """
     Сохраняет тик цены в базу данных
@@ -24,69 +48,150 @@ def save_price_tick(db: Session, ticker: str, price: float, timestamp: int) -> b
     :param ticker: Тикер валюты (BTC_USD или ETH_USD)
     :param price: Цена
     :param timestamp: Время в UNIX timestamp
-    :return: True если успешно сохранено, False в противном случае
+    :return: True если успешно сохранено, False в случае ошибки или если тик уже сохранен
     """
+    return save_price_ticks(db, [{'ticker': ticker, 'price': price, 'timestamp': timestamp}]) == 1
+
+
+def save_price_ticks(db: Session, ticks: List[Dict], publish: bool = True) -> int:
+    """
+    Сохраняет пачку тиков одним multi-row INSERT в одной транзакции
+    вместе с обновлением свечей и публикует сохраненные тики в канал новых цен
+    
+    Запись идемпотентна: тики с уже сохраненными (ticker, timestamp)
+    пропускаются и не публикуются повторно.
+    
+    В зависимости от PRICE_STORAGE_WRITE тики пишутся в price_ticks,
+    price_ticks_compact или в обе таблицы; публикуются тики таблицы,
+    из которой читает API (PRICE_STORAGE_READ).
+    
+    :param db: Сессия БД
+    :param ticks: Список словарей с ключами ticker, price, timestamp
+    :param publish: Публиковать ли тики в канал новых цен (исторические тики,
+                    например заполняющие пропуски, не публикуются)
+    :return: Количество сохраненных тиков без дубликатов (0 в случае ошибки)
+    """
+    if not ticks:
+        return 0
+
     try:
-        price_tick = PriceTick(
-            ticker=ticker,
-            price=price,
-            timestamp=timestamp
-        )
-        db.add(price_tick)
+        saved = store_ticks(db, ticks)
+        if ROLLUPS_ENABLED:
+            # Дубликаты, пропущенные основной таблицей, не учитываются в свечах повторно
+            upsert_rollups(db, saved)
         db.commit()
-        logger.info(f"Сохранен тик: {ticker} = {price} в {timestamp}")
-        return True
     except Exception as e:
-        logger.error(f"Ошибка сохранения тика {ticker}: {e}")
+        logger.error(f"Ошибка сохранения тиков {[tick['ticker'] for tick in ticks]}: {e}")
         db.rollback()
-        return False
+        return 0
+
+    if not publish:
+        logger.info(f"Сохранено исторических тиков: {len(saved)}")
+        return len(saved)
 
+    for tick in saved:
+        logger.info(f"Сохранен тик: {tick['ticker']} = {tick['price']} в {tick['timestamp']}")
+    publish_ticks(saved)
+    return len(saved)
 
-async def fetch_and_save_prices(db: Session, timestamp: int):
+
+async def fetch_ticks(client: DeribitClient, timestamp: int) -> List[Dict]:
+    """
+    Получает цены всех тикеров реестра
+    
+    Цены индексов и mark price инструментов запрашиваются параллельно
+    с ограничением DERIBIT_MAX_CONCURRENCY. Время тика - timestamp опроса;
+    при SAMPLE_TIMESTAMP_SOURCE=exchange - время расчета цены биржей, если
+    ответ его содержит (timestamp у public/ticker), округленное вниз до секунды.
+    
+    :param client: Открытый клиент Deribit
+    :param timestamp: Время опроса в UNIX timestamp
+    :return: Список тиков с ключами ticker, price, timestamp (без тикеров, цену которых получить не удалось)
+    """
+    index_names = ticker_registry.names(KIND_INDEX)
+    instrument_names = ticker_registry.names(KIND_MARK)
+    requests = [client.get_index_prices(index_names)]
+    if instrument_names:
+        requests.append(client.get_mark_prices(instrument_names))
+    results = await asyncio.gather(*requests)
+
+    ticks = []
+    for prices, price_key in zip(results, ('index_price', 'mark_price')):
+        for ticker, data in prices.items():
+            if data and data.get(price_key) is not None:
+                tick_timestamp = timestamp
+                if SAMPLE_TIMESTAMP_SOURCE == 'exchange' and data.get('timestamp'):
+                    tick_timestamp = int(data['timestamp']) // 1000
+                ticks.append({'ticker': ticker, 'price': float(data[price_key]), 'timestamp': tick_timestamp})
+            else:
+                logger.warning(f"Не удалось получить цену {ticker}")
+    return ticks
+
+
+async def fetch_and_save_prices(
+    db: Session,
+    timestamp: int,
+    base_url: str = DERIBIT_API_URL,
+    client: Optional[DeribitClient] = None
+):
     """
     Асинхронная функция для получения цен и сохранения в БД
     
+    Цены всех тикеров реестра (индексные цены и mark price инструментов)
+    запрашиваются параллельно в рамках одной HTTP сессии с ограничением
+    DERIBIT_MAX_CONCURRENCY, а полученные тики сохраняются одной
+    транзакцией. Ошибка по одному тикеру не мешает сохранить остальные.
+    
     :param db: Сессия БД
     :param timestamp: Время в UNIX timestamp
+    :param base_url: Базовый URL API Deribit (если клиент не передан)
+    :param client: Открытый клиент Deribit, переиспользуемый между вызовами
+                   (по умолчанию создается клиент на один вызов)
     """
-    async with DeribitClient() as client:
-        # Получаем цену BTC
-        btc_data = await client.get_btc_price()
-        if btc_data and 'index_price' in btc_data:
-            save_price_tick(db, 'BTC_USD', float(btc_data['index_price']), timestamp)
-        else:
-            logger.warning("Не удалось получить цену BTC")
-        
-        # Получаем цену ETH
-        eth_data = await client.get_eth_price()
-        if eth_data and 'index_price' in eth_data:
-            save_price_tick(db, 'ETH_USD', float(eth_data['index_price']), timestamp)
-        else:
-            logger.warning("Не удалось получить цену ETH")
+    if client is None:
+        async with DeribitClient(base_url) as client:
+            return await fetch_and_save_prices(db, timestamp, client=client)
+
+    save_price_ticks(db, await fetch_ticks(client, timestamp))
 
 
 @celery_app.task(name='deribit_task.tasks.fetch_prices')
 def fetch_prices():
     """
-    Celery задача для получения цен BTC и ETH с биржи Deribit
+    Celery задача для получения цен поддерживаемых тикеров с биржи Deribit
     и сохранения их в базу данных
     """
     db: Optional[Session] = None
     try:
         db = SessionLocal()
-        timestamp = int(time.time())
-        
-        # Запускаем асинхронную функцию
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        timestamp = slot_timestamp()
+        refresh_registry(db)
         
-        loop.run_until_complete(fetch_and_save_prices(db, timestamp))
+        # Event loop и пул HTTP соединений живут все время жизни процесса worker
+        worker_runtime.start()
+        worker_runtime.run(fetch_and_save_prices(db, timestamp, client=worker_runtime.client))
         
     except Exception as e:
         logger.error(f"Ошибка в задаче fetch_prices: {e}")
     finally:
         if db:
             db.close()
+
+
+@celery_app.task(name='deribit_task.tasks.maintain_price_partitions')
+def maintain_price_partitions():
+    """
+    Celery задача обслуживания партиций таблиц тиков: создает партиции
+    на будущие месяцы и отключает партиции старше срока хранения
+    """
+    try:
+        with engine.begin() as connection:
+            maintain_partitions(
+                connection,
+                slot_timestamp(),
+                PARTITION_PREMAKE_MONTHS,
+                PARTITION_RETENTION_MONTHS,
+                PARTITION_DROP_EXPIRED
+            )
+    except Exception as e:
+        logger.error(f"Ошибка в задаче maintain_price_partitions: {e}")
@@ -1,21 +1,36 @@
 """
 Unit тесты для API endpoints
 """
+import asyncio
+import gzip
+import io
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from decimal import Decimal
+from unittest.mock import AsyncMock
 
-from deribit_task.main import app
-from deribit_task.database import Base, get_db
+from deribit_task import price_feed
+from deribit_task.main import app, warm_up
+from deribit_task.cache import latest_price_cache
+from deribit_task.rollups import rebuild_rollups
+from deribit_task.database import Base, get_async_db, get_fresh_read_sessions, get_read_db
 from deribit_task.models import PriceTick
 
 
 @pytest.fixture
-def test_db():
+def test_db(tmp_path):
     """Фикстура для создания тестовой БД"""
-    engine = create_engine('sqlite:///:memory:')
+    db_path = tmp_path / 'test.db'
+    engine = create_engine(f'sqlite:///{db_path}')
+    async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_path}', poolclass=NullPool)
     Base.metadata.create_all(engine)
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -29,20 +44,27 @@ def test_db():
     session.add(tick2)
     session.add(tick3)
     session.commit()
+    rebuild_rollups(session)
+    session.commit()
+    
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
     
-    def override_get_db():
-        try:
-            yield session
-        finally:
-            pass
+    async def override_get_async_db():
+        async with AsyncSession() as async_session:
+            yield async_session
     
-    app.dependency_overrides[get_db] = override_get_db
+    for dependency in (get_async_db, get_read_db):
+        app.dependency_overrides[dependency] = override_get_async_db
+    app.dependency_overrides[get_fresh_read_sessions] = lambda: AsyncSession
+    latest_price_cache.clear()
     
     yield session
     
     session.close()
     Base.metadata.drop_all(engine)
+    engine.dispose()
     app.dependency_overrides.clear()
+    latest_price_cache.clear()
 
 
 @pytest.fixture
@@ -96,8 +118,298 @@ def test_get_price_by_date(client):
     assert len(data['data']) == 1
 
 
+def test_get_latest_prices_batch(client):
+    """Тест получения последних цен набора тикеров"""
+    latest_price_cache.update({'id': 99, 'ticker': 'ETH_USD', 'price': 3100, 'timestamp': 1000120})
+    
+    response = client.get("/api/v1/prices/latest/batch?tickers=BTC_USD,ETH_USD")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data['count'] == 2
+    assert [(tick['ticker'], tick['timestamp']) for tick in data['data']] == [('BTC_USD', 1000060), ('ETH_USD', 1000120)]
+    assert latest_price_cache.get('BTC_USD') is not None
+
+
+def test_get_latest_prices_batch_invalid_ticker(client):
+    """Тест получения последних цен с неподдерживаемым тикером"""
+    response = client.get("/api/v1/prices/latest/batch?tickers=BTC_USD,UNKNOWN_USD")
+    
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('fast', [False, True])
+def test_get_prices_by_date_batch(client, monkeypatch, fast):
+    """Тест получения цен набора тикеров, сгруппированных по тикеру"""
+    monkeypatch.setattr('deribit_task.api.routers.API_FAST_SERIALIZATION', fast)
+    
+    response = client.get("/api/v1/prices/filter/batch?tickers=ETH_USD,BTC_USD&date_from=1000000&limit=1")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data['count'] == 2
+    eth, btc = data['data']
+    assert (eth['ticker'], eth['count'], eth['next_cursor']) == ('ETH_USD', 1, None)
+    assert btc['ticker'] == 'BTC_USD'
+    assert [tick['timestamp'] for tick in btc['data']] == [1000000]
+    
+    next_page = client.get(f"/api/v1/prices/filter?ticker=BTC_USD&date_from=1000000&after={btc['next_cursor']}")
+    assert [tick['timestamp'] for tick in next_page.json()['data']] == [1000060]
+
+
 def test_get_price_by_date_no_ticker(client):
     """Тест получения цен без указания тикера"""
     response = client.get("/api/v1/prices/filter")
     
     assert response.status_code == 422  # Validation error
+
+
+def test_get_all_prices_paginated(client):
+    """Тест постраничного получения цен по курсору"""
+    response = client.get("/api/v1/prices/all?ticker=BTC_USD&limit=1")
+    
+    assert response.status_code == 200
+    first_page = response.json()
+    assert first_page['count'] == 1
+    assert first_page['data'][0]['timestamp'] == 1000000
+    assert first_page['next_cursor']
+    
+    response = client.get(f"/api/v1/prices/all?ticker=BTC_USD&limit=1&after={first_page['next_cursor']}")
+    
+    assert response.status_code == 200
+    second_page = response.json()
+    assert second_page['count'] == 1
+    assert second_page['data'][0]['timestamp'] == 1000060
+    assert second_page['next_cursor'] is None
+
+
+def test_get_all_prices_invalid_cursor(client):
+    """Тест получения цен с некорректным курсором"""
+    response = client.get("/api/v1/prices/all?ticker=BTC_USD&after=garbage")
+    
+    assert response.status_code == 400
+
+
+def test_get_price_by_date_ndjson(client):
+    """Тест потоковой выдачи цен в формате NDJSON"""
+    response = client.get("/api/v1/prices/filter?ticker=BTC_USD&date_from=1000000&format=ndjson")
+    
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['timestamp'] for line in lines] == [1000000, 1000060]
+    assert lines[0]['ticker'] == 'BTC_USD'
+
+
+def test_get_price_by_date_conditional(client, test_db):
+    """Тест ETag, Last-Modified и ответа 304 для закрытого периода"""
+    url = "/api/v1/prices/filter?ticker=BTC_USD&date_from=1000000&date_to=1000100"
+    response = client.get(url)
+    
+    assert response.status_code == 200
+    assert response.headers['cache-control'].startswith('public, max-age=')
+    assert response.headers['last-modified'] == 'Mon, 12 Jan 1970 13:47:40 GMT'
+    etag = response.headers['etag']
+    
+    not_modified = client.get(url, headers={'If-None-Match': f'W/"other", {etag}'})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+    assert not_modified.headers['etag'] == etag
+    assert client.get(url, headers={'If-Modified-Since': response.headers['last-modified']}).status_code == 304
+    
+    test_db.add(PriceTick(ticker='BTC_USD', price=Decimal('50500.0'), timestamp=1000030))
+    test_db.commit()
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
+    assert changed.json()['count'] == 3
+    
+    # Изменение цены без изменения количества и границ периода тоже меняет ETag
+    test_db.query(PriceTick).filter(PriceTick.timestamp == 1000030).update({'price': Decimal('50600.0')})
+    test_db.commit()
+    assert client.get(url, headers={'If-None-Match': changed.headers['etag']}).status_code == 200
+
+
+def test_get_all_prices_open_range_not_validated(client, monkeypatch):
+    """Тест открытого периода: no-cache без сводки периода и валидаторов"""
+    monkeypatch.setattr('deribit_task.crud.AsyncPriceRepository.get_range_stats', None)
+    
+    for url in ("/api/v1/prices/all?ticker=BTC_USD&format=ndjson", "/api/v1/prices/all?ticker=BTC_USD&limit=1"):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers['cache-control'] == 'no-cache'
+        assert 'etag' not in response.headers and 'last-modified' not in response.headers
+
+
+def test_stream_prices_websocket(test_db, monkeypatch):
+    """Тест live потока цен по WebSocket: подписка на тикер и отказ для неподдерживаемого"""
+    monkeypatch.setattr('deribit_task.main.PRICE_FEED_ENABLED', False)
+    monkeypatch.setattr('deribit_task.main.STARTUP_WARMUP', False)
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/v1/prices/stream?tickers=BTC_USD") as websocket:
+            price_feed.dispatch([
+                {'id': 5, 'ticker': 'ETH_USD', 'price': Decimal('3100.5'), 'timestamp': 2000000},
+                {'id': 6, 'ticker': 'BTC_USD', 'price': Decimal('52000.1'), 'timestamp': 2000000},
+            ])
+            data = websocket.receive_json()
+        
+        assert data == {'id': 6, 'ticker': 'BTC_USD', 'price': '52000.10000000', 'timestamp': 2000000}
+        with pytest.raises(WebSocketDisconnect) as error:
+            with client.websocket_connect("/api/v1/prices/stream?tickers=BTC_USD,SOL_USD") as websocket:
+                websocket.receive_json()
+        assert error.value.code == 1008
+
+
+def test_get_latest_price_served_from_cache(client, test_db):
+    """Тест получения последней цены из кэша без обращения к БД"""
+    latest_price_cache.update({'id': 99, 'ticker': 'ETH_USD', 'price': 3100.5, 'timestamp': 2000000})
+    test_db.query(PriceTick).delete()
+    test_db.commit()
+    
+    response = client.get("/api/v1/prices/latest?ticker=ETH_USD")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data['id'] == 99
+    assert Decimal(data['price']) == Decimal('3100.5')
+
+
+def test_latest_cache_hit_without_connection(client, monkeypatch):
+    """Тест: ответ из кэша последних цен не берет соединение чтения из пула"""
+    connect = AsyncMock(side_effect=AssertionError("соединение при попадании в кэш"))
+    monkeypatch.setattr('deribit_task.database.read_router.connect', connect)
+    app.dependency_overrides.pop(get_fresh_read_sessions)
+    for ticker in ('BTC_USD', 'ETH_USD'):
+        latest_price_cache.update({'id': 99, 'ticker': ticker, 'price': 3100.5, 'timestamp': 2000000})
+    
+    for _ in range(5):
+        assert client.get("/api/v1/prices/latest?ticker=ETH_USD").status_code == 200
+        assert client.get("/api/v1/prices/latest/batch?tickers=BTC_USD,ETH_USD").json()['count'] == 2
+    
+    connect.assert_not_called()
+
+
+def test_get_ohlc(client):
+    """Тест получения свечей OHLC"""
+    response = client.get("/api/v1/prices/ohlc?ticker=BTC_USD&interval=1m")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data['interval'] == '1m'
+    assert data['count'] == 2
+    assert [candle['timestamp'] for candle in data['data']] == [999960, 1000020]
+    assert Decimal(data['data'][0]['open']) == Decimal('50000.5')
+
+
+def test_get_ohlc_invalid_interval(client):
+    """Тест получения свечей OHLC с неподдерживаемым интервалом"""
+    response = client.get("/api/v1/prices/ohlc?ticker=BTC_USD&interval=7m")
+    
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('url', [
+    "/api/v1/prices/all?ticker=BTC_USD",
+    "/api/v1/prices/filter?ticker=BTC_USD&date_from=1000000&limit=1",
+    "/api/v1/prices/filter?ticker=BTC_USD&format=ndjson",
+])
+def test_fast_serialization_matches_contract(client, monkeypatch, url):
+    """Тест совпадения ответов быстрого пути сериализации с обычным"""
+    expected = client.get(url)
+    monkeypatch.setattr('deribit_task.api.routers.API_FAST_SERIALIZATION', True)
+    
+    response = client.get(url)
+    
+    assert response.status_code == 200
+    assert response.headers['content-type'] == expected.headers['content-type']
+    assert response.content == expected.content
+
+
+def test_export_prices_arrow(client):
+    """Тест выгрузки цен в Arrow IPC"""
+    response = client.get("/api/v1/prices/export?ticker=BTC_USD&format=arrow")
+    
+    assert response.status_code == 200
+    assert 'BTC_USD.arrow' in response.headers['content-disposition']
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column('timestamp').to_pylist() == [1000000, 1000060]
+    assert table.column('price').to_pylist() == [Decimal('50000.5'), Decimal('51000.0')]
+    assert table.column('ticker').to_pylist() == ['BTC_USD', 'BTC_USD']
+
+
+def test_export_prices_parquet_and_csv(client):
+    """Тест выгрузки цен в Parquet и CSV"""
+    parquet = client.get("/api/v1/prices/export?ticker=BTC_USD&date_from=1000060&format=parquet")
+    csv_gz = client.get("/api/v1/prices/export?ticker=BTC_USD&format=csv")
+    
+    assert pq.read_table(io.BytesIO(parquet.content)).column('timestamp').to_pylist() == [1000060]
+    lines = gzip.decompress(csv_gz.content).decode().splitlines()
+    assert lines[0] == 'id,ticker,price,timestamp'
+    assert lines[1].split(',')[1:] == ['BTC_USD', '50000.50000000', '1000000']
+    assert len(lines) == 3
+
+
+def test_get_tickers(client):
+    """Тест получения списка тикеров"""
+    response = client.get("/api/v1/prices/tickers?kind=index")
+    
+    assert response.status_code == 200
+    names = [ticker['name'] for ticker in response.json()['data']]
+    assert 'BTC_USD' in names
+    assert 'ETH_USD' in names
+
+
+def test_metrics(client):
+    """Тест endpoint метрик Prometheus"""
+    client.get("/api/v1/prices/latest?ticker=BTC_USD")
+    
+    response = client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert 'route="/api/v1/prices/latest"' in response.text
+    assert 'deribit_db_query_duration_seconds' in response.text
+
+
+def test_ready(test_db, monkeypatch):
+    """Тест readiness probe: готовность после старта и отказ при недоступном Redis"""
+    async def ok():
+        pass
+    
+    async def hang():
+        await asyncio.sleep(10)
+    
+    monkeypatch.setattr('deribit_task.main.PRICE_FEED_ENABLED', True)
+    monkeypatch.setattr('deribit_task.main.STARTUP_WARMUP', False)
+    monkeypatch.setattr('deribit_task.main.READY_CHECK_TIMEOUT', 0.05)
+    monkeypatch.setattr('deribit_task.main.check_database', ok)
+    monkeypatch.setattr('deribit_task.main.check_redis', ok)
+    monkeypatch.setattr('deribit_task.price_feed.PriceFeedListener.start', lambda self: None)
+    assert TestClient(app).get("/ready").status_code == 503
+    
+    with TestClient(app) as client:
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {'status': 'ready', 'checks': {'database': 'ok', 'redis': 'ok'}}
+        
+        monkeypatch.setattr('deribit_task.main.check_redis', hang)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()['checks'] == {'database': 'ok', 'redis': 'timeout'}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_single_deadline(monkeypatch):
+    """Тест прогрева: STARTUP_WARMUP_TIMEOUT ограничивает все шаги прогрева вместе"""
+    finished = []
+    
+    async def step(*args):
+        await asyncio.sleep(0.06)
+        finished.append(True)
+    
+    monkeypatch.setattr('deribit_task.main.STARTUP_WARMUP_TIMEOUT', 0.1)
+    monkeypatch.setattr('deribit_task.main.read_router.warm_up', step)
+    monkeypatch.setattr('deribit_task.main.warm_latest_prices', step)
+    
+    await warm_up()
+    
+    assert finished == [True]
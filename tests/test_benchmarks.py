@@ -0,0 +1,75 @@
+"""
+Unit тесты для бенчмарков
+"""
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from deribit_task.database import Base
+from deribit_task.models import PriceTick
+from deribit_task.benchmarks.stats import percentile, summarize
+from deribit_task.benchmarks.seed import seed_ticks
+from deribit_task.benchmarks.ingest import bench_fetch_and_save, bench_write_buffer
+from deribit_task.benchmarks.__main__ import compare_reports
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Фикстура для создания тестовой БД"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    Base.metadata.create_all(engine)
+
+    yield engine
+
+    engine.dispose()
+
+
+def count_ticks(engine):
+    """Возвращает количество тиков в БД"""
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(PriceTick)).scalar()
+
+
+def test_summarize():
+    """Тест сводки задержек"""
+    latencies = [i / 1000 for i in range(1, 101)]
+    
+    summary = summarize(latencies, elapsed=2.0, errors=1)
+    
+    assert percentile(sorted(latencies), 50) == 0.05
+    assert summary['count'] == 100
+    assert summary['errors'] == 1
+    assert summary['throughput_per_s'] == 50.0
+    assert summary['latency_ms']['p95'] == 95.0
+    assert summary['latency_ms']['p99'] == 99.0
+
+
+def test_compare_reports():
+    """Тест сравнения отчетов"""
+    before = {'results': {'http.latest': {'throughput_per_s': 100.0, 'latency_ms': {'p50': 2.0, 'p95': 4.0, 'p99': 8.0}}}}
+    after = {'results': {'http.latest': {'throughput_per_s': 80.0, 'latency_ms': {'p50': 2.0, 'p95': 3.0, 'p99': 8.0}}}}
+    
+    rows = {row['metric']: row for row in compare_reports(before, after)}
+    
+    assert rows['throughput_per_s']['change_pct'] == -20.0
+    assert rows['throughput_per_s']['regression'] is True
+    assert rows['latency_ms.p95']['regression'] is False
+
+
+def test_seed_ticks(engine):
+    """Тест наполнения таблицы синтетическими тиками"""
+    result = seed_ticks(engine, rows=1000, tickers=['BTC_USD', 'ETH_USD'], start_timestamp=1000000, chunk_size=300)
+    
+    assert result['rows'] == 1000
+    assert count_ticks(engine) == 1000
+
+
+@pytest.mark.asyncio
+async def test_ingest_benchmarks(engine):
+    """Тест бенчмарков записи на фейковом Deribit"""
+    fetch = await bench_fetch_and_save(engine, iterations=3)
+    buffered = await bench_write_buffer(engine, 100, ['BTC_USD'], max_batch_size=50, flush_interval=60)
+    
+    assert fetch['count'] == 3
+    assert buffered['count'] == 100
+    assert buffered['flushes'] == 2
+    assert count_ticks(engine) == 3 * 2 + 100
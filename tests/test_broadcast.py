@@ -0,0 +1,84 @@
+"""
+Unit тесты для раздачи тиков live потока цен
+"""
+import asyncio
+import json
+import threading
+import pytest
+import pytest_asyncio
+
+from deribit_task import price_feed
+from deribit_task.api.routers import _sse_events
+from deribit_task.broadcast import PriceBroadcaster
+
+
+def tick(ticker, tick_id, price=50000.5):
+    return {'id': tick_id, 'ticker': ticker, 'price': price, 'timestamp': 1000000 + tick_id}
+
+
+@pytest_asyncio.fixture
+async def broadcaster():
+    """Фикстура broadcaster, подписанного на канал новых цен"""
+    broadcaster = PriceBroadcaster(queue_size=2, max_clients=3)
+    broadcaster.start()
+    yield broadcaster
+    broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_fan_out_by_ticker(broadcaster):
+    """Тест раздачи тика только подписчикам его тикера"""
+    btc = broadcaster.subscribe(['BTC_USD'])
+    both = broadcaster.subscribe(['BTC_USD', 'ETH_USD'])
+
+    price_feed.dispatch([tick('ETH_USD', 1, 3000.25), tick('BTC_USD', 2), {**tick('BTC_USD', 3), 'id': None}])
+
+    assert json.loads(await btc.get()) == {'id': 2, 'ticker': 'BTC_USD', 'price': '50000.50000000', 'timestamp': 1000002}
+    assert [json.loads(await both.get())['id'] for _ in range(2)] == [1, 2]
+    assert btc._queue.empty() and both._queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_dropped(broadcaster):
+    """Тест отключения клиента с переполненной очередью без влияния на остальных"""
+    slow = broadcaster.subscribe(['BTC_USD'])
+    fast = broadcaster.subscribe(['BTC_USD'])
+
+    for tick_id in range(3):
+        price_feed.dispatch([tick('BTC_USD', tick_id)])
+        assert json.loads(await fast.get())['id'] == tick_id
+
+    assert slow.dropped
+    assert await slow.get() is None
+    assert broadcaster.clients == 1
+    assert broadcaster.subscribe(['BTC_USD']) is not None
+    assert broadcaster.subscribe(['BTC_USD']) is not None
+    assert broadcaster.subscribe(['BTC_USD']) is None
+
+
+@pytest.mark.asyncio
+async def test_publish_from_listener_thread(broadcaster):
+    """Тест передачи тиков из потока слушателя Redis в event loop"""
+    subscription = broadcaster.subscribe(['BTC_USD'])
+
+    thread = threading.Thread(target=price_feed.dispatch, args=([tick('BTC_USD', 7)],))
+    thread.start()
+    thread.join()
+
+    assert json.loads(await asyncio.wait_for(subscription.get(), timeout=1))['id'] == 7
+
+
+@pytest.mark.asyncio
+async def test_sse_events(broadcaster, monkeypatch):
+    """Тест формата Server-Sent Events и отписки при завершении потока"""
+    monkeypatch.setattr('deribit_task.api.routers.price_broadcaster', broadcaster)
+    events = _sse_events(['BTC_USD'], keepalive=0.05)
+
+    assert await events.__anext__() == b': keepalive\n\n'
+    price_feed.dispatch([tick('BTC_USD', 1)])
+    event = await events.__anext__()
+    assert event.startswith(b'event: tick\ndata: {"id":1,')
+    assert event.endswith(b'}\n\n')
+
+    await events.aclose()
+    assert broadcaster.clients == 0
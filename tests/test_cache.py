@@ -0,0 +1,61 @@
+"""
+Unit тесты для кэша последних цен
+"""
+import json
+import time
+from decimal import Decimal
+
+from deribit_task import price_feed
+from deribit_task.cache import LatestPriceCache
+
+
+def test_cache_update_and_get():
+    """Тест обновления и чтения кэша"""
+    cache = LatestPriceCache(max_age=60)
+    cache.update({'id': 1, 'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': 1000000})
+    
+    entry = cache.get('BTC_USD')
+    
+    assert entry is not None
+    assert json.loads(entry.body) == {
+        'id': 1, 'ticker': 'BTC_USD', 'price': '50000.50000000', 'timestamp': 1000000
+    }
+
+
+def test_cache_ignores_older_ticks():
+    """Тест игнорирования устаревших тиков"""
+    cache = LatestPriceCache(max_age=60)
+    cache.update({'id': 2, 'ticker': 'BTC_USD', 'price': Decimal('51000'), 'timestamp': 1000060})
+    cache.update({'id': 1, 'ticker': 'BTC_USD', 'price': Decimal('50000'), 'timestamp': 1000000})
+    
+    assert cache.get('BTC_USD').timestamp == 1000060
+
+
+def test_cache_invalidated_by_tick_without_id():
+    """Тест сброса записи тиком без id"""
+    cache = LatestPriceCache(max_age=60)
+    cache.update({'id': 1, 'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': 1000000})
+    cache.update({'ticker': 'BTC_USD', 'price': 50001.0, 'timestamp': 1000060})
+    
+    assert cache.get('BTC_USD') is None
+
+
+def test_cache_entry_expires():
+    """Тест ограничения устаревания записи"""
+    cache = LatestPriceCache(max_age=0.01)
+    cache.update({'id': 1, 'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': 1000000})
+    time.sleep(0.02)
+    
+    assert cache.get('BTC_USD') is None
+
+
+def test_price_feed_dispatches_to_handlers():
+    """Тест доставки опубликованных тиков обработчикам процесса"""
+    cache = LatestPriceCache(max_age=60)
+    price_feed.add_handler(cache.update)
+    try:
+        price_feed.dispatch([{'id': 1, 'ticker': 'ETH_USD', 'price': 3000.25, 'timestamp': 1000000}])
+    finally:
+        price_feed.remove_handler(cache.update)
+    
+    assert cache.get('ETH_USD') is not None
@@ -0,0 +1,157 @@
+"""
+Unit тесты для компактной схемы хранения тиков
+"""
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from deribit_task import compact, crud, tasks
+from deribit_task.database import Base
+from deribit_task.models import PriceRollup1m, PriceTick, PriceTickCompact, Ticker
+from deribit_task.crud import PriceRepository
+from deribit_task.compact import (
+    scale_price,
+    unscale_price,
+    compact_tick_id,
+    save_compact_ticks,
+    backfill_compact,
+    verify_compact,
+)
+
+TICKS = [
+    {'ticker': 'BTC_USD', 'price': Decimal('50000.5'), 'timestamp': 1000000},
+    {'ticker': 'BTC_USD', 'price': Decimal('49000.12345678'), 'timestamp': 1000010},
+    {'ticker': 'BTC_USD', 'price': Decimal('51000.0'), 'timestamp': 1000060},
+    {'ticker': 'ETH_USD', 'price': Decimal('3000.25'), 'timestamp': 1000000},
+]
+
+
+@pytest.fixture
+def db_session():
+    """Фикстура для создания тестовой БД с зарегистрированными тикерами"""
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add_all([Ticker(name='BTC_USD', kind='index'), Ticker(name='ETH_USD', kind='index')])
+    session.commit()
+
+    yield session
+
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+def test_scale_price():
+    """Тест перевода цены в целое число долей 1e-8 и обратно"""
+    assert scale_price(50000.5) == 5000050000000
+    assert scale_price(Decimal('0.000000015')) == 2
+    assert scale_price('1.15') == 115000000
+    assert unscale_price(5000050000000) == Decimal('50000.50000000')
+    assert str(unscale_price(115000000)) == '1.15000000'
+
+
+def test_save_compact_ticks(db_session):
+    """Тест записи тиков: первый тик в секунду сохраняется, повтор пропускается, новый тикер регистрируется"""
+    saved = save_compact_ticks(db_session, [
+        {'ticker': 'BTC_USD', 'price': 50000.0, 'timestamp': 1000000},
+        {'ticker': 'BTC_USD', 'price': 50001.0, 'timestamp': 1000000},
+        {'ticker': 'SOL_USD', 'price': 150.0, 'timestamp': 1000000},
+    ])
+    assert save_compact_ticks(db_session, [{'ticker': 'BTC_USD', 'price': 50002.5, 'timestamp': 1000000}]) == []
+    db_session.commit()
+
+    ids = dict(db_session.execute(select(Ticker.name, Ticker.id)).all())
+    rows = db_session.execute(
+        select(PriceTickCompact.ticker_id, PriceTickCompact.price).order_by(PriceTickCompact.ticker_id)
+    ).all()
+    assert sorted(saved, key=lambda tick: tick['ticker']) == [
+        {'id': compact_tick_id(ids['BTC_USD'], 1000000), 'ticker': 'BTC_USD',
+         'price': Decimal('50000.00000000'), 'timestamp': 1000000},
+        {'id': compact_tick_id(ids['SOL_USD'], 1000000), 'ticker': 'SOL_USD',
+         'price': Decimal('150.00000000'), 'timestamp': 1000000},
+    ]
+    assert rows == [(ids['BTC_USD'], 5000000000000), (ids['SOL_USD'], 15000000000)]
+
+
+def test_backfill_keeps_existing_compact_ticks(db_session):
+    """Тест: перенос истории не изменяет уже записанные компактные тики (первая запись сохраняется)"""
+    save_compact_ticks(db_session, [{'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': 1000000}])
+    db_session.add_all([
+        PriceTick(ticker='BTC_USD', price=Decimal('49999.0'), timestamp=1000000),
+        PriceTick(ticker='BTC_USD', price=Decimal('50010.0'), timestamp=1000010),
+    ])
+    db_session.commit()
+
+    assert backfill_compact(db_session) == 1
+    prices = db_session.execute(select(PriceTickCompact.timestamp, PriceTickCompact.price)
+                                .order_by(PriceTickCompact.timestamp)).all()
+    assert prices == [(1000000, 5000050000000), (1000010, 5001000000000)]
+
+
+def test_backfill_and_compact_reads_match_legacy(db_session, monkeypatch):
+    """Тест переноса истории и совпадения чтения из обеих схем"""
+    db_session.add_all([PriceTick(**tick) for tick in TICKS])
+    db_session.commit()
+
+    assert verify_compact(db_session)
+    assert backfill_compact(db_session) == len(TICKS)
+    assert backfill_compact(db_session) == 0
+    db_session.commit()
+    assert verify_compact(db_session) == []
+
+    # Та же секунда с другой ценой обнаруживается по сумме цен
+    db_session.query(PriceTickCompact).filter(PriceTickCompact.timestamp == 1000010).update({'price': 1})
+    assert [mismatch['ticker'] for mismatch in verify_compact(db_session)] == ['BTC_USD']
+    db_session.rollback()
+
+    legacy = [(tick.price, tick.timestamp) for tick in PriceRepository.get_price_by_date(db_session, 'BTC_USD')]
+    legacy_ohlc = PriceRepository.get_ohlc(db_session, 'BTC_USD', 60)
+
+    monkeypatch.setattr(crud, 'PRICE_STORAGE_READ', 'compact')
+    ticks = PriceRepository.get_price_by_date(db_session, 'BTC_USD', date_from=1000000)
+    latest = PriceRepository.get_latest_price(db_session, 'BTC_USD')
+    page = PriceRepository.get_page(db_session, 'BTC_USD', limit=2, after=(ticks[0].timestamp, ticks[0].id))
+
+    assert [(tick.price, tick.timestamp) for tick in ticks] == legacy
+    assert all(isinstance(tick, PriceTick) and tick.ticker == 'BTC_USD' for tick in ticks)
+    assert latest.price == Decimal('51000.00000000')
+    assert [tick.timestamp for tick in page] == [1000010, 1000060]
+    assert PriceRepository.get_ohlc(db_session, 'BTC_USD', 60) == legacy_ohlc
+
+
+def test_save_price_ticks_dual_write(db_session, monkeypatch):
+    """Тест записи тиков в обе схемы в режиме dual"""
+    monkeypatch.setattr(compact, 'PRICE_STORAGE_WRITE', 'dual')
+    monkeypatch.setattr(compact, 'PRICE_STORAGE_READ', 'compact')
+    published = []
+    monkeypatch.setattr(tasks, 'publish_ticks', published.extend)
+
+    assert tasks.save_price_ticks(db_session, TICKS) == len(TICKS)
+
+    assert db_session.query(PriceTick).count() == len(TICKS)
+    assert db_session.query(PriceTickCompact).count() == len(TICKS)
+    assert {tick['id'] for tick in published} == {
+        compact_tick_id(ticker_id, timestamp)
+        for ticker_id, timestamp in db_session.execute(select(PriceTickCompact.ticker_id, PriceTickCompact.timestamp))
+    }
+
+
+@pytest.mark.parametrize('mode', ['dual', 'compact'])
+def test_save_price_ticks_retry_is_idempotent(db_session, monkeypatch, mode):
+    """Тест повторной записи тика: не учитывается в свечах, не публикуется и не меняет цену"""
+    monkeypatch.setattr(compact, 'PRICE_STORAGE_WRITE', mode)
+    monkeypatch.setattr(compact, 'PRICE_STORAGE_READ', 'compact')
+    published = []
+    monkeypatch.setattr(tasks, 'publish_ticks', published.extend)
+
+    assert tasks.save_price_ticks(db_session, [{'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': 1000000}]) == 1
+    assert tasks.save_price_ticks(db_session, [{'ticker': 'BTC_USD', 'price': 50001.0, 'timestamp': 1000000}]) == 0
+
+    assert len(published) == 1
+    assert db_session.scalars(select(PriceTickCompact.price)).all() == [5000050000000]
+    assert db_session.scalars(select(PriceRollup1m.count)).all() == [1]
+    if mode == 'dual':
+        assert db_session.scalars(select(PriceTick.price)).all() == [Decimal('50000.5')]
+        assert verify_compact(db_session) == []
@@ -4,12 +4,13 @@ Unit тесты для CRUD операций
 import pytest
 from datetime import datetime
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from decimal import Decimal
 
 from deribit_task.database import Base
 from deribit_task.models import PriceTick
-from deribit_task.crud import PriceRepository
+from deribit_task.crud import PriceRepository, AsyncPriceRepository
 
 
 @pytest.fixture
@@ -77,3 +78,67 @@ def test_get_price_by_date_no_results(db_session):
     )
     
     assert len(ticks) == 0
+
+
+def test_get_page(db_session):
+    """Тест keyset-пагинации по (timestamp, id)"""
+    first_page = PriceRepository.get_page(db_session, 'BTC_USD', limit=1)
+    
+    assert len(first_page) == 1
+    assert first_page[0].timestamp == 1000000
+    
+    after = (first_page[0].timestamp, first_page[0].id)
+    second_page = PriceRepository.get_page(db_session, 'BTC_USD', limit=1, after=after)
+    
+    assert len(second_page) == 1
+    assert second_page[0].timestamp == 1000060
+
+
+def test_iter_by_ticker(db_session):
+    """Тест потоковой итерации тиков"""
+    ticks = list(PriceRepository.iter_by_ticker(db_session, 'BTC_USD', batch_size=1))
+    
+    assert [tick.timestamp for tick in ticks] == [1000000, 1000060]
+
+
+def test_get_ohlc(db_session):
+    """Тест агрегации тиков в свечи OHLC"""
+    db_session.add(PriceTick(ticker='BTC_USD', price=Decimal('49000.0'), timestamp=1000030))
+    db_session.commit()
+    
+    candles = PriceRepository.get_ohlc(db_session, 'BTC_USD', 3600)
+    
+    assert len(candles) == 1
+    candle = candles[0]
+    assert candle.timestamp == 997200
+    assert candle.open == Decimal('50000.5')
+    assert candle.high == Decimal('51000.0')
+    assert candle.low == Decimal('49000.0')
+    assert candle.close == Decimal('51000.0')
+    assert candle.count == 3
+
+
+@pytest.mark.asyncio
+async def test_async_repository(tmp_path):
+    """Тест асинхронного репозитория"""
+    db_path = tmp_path / 'test.db'
+    engine = create_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(PriceTick(ticker='BTC_USD', price=Decimal('50000.5'), timestamp=1000000))
+        session.add(PriceTick(ticker='BTC_USD', price=Decimal('51000.0'), timestamp=1000060))
+        session.commit()
+    
+    async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_path}')
+    async with async_sessionmaker(async_engine)() as db:
+        latest = await AsyncPriceRepository.get_latest_price(db, 'BTC_USD')
+        ticks = [tick async for tick in AsyncPriceRepository.iter_by_ticker(db, 'BTC_USD', batch_size=1)]
+        latest_prices = await AsyncPriceRepository.get_latest_prices(db, ['ETH_USD', 'BTC_USD'])
+        batch = await AsyncPriceRepository.get_batch_rows(db, ['ETH_USD', 'BTC_USD'], date_to=1000060, limit=1)
+    await async_engine.dispose()
+    engine.dispose()
+    
+    assert latest.timestamp == 1000060
+    assert [tick.timestamp for tick in ticks] == [1000000, 1000060]
+    assert [(row.ticker, row.timestamp) for row in latest_prices] == [('BTC_USD', 1000060)]
+    assert [(row.ticker, row.timestamp) for row in batch] == [('BTC_USD', 1000000)]
@@ -0,0 +1,81 @@
+"""
+Unit тесты для маршрутизации чтений по репликам
+"""
+import time
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from deribit_task.database import ReadReplicaRouter
+
+
+async def sqlite_engine(path, name):
+    """Создает engine SQLite с таблицей, хранящей имя БД"""
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE TABLE node (name TEXT)"))
+        await connection.execute(text("INSERT INTO node VALUES (:name)"), {'name': name})
+    return engine
+
+
+async def node(router, max_lag=None):
+    """Возвращает имя БД, выбранной для чтения"""
+    async with router.session(max_lag) as db:
+        return (await db.execute(text("SELECT name FROM node"))).scalar()
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    """Фикстура основной БД и двух реплик"""
+    engines = {name: await sqlite_engine(tmp_path / f'{name}.db', name) for name in ('primary', 'a', 'b')}
+    yield engines
+    for engine in engines.values():
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_round_robin(engines):
+    """Тест чтения с реплик по кругу"""
+    router = ReadReplicaRouter(engines['primary'], [('a', engines['a']), ('b', engines['b'])])
+
+    assert [await node(router) for _ in range(4)] == ['a', 'b', 'a', 'b']
+    assert await node(ReadReplicaRouter(engines['primary'])) == 'primary'
+
+
+@pytest.mark.asyncio
+async def test_failover(engines, tmp_path):
+    """Тест исключения недоступной реплики и перехода на основную БД"""
+    broken = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/missing/broken.db')
+    router = ReadReplicaRouter(engines['primary'], [('broken', broken), ('b', engines['b'])], retry_interval=60)
+
+    assert [await node(router) for _ in range(3)] == ['b', 'b', 'b']
+    assert router.available_replicas() == [('b', engines['b'])]
+
+    router = ReadReplicaRouter(engines['primary'], [('broken', broken)], retry_interval=0)
+    assert await node(router) == 'primary'
+    await broken.dispose()
+
+
+@pytest.mark.asyncio
+async def test_lag_guard(engines):
+    """Тест пропуска отстающей реплики для чтений с ограничением отставания"""
+    router = ReadReplicaRouter(engines['primary'], [('a', engines['a']), ('b', engines['b'])])
+    router._lag = {'a': (30.0, time.monotonic()), 'b': (0.5, time.monotonic())}
+
+    assert [await node(router, max_lag=2) for _ in range(2)] == ['b', 'b']
+    assert await node(router, max_lag=60) in ('a', 'b')
+    router._lag['b'] = (10.0, time.monotonic())
+    assert await node(router, max_lag=2) == 'primary'
+
+
+@pytest.mark.asyncio
+async def test_warm_up(engines, tmp_path):
+    """Тест прогрева пулов: недоступная реплика исключается из ротации"""
+    broken = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/missing/broken.db')
+    router = ReadReplicaRouter(engines['primary'], [('a', engines['a']), ('broken', broken)], retry_interval=60)
+
+    await router.warm_up(2)
+
+    assert [name for name, _ in router.available_replicas()] == ['a']
+    await broken.dispose()
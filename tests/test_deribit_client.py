@@ -1,9 +1,15 @@
 """
 Unit тесты для клиента Deribit
 """
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from deribit_task import deribit_client
 from deribit_task.deribit_client import DeribitClient
+from deribit_task.resilience import CircuitBreaker, TokenBucket
 
 
 @pytest.mark.asyncio
@@ -64,3 +70,144 @@ async def test_get_index_price_error():
             result = await client.get_btc_price()
             
             assert result is None
+
+
+@pytest.mark.asyncio
+async def test_get_index_prices_partial_failure():
+    """Тест параллельного получения цен, когда один из индексов недоступен"""
+    async def fake_get(index_name):
+        if index_name == 'ETH_USD':
+            raise RuntimeError('boom')
+        return {'index_price': 50000.5, 'index_name': index_name}
+
+    async with DeribitClient() as client:
+        with patch.object(client, 'get_index_price_by_name', side_effect=fake_get):
+            result = await client.get_index_prices(['BTC_USD', 'ETH_USD'])
+
+    assert result['BTC_USD']['index_price'] == 50000.5
+    assert result['ETH_USD'] is None
+
+
+@pytest.mark.asyncio
+async def test_get_mark_prices_respects_concurrency_limit():
+    """Тест ограничения числа одновременных запросов при получении mark price"""
+    active = 0
+    max_active = 0
+
+    class FakeResponse:
+        status = 200
+
+        async def __aenter__(self):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            return self
+
+        async def __aexit__(self, *args):
+            nonlocal active
+            active -= 1
+
+        async def json(self):
+            return {'result': {'mark_price': 100.5}}
+
+    instruments = [f"BTC-{i}-C" for i in range(20)]
+    async with DeribitClient(max_concurrency=3) as client:
+        with patch('aiohttp.ClientSession.get', side_effect=lambda *args, **kwargs: FakeResponse()):
+            result = await client.get_mark_prices(instruments)
+
+    assert max_active == 3
+    assert all(data['mark_price'] == 100.5 for data in result.values())
+
+
+class ScriptedDeribitServer:
+    """Локальный HTTP сервер, отвечающий по заданному сценарию"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    async def handler(self, request):
+        self.requests += 1
+        status, delay, headers = self.responses.pop(0) if self.responses else (200, 0, {})
+        if delay:
+            await asyncio.sleep(delay)
+        if status == 200:
+            return web.json_response({'result': {'index_price': 50000.5}})
+        if status == 'bad_payload':
+            return web.json_response(['unexpected'])
+        return web.json_response({'error': {'code': status}}, status=status, headers=headers)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/api/v2/public/get_index_price', self.handler)
+        self._server = TestServer(app)
+        await self._server.start_server()
+        self.base_url = str(self._server.make_url('/api/v2'))
+        return self
+
+    async def __aexit__(self, *args):
+        await self._server.close()
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    """Фикстура для коротких задержек повторов"""
+    monkeypatch.setattr(deribit_client, 'DERIBIT_RETRY_BASE_DELAY', 0.01)
+    monkeypatch.setattr(deribit_client, 'DERIBIT_RETRY_MAX_DELAY', 0.02)
+
+
+@pytest.mark.asyncio
+async def test_request_retries_server_errors_and_timeouts(fast_retries):
+    """Тест повтора запроса после ответа 503 и таймаута"""
+    async with ScriptedDeribitServer([(503, 0, {}), (200, 1, {})]) as server:
+        async with DeribitClient(server.base_url, timeout=0.2, max_retries=2,
+                                 circuit_breaker=CircuitBreaker(5, 30), rate_limiter=TokenBucket(0, 0)) as client:
+            result = await client.get_index_price_by_name('BTC_USD')
+
+    assert result['index_price'] == 50000.5
+    assert server.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_request_respects_retry_after(fast_retries):
+    """Тест паузы по заголовку Retry-After при превышении лимита запросов"""
+    limiter = TokenBucket(100, 10)
+    async with ScriptedDeribitServer([(429, 0, {'Retry-After': '0.1'})]) as server:
+        async with DeribitClient(server.base_url, circuit_breaker=CircuitBreaker(1, 30), rate_limiter=limiter) as client:
+            started = asyncio.get_running_loop().time()
+            result = await client.get_index_price_by_name('BTC_USD')
+            elapsed = asyncio.get_running_loop().time() - started
+
+    assert result['index_price'] == 50000.5
+    assert server.requests == 2
+    assert elapsed >= 0.1
+    assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_short_circuits_requests(fast_retries):
+    """Тест прекращения запросов к недоступному Deribit"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    async with ScriptedDeribitServer([(502, 0, {})] * 10) as server:
+        async with DeribitClient(server.base_url, max_retries=1, circuit_breaker=breaker,
+                                 rate_limiter=TokenBucket(0, 0)) as client:
+            results = [await client.get_index_price_by_name('BTC_USD') for _ in range(4)]
+
+    assert results == [None] * 4
+    assert server.requests == 4
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_trips_on_unexpected_errors(fast_retries):
+    """Тест: непредвиденная ошибка разбора ответа считается сбоем circuit breaker"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    async with ScriptedDeribitServer([('bad_payload', 0, {})] * 4) as server:
+        async with DeribitClient(server.base_url, max_retries=0, circuit_breaker=breaker,
+                                 rate_limiter=TokenBucket(0, 0)) as client:
+            results = [await client.get_index_price_by_name('BTC_USD') for _ in range(3)]
+
+    assert results == [None] * 3
+    assert server.requests == 2
+    assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,126 @@
+"""
+Unit тесты для поиска и заполнения пропусков в ряду тиков
+"""
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from deribit_task import gaps, tasks
+from deribit_task.database import Base
+from deribit_task.models import PriceTick
+from deribit_task.tickers import KIND_MARK, TickerInfo, TickerRegistry
+from deribit_task.gaps import Gap, backfill_gaps, chart_resolution, find_gaps, request_windows
+
+# Тики каждые 60 секунд с пропусками 1000180 - 1000480 и после 1000600
+TIMESTAMPS = [1000000, 1000060, 1000120, 1000180, 1000480, 1000540, 1000600]
+
+
+class FakeHistoryClient:
+    """Клиент Deribit, отдающий минутные свечи с ценой открытия, равной времени свечи"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def get_chart_data(self, instrument_name, start_timestamp, end_timestamp, resolution):
+        self.requests.append((instrument_name, start_timestamp // 1000, end_timestamp // 1000, resolution))
+        ticks = [timestamp * 1000 for timestamp in range(start_timestamp // 1000 // 60 * 60,
+                                                         end_timestamp // 1000 + 1, 60)]
+        return {'status': 'ok', 'ticks': ticks, 'open': [timestamp / 1000 for timestamp in ticks]}
+
+
+@pytest.fixture
+def db_session():
+    """Фикстура для создания тестовой БД с тиками BTC_USD"""
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add_all([PriceTick(ticker='BTC_USD', price=50000.0, timestamp=timestamp) for timestamp in TIMESTAMPS])
+    session.commit()
+
+    yield session
+
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+def test_find_gaps(db_session):
+    """Тест поиска внутренних пропусков и пропусков в начале и конце периода"""
+    assert find_gaps(db_session, 'BTC_USD', interval=60) == [Gap('BTC_USD', 1000210, 1000450)]
+    assert find_gaps(db_session, 'BTC_USD', date_to=1000900, interval=60) == [
+        Gap('BTC_USD', 1000210, 1000450),
+        Gap('BTC_USD', 1000630, 1000900),
+    ]
+    assert find_gaps(db_session, 'BTC_USD', date_from=1000400, date_to=1000620, interval=60) == []
+    assert find_gaps(db_session, 'BTC_USD', date_from=999700, date_to=1000120, interval=60) == [
+        Gap('BTC_USD', 999700, 999970),
+    ]
+    # Тикер без тиков в периоде - один пропуск на весь период
+    assert find_gaps(db_session, 'ETH_USD', date_from=1000000, date_to=1000900, interval=60) == [
+        Gap('ETH_USD', 1000000, 1000900),
+    ]
+    assert find_gaps(db_session, 'ETH_USD', date_to=1000900, interval=60) == []
+
+
+def test_request_windows():
+    """Тест объединения коротких пропусков и разбиения длинных на запросы"""
+    gaps = [Gap('BTC_USD', 0, 100), Gap('BTC_USD', 200, 300), Gap('BTC_USD', 1000, 2500)]
+    assert request_windows(gaps, 1000) == [(0, 300), (1000, 1999), (2000, 2500)]
+    assert chart_resolution(60) == 1
+    assert chart_resolution(30) == 1
+    assert chart_resolution(600) == 10
+
+
+@pytest.mark.asyncio
+async def test_backfill_gaps(db_session, monkeypatch):
+    """Тест заполнения пропусков историей инструмента без публикации в канал новых цен"""
+    published = []
+    monkeypatch.setattr(tasks, 'publish_ticks', published.extend)
+    db_session.add_all([PriceTick(ticker='BTC-PERPETUAL', price=50000.0, timestamp=timestamp) for timestamp in TIMESTAMPS])
+    db_session.commit()
+    client = FakeHistoryClient()
+    tickers = [TickerInfo('BTC_USD'), TickerInfo('BTC-PERPETUAL', KIND_MARK), TickerInfo('ETH-PERPETUAL', KIND_MARK)]
+
+    filled = await backfill_gaps(db_session, client, date_from=1000000, date_to=1000900, tickers=tickers, interval=60)
+
+    # Индекс не заполняется историей другого инструмента, тикер без тиков заполняется за весь период
+    assert filled == {'BTC-PERPETUAL': 8, 'ETH-PERPETUAL': 15}
+    assert [request[0] for request in client.requests] == ['BTC-PERPETUAL', 'ETH-PERPETUAL']
+    assert published == []
+    timestamps = [tick.timestamp for tick in db_session.query(PriceTick).filter(PriceTick.ticker == 'BTC-PERPETUAL')
+                  .order_by(PriceTick.timestamp)]
+    assert timestamps == sorted(TIMESTAMPS + [1000260, 1000320, 1000380, 1000440, 1000680, 1000740, 1000800, 1000860])
+    assert db_session.query(PriceTick).filter(PriceTick.ticker == 'BTC_USD').count() == len(TIMESTAMPS)
+    for name in ('BTC-PERPETUAL', 'ETH-PERPETUAL'):
+        assert find_gaps(db_session, name, date_from=1000000, date_to=1000900, interval=60) == []
+
+    assert await backfill_gaps(db_session, client, date_from=1000000, date_to=1000900,
+                               tickers=tickers[1:], interval=60) == {}
+
+
+@pytest.mark.asyncio
+async def test_backfill_gaps_default_tickers(db_session, monkeypatch):
+    """Тест: по умолчанию проверяются только тикеры реестра с историей цен"""
+    registry = TickerRegistry([TickerInfo('BTC_USD'), TickerInfo('ETH-PERPETUAL', KIND_MARK)])
+    monkeypatch.setattr(gaps, 'ticker_registry', registry)
+    monkeypatch.setattr(tasks, 'publish_ticks', lambda ticks: None)
+    client = FakeHistoryClient()
+
+    filled = await backfill_gaps(db_session, client, date_from=1000000, date_to=1000900, interval=60)
+
+    assert filled == {'ETH-PERPETUAL': 15}
+    assert [request[0] for request in client.requests] == ['ETH-PERPETUAL']
+
+
+def test_backfill_price_gaps_skipped_without_mark_tickers(monkeypatch):
+    """Тест: задача без тикеров mark price в реестре не ищет пропуски и не запускает заполнение"""
+    monkeypatch.setattr(gaps, 'ticker_registry', TickerRegistry([TickerInfo('BTC_USD'), TickerInfo('ETH_USD')]))
+    monkeypatch.setattr(gaps, 'SessionLocal', MagicMock())
+    monkeypatch.setattr(gaps, 'refresh_registry', lambda db: None)
+    runtime = MagicMock()
+    monkeypatch.setattr(gaps, 'worker_runtime', runtime)
+
+    gaps.backfill_price_gaps()
+
+    runtime.run.assert_not_called()
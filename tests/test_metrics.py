@@ -0,0 +1,84 @@
+"""
+Unit тесты для метрик Prometheus
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import create_engine, text
+from prometheus_client import REGISTRY
+
+from deribit_task.deribit_client import DeribitClient
+from deribit_task.metrics import instrument_engine, observe_tick, timed_query
+
+
+def sample(name, **labels):
+    """Возвращает значение метрики из реестра по умолчанию"""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class FakeRepository:
+    """Репозиторий для проверки декоратора"""
+
+    @staticmethod
+    @timed_query
+    def get_one():
+        return 1
+
+    @staticmethod
+    @timed_query
+    async def iter_rows():
+        for row in range(3):
+            yield row
+
+
+@pytest.mark.asyncio
+async def test_timed_query():
+    """Тест замера времени методов репозитория"""
+    labels = {'repository': 'FakeRepository'}
+    before = sample('deribit_db_query_duration_seconds_count', method='get_one', **labels)
+    
+    assert FakeRepository.get_one() == 1
+    assert [row async for row in FakeRepository.iter_rows()] == [0, 1, 2]
+    
+    assert sample('deribit_db_query_duration_seconds_count', method='get_one', **labels) == before + 1
+    assert sample('deribit_db_query_duration_seconds_count', method='iter_rows', **labels) == 1
+
+
+def test_instrument_engine(tmp_path):
+    """Тест метрик пула соединений"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    instrument_engine(engine, 'test')
+    
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        assert sample('deribit_db_pool_checked_out', engine='test') == 1
+    
+    assert sample('deribit_db_pool_checked_out', engine='test') == 0
+    assert sample('deribit_db_pool_checkout_wait_seconds_count', engine='test') == 1
+    engine.dispose()
+
+
+def test_observe_tick():
+    """Тест метрик последнего тика и отставания"""
+    observe_tick({'ticker': 'LAG_USD', 'price': 1.0, 'timestamp': 1000000})
+    observe_tick({'ticker': 'LAG_USD', 'price': 1.0, 'timestamp': 999999})
+    
+    assert sample('deribit_last_tick_timestamp_seconds', ticker='LAG_USD') == 1000000
+    assert sample('deribit_ingestion_lag_seconds', ticker='LAG_USD') > 0
+
+
+@pytest.mark.asyncio
+async def test_deribit_client_error_metrics():
+    """Тест счетчика ошибок запросов к Deribit"""
+    labels = {'index_name': 'BTC_USD', 'reason': 'http_500'}
+    before = sample('deribit_client_request_errors_total', **labels)
+    
+    async with DeribitClient(max_retries=0) as client:
+        with patch('aiohttp.ClientSession.get') as mock_get:
+            mock_response = AsyncMock()
+            mock_response.status = 500
+            mock_get.return_value.__aenter__.return_value = mock_response
+            
+            assert await client.get_btc_price() is None
+    
+    assert sample('deribit_client_request_errors_total', **labels) == before + 1
+    assert sample('deribit_client_request_duration_seconds_count', index_name='BTC_USD') >= 1
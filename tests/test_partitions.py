@@ -0,0 +1,55 @@
+"""
+Unit тесты для обслуживания партиций price_ticks
+"""
+from sqlalchemy import create_engine
+
+from deribit_task.partitions import (
+    add_months,
+    month_of,
+    partition_name,
+    partition_bounds,
+    parse_partition_name,
+    plan_partitions,
+    maintain_partitions,
+)
+
+# 2024-03-15 12:00:00 UTC
+NOW = 1710504000
+
+
+def test_month_helpers():
+    """Тест вычисления месяцев и границ партиций"""
+    assert month_of(NOW) == (2024, 3)
+    assert add_months((2024, 11), 3) == (2025, 2)
+    assert add_months((2024, 1), -1) == (2023, 12)
+    assert partition_bounds((2024, 12)) == (1733011200, 1735689600)
+    assert partition_name((2024, 3)) == 'price_ticks_p202403'
+    assert parse_partition_name('price_ticks_p202403') == (2024, 3)
+    assert parse_partition_name('price_ticks_default') is None
+
+
+def test_plan_partitions():
+    """Тест планирования создания и устаревания партиций"""
+    existing = [(2023, 12), (2024, 1), (2024, 2), (2024, 3)]
+    
+    to_create, to_expire = plan_partitions(existing, NOW, premake_months=2, retention_months=2)
+    
+    assert to_create == [(2024, 4), (2024, 5)]
+    assert to_expire == [(2023, 12), (2024, 1)]
+
+
+def test_plan_partitions_without_retention():
+    """Тест бессрочного хранения партиций"""
+    to_create, to_expire = plan_partitions([(2020, 1)], NOW, premake_months=0, retention_months=0)
+    
+    assert to_create == [(2024, 3)]
+    assert to_expire == []
+
+
+def test_maintain_partitions_skips_other_dialects():
+    """Тест пропуска обслуживания партиций вне PostgreSQL"""
+    engine = create_engine('sqlite:///:memory:')
+    with engine.begin() as connection:
+        result = maintain_partitions(connection, NOW, 3, 12, False)
+    
+    assert result == {'created': [], 'expired': []}
@@ -0,0 +1,62 @@
+"""
+Unit тесты для примитивов устойчивости запросов
+"""
+from deribit_task.resilience import CircuitBreaker, TokenBucket, backoff_delay
+
+
+class FakeClock:
+    """Управляемые часы"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backoff_delay():
+    """Тест роста задержки повторов с джиттером и ограничением сверху"""
+    for attempt, expected in [(0, 0.5), (1, 1.0), (3, 4.0), (10, 5.0)]:
+        delay = backoff_delay(attempt, 0.5, 5.0)
+        assert expected / 2 <= delay <= expected
+
+
+def test_token_bucket():
+    """Тест резервирования токенов, пополнения и штрафа за превышение лимита"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.1, 0.2]
+
+    clock.now = 1.0
+    assert bucket.reserve() == 0.0
+
+    bucket.penalize(0.5)
+    assert bucket.reserve() == 0.6
+
+    assert TokenBucket(rate=0, capacity=0).reserve() == 0.0
+
+
+def test_circuit_breaker_transitions():
+    """Тест размыкания, пробного запроса и замыкания circuit breaker"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
@@ -0,0 +1,88 @@
+"""
+Unit тесты для таблиц предагрегированных свечей
+"""
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from deribit_task.database import Base
+from deribit_task.models import PriceTick, PriceRollup1m, PriceRollup1h
+from deribit_task.crud import PriceRepository
+from deribit_task.rollups import aggregate_ticks, upsert_rollups, rebuild_rollups
+
+TICKS = [
+    {'ticker': 'BTC_USD', 'price': Decimal('50000.5'), 'timestamp': 1000000},
+    {'ticker': 'BTC_USD', 'price': Decimal('49000.0'), 'timestamp': 1000010},
+    {'ticker': 'BTC_USD', 'price': Decimal('51000.0'), 'timestamp': 1000060},
+    {'ticker': 'BTC_USD', 'price': Decimal('50500.0'), 'timestamp': 1000130},
+    {'ticker': 'ETH_USD', 'price': Decimal('3000.25'), 'timestamp': 1000000},
+]
+
+
+@pytest.fixture
+def db_session():
+    """Фикстура для создания тестовой БД"""
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    
+    yield session
+    
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+def candles(session, model):
+    """Возвращает свечи таблицы в виде кортежей"""
+    rows = session.query(model).order_by(model.ticker, model.bucket).all()
+    return [
+        (row.ticker, row.bucket, row.open, row.high, row.low, row.close, row.count)
+        for row in rows
+    ]
+
+
+def test_aggregate_ticks():
+    """Тест свертки пачки тиков в свечи"""
+    rows = aggregate_ticks(TICKS, 3600)
+    btc = next(row for row in rows if row['ticker'] == 'BTC_USD')
+    
+    assert len(rows) == 2
+    assert btc['open'] == Decimal('50000.5')
+    assert btc['close'] == Decimal('50500.0')
+    assert btc['high'] == Decimal('51000.0')
+    assert btc['low'] == Decimal('49000.0')
+    assert btc['count'] == 4
+
+
+def test_incremental_upsert_matches_rebuild(db_session):
+    """Тест совпадения инкрементального обновления с пересборкой из сырых тиков"""
+    # Пачки приходят не по порядку, чтобы проверить обновление open и close
+    upsert_rollups(db_session, TICKS[2:])
+    upsert_rollups(db_session, TICKS[:2])
+    db_session.commit()
+    incremental = {model: candles(db_session, model) for model in (PriceRollup1m, PriceRollup1h)}
+    
+    for tick in TICKS:
+        db_session.add(PriceTick(**tick))
+    db_session.commit()
+    rebuild_rollups(db_session)
+    db_session.commit()
+    
+    for model in (PriceRollup1m, PriceRollup1h):
+        assert candles(db_session, model) == incremental[model]
+
+
+def test_get_ohlc_from_rollups_merges_smaller_candles(db_session):
+    """Тест получения 5-минутных свечей из минутных"""
+    for tick in TICKS:
+        db_session.add(PriceTick(**tick))
+    db_session.commit()
+    rebuild_rollups(db_session)
+    db_session.commit()
+    
+    from_rollups = PriceRepository.get_ohlc_from_rollups(db_session, 'BTC_USD', 300)
+    from_ticks = PriceRepository.get_ohlc(db_session, 'BTC_USD', 300)
+    
+    assert [tuple(row) for row in from_rollups] == [tuple(row) for row in from_ticks]
@@ -0,0 +1,47 @@
+"""
+Unit тесты для высокочастотного сэмплера цен
+"""
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from deribit_task.sampler import PriceSampler, next_boundary
+
+
+def test_next_boundary():
+    """Тест выравнивания опроса по границе интервала"""
+    assert next_boundary(1000.0, 5) == 1005
+    assert next_boundary(1003.999, 5) == 1005
+    assert next_boundary(1004.2, 1) == 1005
+
+    with pytest.raises(ValueError):
+        PriceSampler(client=None, on_ticks=None, interval=0)
+
+
+@pytest.mark.asyncio
+async def test_sampler_aligns_slots_and_skips_overrun():
+    """Тест опросов на границах интервала без наложения долгих опросов"""
+    slots = []
+    received = []
+
+    async def fake_fetch_ticks(client, timestamp):
+        slots.append(timestamp)
+        if len(slots) == 1:
+            # Первый опрос дольше интервала: следующая граница должна быть пропущена
+            await asyncio.sleep(1.2)
+        return [{'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': timestamp}]
+
+    async def on_ticks(ticks):
+        received.extend(ticks)
+        if len(received) == 2:
+            await sampler.stop()
+
+    sampler = PriceSampler(client=None, on_ticks=on_ticks, interval=1)
+    with patch('deribit_task.sampler.fetch_ticks', fake_fetch_ticks), \
+            patch('deribit_task.sampler.ticker_registry.names', return_value=['BTC_USD']):
+        await asyncio.wait_for(sampler.run(), timeout=10)
+
+    assert len(slots) == 2
+    assert slots[1] - slots[0] == 2
+    assert sampler.samples == 2
+    assert sampler.missed == 1
@@ -0,0 +1,72 @@
+"""
+Unit тесты для потокового ингестера
+"""
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from deribit_task.streaming import DeribitStreamClient
+
+
+class FakeDeribitWS:
+    """Локальный WebSocket сервер, имитирующий Deribit"""
+
+    def __init__(self, ticks_per_connection):
+        self.ticks_per_connection = ticks_per_connection
+        self.connections = 0
+        self.subscriptions = []
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+
+        async for msg in ws:
+            message = msg.json()
+            if message['method'] == 'public/subscribe':
+                channels = message['params']['channels']
+                self.subscriptions.append(channels)
+                await ws.send_json({'jsonrpc': '2.0', 'id': message['id'], 'result': channels})
+                for price, timestamp in self.ticks_per_connection:
+                    await ws.send_json({
+                        'jsonrpc': '2.0',
+                        'method': 'subscription',
+                        'params': {
+                            'channel': 'deribit_price_index.btc_usd',
+                            'data': {'index_name': 'btc_usd', 'price': price, 'timestamp': timestamp},
+                        },
+                    })
+                # Обрываем соединение, чтобы клиент переподключился
+                await ws.close()
+        return ws
+
+
+@pytest.mark.asyncio
+async def test_stream_client_receives_ticks_and_reconnects():
+    """Тест получения тиков и переподключения после обрыва"""
+    fake = FakeDeribitWS([(50000.5, 1000000123), (50001.0, 1000000456)])
+    app = web.Application()
+    app.router.add_get('/ws/api/v2', fake.handler)
+
+    received = []
+    async with TestServer(app) as server:
+        async def on_tick(ticker, price, timestamp):
+            received.append((ticker, price, timestamp))
+            if len(received) == 4:
+                await client.stop()
+
+        client = DeribitStreamClient(
+            on_tick,
+            index_names=['BTC_USD'],
+            ws_url=str(server.make_url('/ws/api/v2')),
+            min_delay=0.01,
+            max_delay=0.02,
+            heartbeat_interval=0,
+        )
+        await asyncio.wait_for(client.run(), timeout=5)
+
+    assert fake.connections == 2
+    assert fake.subscriptions[0] == ['deribit_price_index.btc_usd']
+    assert received[:2] == [('BTC_USD', 50000.5, 1000000123), ('BTC_USD', 50001.0, 1000000456)]
+
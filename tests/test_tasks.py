@@ -0,0 +1,135 @@
+"""
+Unit тесты для Celery задач
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from deribit_task.database import Base
+from deribit_task.models import PriceTick, PriceRollup1m
+from deribit_task.tasks import save_price_ticks, fetch_and_save_prices, fetch_prices
+from deribit_task.worker_runtime import WorkerRuntime
+
+
+@pytest.fixture
+def db_session():
+    """Фикстура для создания тестовой БД"""
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    
+    yield session
+    
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+def test_save_price_ticks(db_session):
+    """Тест пакетного сохранения тиков"""
+    saved = save_price_ticks(db_session, [
+        {'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': 1000000},
+        {'ticker': 'ETH_USD', 'price': 3000.25, 'timestamp': 1000000},
+    ])
+    
+    assert saved == 2
+    assert db_session.query(PriceTick).count() == 2
+
+
+def test_save_price_ticks_skips_duplicates(db_session, monkeypatch):
+    """Тест идемпотентной записи: повторная пачка не создает дубликатов и не учитывается в свечах"""
+    published = []
+    monkeypatch.setattr('deribit_task.tasks.publish_ticks', published.extend)
+    ticks = [
+        {'ticker': 'BTC_USD', 'price': 50000.5, 'timestamp': 1000000},
+        {'ticker': 'BTC_USD', 'price': 50001.0, 'timestamp': 1000000},
+        {'ticker': 'ETH_USD', 'price': 3000.25, 'timestamp': 1000000},
+    ]
+
+    assert save_price_ticks(db_session, ticks) == 2
+    assert save_price_ticks(db_session, ticks) == 0
+
+    rows = db_session.query(PriceTick.ticker, PriceTick.price).order_by(PriceTick.ticker).all()
+    assert rows == [('BTC_USD', Decimal('50000.5')), ('ETH_USD', Decimal('3000.25'))]
+    assert [tick['ticker'] for tick in published] == ['BTC_USD', 'ETH_USD']
+    assert {candle.ticker: candle.count for candle in db_session.query(PriceRollup1m)} == {'BTC_USD': 1, 'ETH_USD': 1}
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_save_prices_partial_failure(db_session):
+    """Тест сохранения цен, когда один из тикеров недоступен"""
+    prices = {
+        'BTC_USD': {'index_price': 50000.5, 'index_name': 'BTC_USD'},
+        'ETH_USD': None,
+    }
+    
+    with patch('deribit_task.tasks.DeribitClient.get_index_prices', AsyncMock(return_value=prices)):
+        await fetch_and_save_prices(db_session, 1000000)
+    
+    ticks = db_session.query(PriceTick).all()
+    assert len(ticks) == 1
+    assert ticks[0].ticker == 'BTC_USD'
+    assert ticks[0].price == Decimal('50000.5')
+
+
+def test_fetch_prices_reuses_worker_runtime(db_session):
+    """Тест переиспользования event loop и HTTP сессии процесса между запусками задачи"""
+    prices = {'BTC_USD': {'index_price': 50000.5}, 'ETH_USD': {'index_price': 3000.25}}
+    runtime = WorkerRuntime()
+    sessions = []
+
+    async def fake_get_index_prices(self, index_names):
+        sessions.append(self.session)
+        return prices
+
+    with patch('deribit_task.tasks.worker_runtime', runtime), \
+            patch('deribit_task.tasks.SessionLocal', return_value=db_session), \
+            patch('deribit_task.tasks.DeribitClient.get_index_prices', fake_get_index_prices):
+        fetch_prices()
+        loop = runtime.loop
+        fetch_prices()
+
+    assert runtime.loop is loop
+    assert len(sessions) == 2 and sessions[0] is sessions[1] and not sessions[0].closed
+
+    runtime.close()
+    assert loop.is_closed()
+    assert sessions[0].closed
+
+
+def test_fetch_prices_uses_slot_timestamp(db_session):
+    """Тест: запуск задачи с задержкой получает время начала интервала опроса"""
+    prices = {'BTC_USD': {'index_price': 50000.5}, 'ETH_USD': {'index_price': 3000.25}}
+    runtime = WorkerRuntime()
+
+    with patch('deribit_task.tasks.worker_runtime', runtime), \
+            patch('deribit_task.tasks.SessionLocal', return_value=db_session), \
+            patch('deribit_task.tasks.FETCH_PRICES_INTERVAL', 60), \
+            patch('deribit_task.tasks.time.time', return_value=1000037.4), \
+            patch('deribit_task.tasks.DeribitClient.get_index_prices', AsyncMock(return_value=prices)):
+        fetch_prices()
+    runtime.close()
+
+    assert {tick.timestamp for tick in db_session.query(PriceTick).all()} == {1000020}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('source, expected', [
+    ('slot', {'BTC_USD': 1000000, 'ETH_USD': 1000000}),
+    ('exchange', {'BTC_USD': 1000003, 'ETH_USD': 1000000}),
+])
+async def test_fetch_and_save_prices_timestamp_source(db_session, monkeypatch, source, expected):
+    """Тест времени тика: граница опроса или время расчета цены биржей, если оно есть в ответе"""
+    monkeypatch.setattr('deribit_task.tasks.SAMPLE_TIMESTAMP_SOURCE', source)
+    prices = {
+        'BTC_USD': {'index_price': 50000.5, 'timestamp': 1000003250},
+        'ETH_USD': {'index_price': 3000.25},
+    }
+    
+    with patch('deribit_task.tasks.DeribitClient.get_index_prices', AsyncMock(return_value=prices)):
+        await fetch_and_save_prices(db_session, 1000000)
+    
+    ticks = {tick.ticker: tick.timestamp for tick in db_session.query(PriceTick).all()}
+    assert ticks == expected
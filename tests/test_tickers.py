@@ -0,0 +1,47 @@
+"""
+Unit тесты для реестра тикеров
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from deribit_task.database import Base
+from deribit_task.tickers import KIND_INDEX, KIND_MARK, TickerInfo, TickerRegistry, sync_tickers
+
+
+@pytest.fixture
+def engine():
+    """Фикстура для создания тестовой БД"""
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    
+    yield engine
+    
+    engine.dispose()
+
+
+def test_registry_lookup():
+    """Тест поиска тикеров в реестре"""
+    registry = TickerRegistry([TickerInfo('BTC_USD'), TickerInfo('BTC-PERPETUAL', KIND_MARK)])
+    
+    assert 'BTC_USD' in registry
+    assert 'XRP_USD' not in registry
+    assert registry.names(KIND_INDEX) == ['BTC_USD']
+    assert registry.names(KIND_MARK) == ['BTC-PERPETUAL']
+
+
+def test_sync_and_load_from_db(engine):
+    """Тест регистрации тикеров в таблице и загрузки реестра из БД"""
+    tickers = [TickerInfo(f"IDX{i}_USD") for i in range(300)] + [TickerInfo('BTC-27DEC24-100000-C', KIND_MARK)]
+    
+    with engine.begin() as connection:
+        assert sync_tickers(connection, tickers) == 301
+        assert sync_tickers(connection, tickers[:10]) == 0
+    
+    registry = TickerRegistry()
+    with engine.connect() as connection:
+        registry.load_from_db(connection)
+    
+    assert len(registry) == 301
+    option = registry.get('BTC-27DEC24-100000-C')
+    assert option.kind == KIND_MARK
+    assert registry.get_by_id(option.id) == option
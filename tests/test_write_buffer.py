@@ -0,0 +1,95 @@
+"""
+Unit тесты для буфера пакетной записи
+"""
+import asyncio
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from deribit_task.database import Base
+from deribit_task.models import PriceTick
+from deribit_task.write_buffer import PriceTickBuffer
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Фикстура для создания тестовой БД"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'ticks.db'}")
+    Base.metadata.create_all(engine)
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def count_ticks(engine):
+    """Возвращает количество тиков в БД"""
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(PriceTick)).scalar()
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_by_size(engine):
+    """Тест сброса буфера при достижении размера пачки"""
+    async with PriceTickBuffer(engine, max_batch_size=10, flush_interval=60) as buffer:
+        for i in range(25):
+            await buffer.put('BTC_USD', 50000.0 + i, 1000000 + i)
+
+    assert count_ticks(engine) == 25
+    assert buffer.stats.flushes == 3
+    assert buffer.stats.max_batch_size == 10
+    assert buffer.stats.last_batch_size == 5
+    assert buffer.stats.ticks_written == 25
+
+
+@pytest.mark.asyncio
+async def test_buffer_counts_duplicates_separately(engine):
+    """Тест: пропущенные дубликаты не учитываются в записанных тиках"""
+    async with PriceTickBuffer(engine, max_batch_size=10, flush_interval=60) as buffer:
+        for i in range(10):
+            await buffer.put('BTC_USD', 50000.0 + i, 1000000 + i % 4)
+
+    assert count_ticks(engine) == 4
+    assert buffer.stats.ticks_written == 4
+    assert buffer.stats.ticks_duplicated == 6
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_by_interval(engine):
+    """Тест сброса буфера по таймеру"""
+    async with PriceTickBuffer(engine, max_batch_size=1000, flush_interval=0.05) as buffer:
+        await buffer.put('ETH_USD', 3000.25, 1000000)
+        await asyncio.sleep(0.3)
+
+        assert count_ticks(engine) == 1
+        assert buffer.stats.flushes == 1
+        assert buffer.stats.last_flush_latency > 0
+
+
+@pytest.mark.asyncio
+async def test_buffer_backpressure(engine):
+    """Тест ожидания свободного места в переполненном буфере"""
+    buffer = PriceTickBuffer(engine, max_batch_size=10, flush_interval=60, max_pending=2)
+    await buffer.put('BTC_USD', 1.0, 1)
+    await buffer.put('BTC_USD', 2.0, 2)
+
+    # Фоновая задача не запущена, поэтому третий тик не помещается
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(buffer.put('BTC_USD', 3.0, 3), timeout=0.1)
+
+    buffer.start()
+    await buffer.put('BTC_USD', 3.0, 3)
+    await buffer.close()
+
+    assert count_ticks(engine) == 3
+
+
+@pytest.mark.asyncio
+async def test_buffer_rejects_put_after_close(engine):
+    """Тест запрета записи в закрытый буфер"""
+    buffer = PriceTickBuffer(engine)
+    buffer.start()
+    await buffer.close()
+
+    with pytest.raises(RuntimeError):
+        await buffer.put('BTC_USD', 1.0, 1)
@@ -0,0 +1,168 @@
+"""
+Реестр тикеров
+
+Тикер - индекс Deribit (цена берется из public/get_index_price) или
+инструмент (фьючерс, опцион), по которому сохраняется mark price из
+public/ticker. Реестр загружается из конфигурации (SUPPORTED_TICKERS,
+MARK_PRICE_INSTRUMENTS) или из таблицы tickers (TICKER_REGISTRY_SOURCE=db).
+
+Регистрация тикеров конфигурации в таблице: python -m deribit_task.tickers sync
+"""
+import argparse
+import logging
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from deribit_task.config import SUPPORTED_TICKERS, MARK_PRICE_INSTRUMENTS, TICKER_REGISTRY_SOURCE
+from deribit_task.models import Ticker
+
+logger = logging.getLogger(__name__)
+
+KIND_INDEX = 'index'
+KIND_MARK = 'mark'
+
+
+class TickerInfo(NamedTuple):
+    """
+    Запись реестра: имя тикера, вид цены и id в таблице tickers (если известен)
+    """
+    name: str
+    kind: str = KIND_INDEX
+    id: Optional[int] = None
+
+
+class TickerRegistry:
+    """
+    Набор поддерживаемых тикеров с проверкой по имени за O(1)
+
+    Содержимое заменяется целиком, поэтому читатели из других потоков
+    всегда видят согласованный набор.
+    """
+
+    def __init__(self, tickers: Iterable[TickerInfo] = ()):
+        """
+        Инициализация реестра
+
+        :param tickers: Начальный набор тикеров
+        """
+        self._by_name: Dict[str, TickerInfo] = {}
+        self._by_id: Dict[int, TickerInfo] = {}
+        self.replace(tickers)
+
+    def replace(self, tickers: Iterable[TickerInfo]):
+        """
+        Заменяет набор тикеров
+        """
+        by_name = {ticker.name: ticker for ticker in tickers}
+        self._by_id = {ticker.id: ticker for ticker in by_name.values() if ticker.id is not None}
+        self._by_name = by_name
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __iter__(self) -> Iterator[TickerInfo]:
+        return iter(list(self._by_name.values()))
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def get(self, name: str) -> Optional[TickerInfo]:
+        """
+        Получает тикер по имени
+        """
+        return self._by_name.get(name)
+
+    def get_by_id(self, ticker_id: int) -> Optional[TickerInfo]:
+        """
+        Получает тикер по id в таблице tickers
+        """
+        return self._by_id.get(ticker_id)
+
+    def names(self, kind: Optional[str] = None) -> List[str]:
+        """
+        Возвращает имена тикеров
+
+        :param kind: Вид цены (index или mark), по умолчанию все тикеры
+        """
+        return [ticker.name for ticker in self._by_name.values() if kind is None or ticker.kind == kind]
+
+    def load_from_db(self, db: Union[Connection, Session]):
+        """
+        Заменяет набор тикеров включенными тикерами из таблицы tickers
+
+        :param db: Соединение или сессия БД
+        """
+        rows = db.execute(
+            select(Ticker.id, Ticker.name, Ticker.kind).where(Ticker.enabled.is_(True)).order_by(Ticker.id)
+        )
+        self.replace(TickerInfo(name=name, kind=kind, id=ticker_id) for ticker_id, name, kind in rows)
+        logger.info(f"Загружено тикеров из БД: {len(self)}")
+
+
+def tickers_from_config() -> List[TickerInfo]:
+    """
+    Возвращает тикеры из конфигурации
+    """
+    return (
+        [TickerInfo(name, KIND_INDEX) for name in SUPPORTED_TICKERS]
+        + [TickerInfo(name, KIND_MARK) for name in MARK_PRICE_INSTRUMENTS]
+    )
+
+
+def sync_tickers(db: Union[Connection, Session], tickers: Iterable[TickerInfo]) -> int:
+    """
+    Регистрирует в таблице tickers отсутствующие в ней тикеры
+
+    Выполняется в текущей транзакции db, фиксацию выполняет вызывающий код.
+
+    :param db: Соединение или сессия БД
+    :param tickers: Тикеры для регистрации
+    :return: Количество добавленных тикеров
+    """
+    existing = set(db.execute(select(Ticker.name)).scalars())
+    missing = [{'name': ticker.name, 'kind': ticker.kind} for ticker in tickers if ticker.name not in existing]
+    if missing:
+        db.execute(insert(Ticker), missing)
+    logger.info(f"Зарегистрировано новых тикеров: {len(missing)}")
+    return len(missing)
+
+
+def refresh_registry(db: Union[Connection, Session]):
+    """
+    Перечитывает реестр из БД, если источником реестра выбрана таблица tickers
+    """
+    if TICKER_REGISTRY_SOURCE == 'db':
+        ticker_registry.load_from_db(db)
+
+
+ticker_registry = TickerRegistry(tickers_from_config())
+
+
+def main():
+    """
+    Точка входа командной строки
+    """
+    from deribit_task.database import engine
+
+    parser = argparse.ArgumentParser(description="Управление реестром тикеров")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('sync', help="Зарегистрировать тикеры из конфигурации в таблице tickers")
+    subparsers.add_parser('list', help="Показать тикеры из таблицы tickers")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with engine.begin() as connection:
+        if args.command == 'sync':
+            sync_tickers(connection, tickers_from_config())
+        registry = TickerRegistry()
+        registry.load_from_db(connection)
+    if args.command == 'list':
+        for ticker in registry:
+            print(f"{ticker.id}\t{ticker.kind}\t{ticker.name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Окружение процесса Celery worker: event loop и клиент Deribit
+
+Event loop и HTTP сессия клиента с пулом keep-alive соединений создаются
+один раз на процесс (worker_process_init для prefork пула или при первой
+задаче для solo пула) и закрываются при завершении процесса, поэтому
+задачи переиспользуют прогретые соединения вместо новой сессии,
+DNS запроса и TLS handshake на каждый цикл.
+"""
+import asyncio
+import logging
+import os
+from typing import Awaitable, Optional, TypeVar
+
+from deribit_task.config import DERIBIT_API_URL
+from deribit_task.deribit_client import DeribitClient
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class WorkerRuntime:
+    """
+    Event loop и клиент Deribit, общие для задач одного процесса
+    """
+
+    def __init__(self, base_url: str = DERIBIT_API_URL):
+        """
+        Инициализация окружения
+
+        :param base_url: Базовый URL API Deribit
+        """
+        self.base_url = base_url
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.client: Optional[DeribitClient] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def started(self) -> bool:
+        """
+        Создано ли окружение в текущем процессе
+        """
+        return self.loop is not None and self._pid == os.getpid()
+
+    def start(self):
+        """
+        Создает event loop и открывает HTTP сессию клиента Deribit
+
+        Окружение, унаследованное от родительского процесса при fork,
+        не используется: его loop и соединения принадлежат родителю.
+        """
+        if self.started:
+            return
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._pid = os.getpid()
+        self.client = DeribitClient(self.base_url)
+        self.loop.run_until_complete(self.client.open())
+        logger.info(f"Окружение worker создано в процессе {self._pid}")
+
+    def run(self, coro: Awaitable[T]) -> T:
+        """
+        Выполняет корутину в event loop процесса, при необходимости создав окружение
+
+        :param coro: Корутина
+        :return: Результат корутины
+        """
+        self.start()
+        return self.loop.run_until_complete(coro)
+
+    def close(self):
+        """
+        Закрывает HTTP сессию клиента и event loop процесса
+        """
+        if not self.started:
+            return
+        try:
+            self.loop.run_until_complete(self.client.close())
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        except Exception as e:
+            logger.error(f"Ошибка закрытия окружения worker: {e}")
+        finally:
+            self.loop.close()
+            self.loop = None
+            self.client = None
+            self._pid = None
+        logger.info(f"Окружение worker закрыто в процессе {os.getpid()}")
+
+
+worker_runtime = WorkerRuntime()
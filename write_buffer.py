@@ -0,0 +1,259 @@
+"""
+Буфер микро-пакетной записи тиков цен в БД
+"""
+import asyncio
+import csv
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from deribit_task.config import (
+    WRITE_BUFFER_MAX_BATCH,
+    WRITE_BUFFER_FLUSH_INTERVAL,
+    WRITE_BUFFER_MAX_PENDING,
+    WRITE_BUFFER_USE_COPY,
+    ROLLUPS_ENABLED,
+)
+from deribit_task.compact import save_legacy_ticks, store_ticks
+from deribit_task.database import engine as default_engine
+from deribit_task.models import PriceTick
+from deribit_task.price_feed import publish_ticks
+from deribit_task.rollups import upsert_rollups
+
+logger = logging.getLogger(__name__)
+
+# COPY не поддерживает ON CONFLICT: пачка копируется во временную таблицу соединения
+# и переносится в price_ticks одним INSERT ... SELECT с пропуском дубликатов
+STAGING_TABLE = f"{PriceTick.__tablename__}_staging"
+CREATE_STAGING_SQL = (
+    f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+    f"(ticker VARCHAR(64), price NUMERIC(20, 8), timestamp BIGINT) ON COMMIT DELETE ROWS"
+)
+STAGING_COPY_SQL = f"COPY {STAGING_TABLE} (ticker, price, timestamp) FROM STDIN WITH (FORMAT csv)"
+MERGE_STAGING_SQL = text(
+    f"INSERT INTO {PriceTick.__tablename__} (ticker, price, timestamp) "
+    f"SELECT ticker, price, timestamp FROM {STAGING_TABLE} "
+    f"ON CONFLICT (ticker, timestamp) DO NOTHING "
+    f"RETURNING id, ticker, price, timestamp"
+)
+
+
+@dataclass
+class WriteBufferStats:
+    """
+    Счетчики работы буфера записи
+    """
+    flushes: int = 0
+    failed_flushes: int = 0
+    ticks_written: int = 0
+    ticks_dropped: int = 0
+    ticks_duplicated: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    last_flush_latency: float = 0.0
+    max_flush_latency: float = 0.0
+    total_flush_latency: float = 0.0
+
+    def as_dict(self) -> Dict:
+        """
+        Возвращает счетчики в виде словаря
+        """
+        return asdict(self)
+
+
+class PriceTickBuffer:
+    """
+    Асинхронный буфер, накапливающий тики в памяти и сбрасывающий их в БД пачками
+
+    Пачка сбрасывается при достижении max_batch_size тиков или по истечении
+    flush_interval секунд с момента первого тика в ней. Когда в буфере
+    max_pending тиков, put() ждет освобождения места (backpressure).
+    Запись идет через одно соединение из пула engine в выделенном потоке:
+    COPY для PostgreSQL или multi-row INSERT для остальных БД, в той же
+    транзакции обновляются компактная таблица (PRICE_STORAGE_WRITE)
+    и таблицы свечей. Записанные тики публикуются
+    в канал новых цен.
+    """
+
+    def __init__(
+        self,
+        engine: Engine = default_engine,
+        max_batch_size: int = WRITE_BUFFER_MAX_BATCH,
+        flush_interval: float = WRITE_BUFFER_FLUSH_INTERVAL,
+        max_pending: int = WRITE_BUFFER_MAX_PENDING,
+        use_copy: Optional[bool] = None,
+    ):
+        """
+        Инициализация буфера
+
+        :param engine: Engine SQLAlchemy, из пула которого берется соединение
+        :param max_batch_size: Максимальный размер пачки
+        :param flush_interval: Максимальное время накопления пачки в секундах
+        :param max_pending: Максимальное количество тиков в буфере
+        :param use_copy: Использовать COPY (по умолчанию - для PostgreSQL, если не отключено в конфиге)
+        """
+        if use_copy is None:
+            use_copy = WRITE_BUFFER_USE_COPY and engine.dialect.name == 'postgresql'
+
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.use_copy = use_copy
+        self.stats = WriteBufferStats()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='price-tick-buffer')
+        self._connection: Optional[Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def __aenter__(self):
+        """
+        Асинхронный контекстный менеджер - вход
+        """
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        Асинхронный контекстный менеджер - выход
+        """
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество тиков, ожидающих записи
+        """
+        return self._queue.qsize()
+
+    def start(self):
+        """
+        Запускает фоновую задачу сброса буфера
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, ticker: str, price: float, timestamp: int):
+        """
+        Добавляет тик в буфер, ожидая свободного места при переполнении
+
+        :param ticker: Тикер валюты
+        :param price: Цена
+        :param timestamp: Время в UNIX timestamp
+        """
+        if self._closed:
+            raise RuntimeError("Буфер записи уже закрыт")
+        await self._queue.put({'ticker': ticker, 'price': price, 'timestamp': timestamp})
+
+    async def close(self):
+        """
+        Сбрасывает все накопленные тики и освобождает соединение
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._release_connection)
+        self._executor.shutdown(wait=True)
+        logger.info(f"Буфер записи закрыт: {self.stats.as_dict()}")
+
+    async def _run(self):
+        """
+        Фоновый цикл: собирает пачки из очереди и сбрасывает их в БД
+        """
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                batch.append(item)
+
+            await loop.run_in_executor(self._executor, self._flush, batch)
+
+    def _flush(self, batch: List[Dict]):
+        """
+        Записывает пачку в БД и обновляет счетчики (выполняется в потоке буфера)
+        """
+        started = time.perf_counter()
+        try:
+            if self._connection is None:
+                self._connection = self.engine.connect()
+            with self._connection.begin():
+                saved = store_ticks(
+                    self._connection, batch, save_legacy=self._copy if self.use_copy else save_legacy_ticks
+                )
+                if ROLLUPS_ENABLED:
+                    upsert_rollups(self._connection, saved)
+        except Exception as e:
+            logger.error(f"Ошибка записи пачки из {len(batch)} тиков: {e}")
+            self.stats.failed_flushes += 1
+            self.stats.ticks_dropped += len(batch)
+            self._release_connection()
+            return
+
+        latency = time.perf_counter() - started
+        self.stats.flushes += 1
+        # Дубликаты, пропущенные ON CONFLICT DO NOTHING, не считаются записанными
+        self.stats.ticks_written += len(saved)
+        self.stats.ticks_duplicated += len(batch) - len(saved)
+        self.stats.last_batch_size = len(batch)
+        self.stats.max_batch_size = max(self.stats.max_batch_size, len(batch))
+        self.stats.last_flush_latency = latency
+        self.stats.max_flush_latency = max(self.stats.max_flush_latency, latency)
+        self.stats.total_flush_latency += latency
+
+        publish_ticks(saved)
+
+    def _copy(self, connection: Connection, batch: List[Dict]) -> List[Dict]:
+        """
+        Записывает пачку через PostgreSQL COPY FROM STDIN в текущей транзакции соединения
+
+        :return: Вставленные тики без дубликатов с ключами id, ticker, price, timestamp
+        """
+        connection.exec_driver_sql(CREATE_STAGING_SQL)
+        data = io.StringIO()
+        writer = csv.writer(data)
+        for tick in batch:
+            writer.writerow((tick['ticker'], tick['price'], tick['timestamp']))
+        data.seek(0)
+
+        with connection.connection.dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(STAGING_COPY_SQL, data)
+        return [dict(row._mapping) for row in connection.execute(MERGE_STAGING_SQL)]
+
+    def _release_connection(self):
+        """
+        Возвращает соединение в пул
+        """
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception as e:
+                logger.error(f"Ошибка закрытия соединения буфера записи: {e}")
+            self._connection = None